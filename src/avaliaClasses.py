@@ -18,12 +18,12 @@ from collections import Counter
 def aggregateSymbols(g, clsAttr, symbolAttr):
     clsSet = g.getNodeAttrValueSet(clsAttr)
 
-    clsCounters = {c: Counter() for c in clsSet}
-
-    for node in g.nodes():
-        cls = g.getNodeAttr(node, clsAttr)
-        symbol = g.getNodeAttr(node, symbolAttr)
-        clsCounters[cls][symbol] += 1
+    # Os membros de cada classe vêm do índice invertido do atributo de
+    # classe, sem percorrer todos os nodos por classe
+    clsCounters = {}
+    for cls in clsSet:
+        clsCounters[cls] = Counter(g.getNodeAttr(node, symbolAttr)
+                for node in g.getNodesByAttr(clsAttr, cls))
 
     return clsCounters
 
@@ -59,6 +59,7 @@ import sys
 sys.path.append(os.path.join(sys.path[0],'lib'))
 
 import graph as gr
+from refinementTree import RefinementTree, refinementMorphismStats
 import SOM.vectorBased as somV
 
 if sys.version_info.major < 3:
@@ -249,16 +250,19 @@ def carregaGrafo(args, relationAttr=RELATION_ATTR,
                 for _ in csvReader:
                     break
 
+            edges = []
+            relations = []
+            weights = []
             for campos in csvReader:
                 src = campos[0]
                 tgt = campos[1]
                 rel = campos[2]
-                weight = float(campos[3])
+                edges.append((src, tgt, rel))
+                relations.append(rel)
+                weights.append(float(campos[3]))
 
-                g.addEdge(src, tgt, rel)
-                e = (src, tgt, rel)
-                g.setEdgeAttr(e, relSpec.name, rel)
-                g.setEdgeAttr(e, weiSpec.name, weight)
+            g.addEdgesFrom(edges, {relSpec.name: relations,
+                weiSpec.name: weights})
 
     else:
         raise IOError("Tipo de arquivo não suportado - '{}'".format(ext))
@@ -310,7 +314,9 @@ class CtrlRegEquiv(object):
         self.filename = os.path.join(dirOut,'classes_'+tipo+'.csv')
         self.filenameGraph = os.path.join(dirOut,tipo)
 
-        self.classesVet = []
+        self.filenameTree = os.path.join(dirOut,'refinamento_'+tipo+'.pkl')
+
+        self.tree = RefinementTree(graph.nodes())
         self.iterations = 0
 
     def procIteration(self, i, classes, done, classesParents):
@@ -318,7 +324,7 @@ class CtrlRegEquiv(object):
             self.log.info('RegEquiv {0}:'.format(self.tipo))
         self.log.info('    iteration: {0}'.format(i))
         if not done:
-            self.classesVet.append(classes)
+            self.tree.addLevel(classes, classesParents)
             self.iterations = i
 
         if done or i >= self.iterLimit:
@@ -330,6 +336,12 @@ class CtrlRegEquiv(object):
         return i < self.iterLimit
 
     def writeResult(self):
+        self.log.info('Salvando {0}...'.format(self.filenameTree))
+        self.tree.save(self.filenameTree)
+        self.log.info('...ok')
+
+        nodes = self.tree.nodes
+
         self.log.info('Salvando {0}...'.format(self.filename))
         with open( self.filename, 'w', newline='') as f:
             writer = csv.writer(f)
@@ -337,27 +349,32 @@ class CtrlRegEquiv(object):
             row = ['node'] + ['regClass_'+str(i) for i in range(self.iterations)]
             writer.writerow(row)
 
-            for c in self.classesVet:
-                keys = sorted(c.keys())
-                break
+            # iterClassVectors fornece sempre o mesmo vetor atualizado
+            vectors = [v[:] for _, v in self.tree.iterClassVectors()]
 
-            for k in keys:
-                row = [k] + [c[k] for c in self.classesVet]
+            for k in sorted(range(len(nodes)), key=lambda k: nodes[k]):
+                row = [nodes[k]] + [v[k] for v in vectors]
                 writer.writerow(row)
+            del vectors
         self.log.info('...ok')
 
         # end with
 
-        for i, classes in enumerate(self.classesVet):
+        for i, vector in self.tree.iterClassVectors():
             classAttr = self.classAttr + str(i + 1)
             spec = gr.AttrSpec(classAttr,'int')
             self.graph.addNodeAttrSpec(spec)
-            self.graph.setNodeAttrFromDict(classAttr, classes)
+            self.graph.setNodeAttrFromDict(classAttr, dict(zip(nodes, vector)))
 
-        for i in range(self.iterations):
+        # Grafos de classes de todas as iterações com uma única passada pelas
+        # arestas do grafo
+        levelStats = refinementMorphismStats(self.graph, self.tree,
+                edgeClassAttr=RELATION_ATTR)
+        for i, stats in enumerate(levelStats):
             classAttr = self.classAttr + str(i + 1)
-            g = self.graph.spawnFromClassAttributes(nodeClassAttr=classAttr,
-                    edgeClassAttr=RELATION_ATTR)
+            g = gr.graphFromMorphismStats(*stats, nodeClassAttr=classAttr,
+                    relationAttr=RELATION_ATTR,
+                    nodeClassSpec=self.graph.getNodeAttrSpec(classAttr))
             filename = self.filenameGraph + '_' + classAttr
             self.log.info('Salvando grafo {} com {} nodos e {} arestas...'.format(filename,
                     g.getNumNodes(), g.getNumEdges()))
@@ -371,38 +388,43 @@ def grafoEquivRegularSoUmTipoAresta(a, tipo, log):
     arestas.
     """
     nodeClassAttr = 'class'
-    b = a.spawnFromClassAttributes(edgeClassAttr=RELATION_ATTR)
-
-    tipo, b.getNumNodes(), b.getNumEdges()
-    for edge in b.edges():
-        if b.getEdgeAttr(edge, RELATION_ATTR) == tipo:
-            b.setEdgeAttr(edge, 'filtro', 1)
-        else:
-            b.setEdgeAttr(edge, 'filtro', 0)
-
-    b.removeEdgeByAttr('filtro', 0)
-    log.info('Numero de arestas do tipo {}: {}'.format(tipo, b.getNumEdges()))
-
-    ctrl = CtrlRegEquiv(graph=b, tipo=tipo, iterLimit=20, dirOut=DIR_OUTPUT,
-            log=log, classAttr=nodeClassAttr)
-
-    log.info("Calculando equivalencia regular para '{}'...".format(tipo))
-    gr.regularEquivalence(b, ctrlFunc=ctrl.procIteration)
-    ctrl.writeResult()
-    log.info('...ok')
-
-    attrName = tipo+'_regularClass'
-    spec = gr.AttrSpec(attrName, 'int')
-    a.addNodeAttrSpec(spec)
-    for node in b.nodes():
-        a.setNodeAttr(node, attrName, b.getNodeAttr(node, nodeClassAttr))
-
-    nodeAttrs, edgeAttrs, nodeSpecs, edgeSpecs = gr.aggregateClassAttr(a,
-        nodeClassAttr=attrName, edgeClassAttr=RELATION_ATTR,
-        edgeAttrs=[WEIGHT_ATTR])
-
-    b = b.spawnFromClassAttributes(nodeClassAttr=nodeClassAttr,
-            edgeClassAttr=RELATION_ATTR)
+    # Visão do grafo original só com as arestas do tipo, sem cópia. As
+    # classes calculadas abaixo são gravadas na visão e não alteram 'a'. A
+    # relação das arestas é o próprio atributo Relationship (veja
+    # carregaGrafo), e com o índice por relação a visão percorre apenas as
+    # arestas do tipo. O índice, que ocupa memória e torna mais lentas as
+    # inserções seguintes em 'a', é descartado ao final se foi criado aqui.
+    dropIndex = not a.hasRelationIndex()
+    a.buildRelationIndex()
+    try:
+        b = a.subgraphView(relations=[tipo])
+        log.info('Numero de arestas do tipo {}: {}'.format(tipo,
+            b.getNumEdges()))
+
+        ctrl = CtrlRegEquiv(graph=b, tipo=tipo, iterLimit=20,
+                dirOut=DIR_OUTPUT, log=log, classAttr=nodeClassAttr)
+
+        log.info("Calculando equivalencia regular para '{}'...".format(tipo))
+        gr.regularEquivalence(b, edgeClassAttr=RELATION_ATTR,
+                ctrlFunc=ctrl.procIteration)
+        ctrl.writeResult()
+        log.info('...ok')
+
+        attrName = tipo+'_regularClass'
+        spec = gr.AttrSpec(attrName, 'int')
+        a.addNodeAttrSpec(spec)
+        for node in b.nodes():
+            a.setNodeAttr(node, attrName, b.getNodeAttr(node, nodeClassAttr))
+
+        nodeAttrs, edgeAttrs, nodeSpecs, edgeSpecs = gr.aggregateClassAttr(a,
+            nodeClassAttr=attrName, edgeClassAttr=RELATION_ATTR,
+            edgeAttrs=[WEIGHT_ATTR])
+
+        b = b.spawnFromClassAttributes(nodeClassAttr=nodeClassAttr,
+                edgeClassAttr=RELATION_ATTR)
+    finally:
+        if dropIndex:
+            a.dropRelationIndex()
 
     components = gr.weaklyConnectedComponents(b)
     b.setNodeAttrFromDict('component',components, default=0, attrType='int')
@@ -568,23 +590,28 @@ def relationShipParaAtributoDeAresta(g, tiposArestas, weightAttr):
     # iterações daquele tipo ocorreram
     atributos = []
     for tipo in tiposArestas:
-        spec = gr.AttrSpec(tipo, 'int', 0)
+        spec = gr.AttrSpec(tipo, 'int', 0, sparse=True)
         novo.addEdgeAttrSpec(spec)
         atributos.append(tipo)
 
     # Percorremos as arestas do grafo original somando os pesos no novo grafo. A
     # relação (rel) no grafo original é igual ao atributo Relationship, pois
     # este foi utilizado em 'main' para carregar o grafo do arquivo.
-    for src, tgt, rel in g.edges():
-        weight = g.getEdgeAttr((src, tgt, rel), weightAttr, 0)
+    #
+    # As arestas são percorridas e acessadas pelos seus identificadores
+    # inteiros, sem criar tuplas por aresta.
+    for edgeId in g.edgeIds():
+        src, tgt, rel = g.getEdgeById(edgeId)
+        weight = g.getEdgeAttrById(edgeId, weightAttr, 0)
 
         # O grafo original esta com weight como um atributo do tipo string, por
         # isso convertemos para inteiro
         weight = int(weight)
 
-        count = novo.getEdgeAttr((src, tgt, 1), rel, 0)
+        novoId = novo.getEdgeId((src, tgt, 1))
+        count = novo.getEdgeAttrById(novoId, rel, 0)
         count += weight
-        novo.setEdgeAttr((src, tgt, 1), rel, count)
+        novo.setEdgeAttrById(novoId, rel, count)
 
     # Removemos o atributo 'tipo' criado dos grafos original e novo
     g.removeEdgeAttr('tipo')
@@ -604,11 +631,11 @@ def contandoInteracoesPorNodo(g, tiposInteracoes):
     
     for tipo in tiposInteracoes:
         attrName = tipo+'_in'
-        spec = gr.AttrSpec(attrName, 'int', 0)
+        spec = gr.AttrSpec(attrName, 'int', 0, sparse=True)
         g.addNodeAttrSpec(spec)
         atributos.append(attrName)
         attrName = tipo+'_out'
-        spec = gr.AttrSpec(attrName, 'int', 0)
+        spec = gr.AttrSpec(attrName, 'int', 0, sparse=True)
         g.addNodeAttrSpec(spec)
         atributos.append(attrName)
 
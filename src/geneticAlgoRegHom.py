@@ -15,6 +15,7 @@ from deap import base, creator, tools, algorithms
 sys.path.append(os.path.join(sys.path[0],'lib'))
 
 import graph as gr
+import vecMorphism as vm
 
 #------------------------------------------------------------------------------
 # Configurações
@@ -91,6 +92,48 @@ def createRegIdxEvalFunction(g):
 
     return evaluate, nodeToIdx
 
+def createBatchRegIdxEvalFunction(g):
+    """Cria uma função que avalia uma população inteira de uma só vez, com o
+    mesmo resultado de aplicar a função criada por createRegIdxEvalFunction a
+    cada indivíduo.
+
+    Return:
+
+    - evaluatePopulation: Função que recebe uma sequência de indivíduos (ou uma
+      matriz indivíduo x nodo) e retorna a lista de fitness (ri, ) de cada
+      indivíduo.
+    - nodeToIdx: O mapeamento de nodos do grafo para indice nas listas de
+      classes, o mesmo de createRegIdxEvalFunction.
+    """
+    adj = gr.CompiledAdjacency(g)
+    nodeToIdx = adj.nodeIdx
+    src, tgt, rel = vm.edgeArrays(adj)
+
+    def evaluatePopulation(population):
+        population = numpy.asarray(population, dtype=numpy.int64)
+        if len(population) == 0:
+            return []
+        regIdx = vm.populationRegIdx(population, src, tgt, rel,
+                numRelations=len(adj.edgeClasses))
+        return [(ri, ) for ri in regIdx.ri.tolist()]
+
+    return evaluatePopulation, nodeToIdx
+
+def createBatchMap(evaluate, evaluatePopulation):
+    """Cria uma função 'map' para ser registrada na toolbox do DEAP. As
+    chamadas com a função de avaliação 'evaluate', como as feitas por
+    algorithms.eaSimple para avaliar os indivíduos inválidos, são resolvidas
+    com uma única chamada de 'evaluatePopulation'. As demais usam o map
+    padrão.
+    """
+    def batchMap(func, *iterables):
+        # A toolbox registra as funções como functools.partial
+        if getattr(func, 'func', func) is evaluate and len(iterables) == 1:
+            return evaluatePopulation(list(iterables[0]))
+        return list(map(func, *iterables))
+
+    return batchMap
+
 def numClassesEvalFunction(clsVet, numCls=1):
     """Avalia uma classificacao pelo número de classes presentes na mesma em
     relação ao número de classes total.
@@ -193,6 +236,7 @@ g.removeEdgeByAttr('relation','Liker')
 print('Num edges {0}'.format(g.getNumEdges()))
 
 evaluateRegIdx, nodeToIdx = createRegIdxEvalFunction(g)
+evaluateRegIdxPopulation, _ = createBatchRegIdxEvalFunction(g)
 
 # Função de avaliação
 def evaluateRegIdxAndNumClass(ind):
@@ -214,6 +258,9 @@ creator.create("Individual", array.array, typecode='I',
 toolbox.register('attr_class', random.randint, 1, NUM_CLASS)
 
 toolbox.register('evaluate', evaluateF)
+# As avaliações da população feitas por eaSimple são calculadas em lote
+toolbox.register('map', createBatchMap(evaluateRegIdx,
+    evaluateRegIdxPopulation))
 toolbox.register('mate', tools.cxOnePoint)
 toolbox.register('mutate', tools.mutUniformInt, low=1, up=NUM_CLASS,
         indpb=MUT_IND_PB)
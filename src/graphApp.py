@@ -8,6 +8,7 @@ import logging.config
 import traceback
 import math
 import csv
+import operator
 
 # Acrescentando o diretorio lib ao path. Lembrando que sys.path[0] representa o
 # diretório onde este script se encontra
@@ -65,6 +66,7 @@ CSV_OUT_DIALECT='appcsvdialect'
 # Classes de controle
 #---------------------------------------------------------------------
 import graph as gr
+from refinementTree import RefinementTree
 from semiRegHom import KSemiRegClassVisitor, ksemiRegularClass
 import semiRegHom
 import random
@@ -75,6 +77,11 @@ class GraphModel(object):
         self.graph = graphObj
         self.name = name
         self.filename = filename
+        # RegularEquivalenceMaintainer de cada atributo de classe calculado
+        # de forma incremental
+        self.regEquivMaintainers = {}
+        # Cópias copy-on-write do grafo (MultiGraph.snapshot) por nome
+        self.snapshots = {}
 
     def createGraphmlFilename(self):
         if self.filename:
@@ -285,6 +292,11 @@ class GraphAppControl(object):
             spec = gr.AttrSpec(relationAttr, 'string')
             g.addEdgeAttrSpec(spec)
 
+            # As arestas são lidas em colunas e inseridas em bloco. Os pesos
+            # de arestas repetidas são somados.
+            edges = []
+            weights = []
+            relations = []
             for row in reader:
                 src = row[srcNodeCol].strip()
                 tgt = row[tgtNodeCol].strip()
@@ -295,17 +307,15 @@ class GraphAppControl(object):
                 if weightCol is not None:
                     weigth = float(row[weightCol])
 
-                if g.hasEdge(src, tgt, rel):
-                    oldWeight = g.getEdgeAttr((src, tgt, rel), weightAttr)
-                    weigth += oldWeight
-                    g.setEdgeAttr((src,tgt,rel), weightAttr, weigth)
-                else:
-                    g.addEdge(src, tgt, rel)
-                    g.setEdgeAttr((src,tgt,rel), weightAttr, weigth)
-                    g.setEdgeAttr((src,tgt,rel), relationAttr, rel)
+                edges.append((src, tgt, rel))
+                weights.append(weigth)
+                relations.append(rel)
             # end for
         #end with
 
+        g.addEdgesFrom(edges, {weightAttr: weights, relationAttr: relations},
+                combine={weightAttr: operator.add})
+
         self.insertGraph(g, name, filename)
 
     def saveGraphml(self, name, filename=None):
@@ -324,6 +334,69 @@ class GraphAppControl(object):
         g = gr.MultiGraph()
         self.insertGraph(g, name)
 
+    def snapshotGraph(self, graphName, snapshotName=None):
+        """Saves the current state of a graph so that it can be restored
+        later with restoreGraph. The snapshot is a copy-on-write copy
+        (MultiGraph.snapshot): taking it does not copy the graph, and the
+        graph and the snapshot share each part until one of them changes it.
+
+        Args:
+            - graphName: Name of the graph
+            - snapshotName: Name of the snapshot. If None a numeric name is
+              generated. An existing snapshot with the same name is
+              replaced.
+
+        Return:
+            The name of the snapshot
+        """
+        gmod = self.getExistentGraphModel(graphName)
+
+        if snapshotName is None or snapshotName == '':
+            n = 1
+            snapshotName = '{0:03}'.format(n)
+            while snapshotName in gmod.snapshots:
+                n += 1
+                snapshotName = '{0:03}'.format(n)
+
+        gmod.snapshots[snapshotName] = gmod.graph.snapshot()
+        return snapshotName
+
+    def restoreGraph(self, graphName, snapshotName):
+        """Restores the state of a graph saved by snapshotGraph. The snapshot
+        is kept and can be restored again.
+
+        Incremental regular equivalence classifications of the graph are
+        discarded, as they followed the changes of the replaced state.
+
+        Args:
+            - graphName: Name of the graph
+            - snapshotName: Name of the snapshot
+        """
+        gmod = self.getExistentGraphModel(graphName)
+
+        snapshot = gmod.snapshots.get(snapshotName)
+        if snapshot is None:
+            raise ValueError("Snapshot '{0}' do grafo '{1}' não existe".format(
+                snapshotName, graphName))
+
+        for maintainer in gmod.regEquivMaintainers.values():
+            maintainer.detach()
+        gmod.regEquivMaintainers = {}
+
+        gmod.graph = snapshot.snapshot()
+
+        self._callChangeHandlers(gmod)
+
+    def getSnapshotNames(self, graphName):
+        return sorted(self.getExistentGraphModel(graphName).snapshots.keys())
+
+    def removeSnapshot(self, graphName, snapshotName):
+        """Removes a snapshot saved by snapshotGraph, releasing the parts
+        it does not share with the graph.
+        """
+        gmod = self.getExistentGraphModel(graphName)
+        gmod.snapshots.pop(snapshotName, None)
+
     def readIdsAndAttrsFromCsv(self, filename, idCols,
             attrCols, attrSpecs,
             firstRowIsHeading):
@@ -524,7 +597,14 @@ class GraphAppControl(object):
     def classifyByRegularEquivalence(self, graphName, classAttr,
             preClassAttr=None, edgeClassAttr=None,
             regularType=gr.REGULAR_TOTAL,
-            maxIterations=0, classForEveryIteration=False):
+            maxIterations=0, classForEveryIteration=False, incremental=False):
+        """Classifica os nodos do grafo por equivalência regular.
+
+        Com incremental=True a classificação final é gravada no atributo
+        'classAttr' e mantida por um gr.RegularEquivalenceMaintainer associado
+        ao grafo: chamadas posteriores com o mesmo 'classAttr' apenas
+        processam as alterações feitas no grafo desde a chamada anterior.
+        """
 
         if graphName not in self.graphModels.keys():
             raise KeyError(
@@ -532,6 +612,12 @@ class GraphAppControl(object):
 
         gmod = self.graphModels[graphName]
 
+        if incremental:
+            self._classifyByRegularEquivalenceIncremental(gmod, classAttr,
+                preClassAttr, edgeClassAttr, regularType, maxIterations,
+                classForEveryIteration)
+            return
+
         spec = gr.AttrSpec(classAttr, 'int')
 
         isOk, errMsg = self.validateNewAttrs(gmod, [spec], 'node')
@@ -550,7 +636,11 @@ class GraphAppControl(object):
             raise ValueError(
                 "Tipo de regularidade inválido: {0}".format(regularType))
 
-        classesVet = []
+        # Com classForEveryIteration as classificações de todas as iterações
+        # são guardadas na árvore de refinamento. O nível l da árvore
+        # corresponde à iteração l + 1.
+        tree = RefinementTree(gmod.graph.nodes())
+        finalClasses = []
         def procIteration(i, classes, done, newClassesParents):
             self.logger.info(
                 'Regular equivalence iteration {0} - done {1}'.format(i, done))
@@ -562,23 +652,77 @@ class GraphAppControl(object):
                 # para (done = True) quando percebe que não houve alteração entre a
                 # classificação atual e a anterior.
                 if not done:
-                    classesVet.append((i, classes))
+                    tree.addLevel(classes, newClassesParents)
             elif done or not keepGoing:
-                classesVet.append((i, classes))
+                finalClasses.append((i, classes))
 
             return keepGoing
 
         gr.regularEquivalence(gmod.graph, preClassAttr=preClassAttr,
             edgeClassAttr=edgeClassAttr, regularType=regularType,
-            ctrlFunc=procIteration)
-
-        for i, classes in classesVet:
+            ctrlFunc=procIteration, worklist=True)
+
+        nodes = tree.nodes
+        classesIter = itertools.chain(
+            ((level + 1, dict(zip(nodes, vector)))
+                for level, vector in tree.iterClassVectors()),
+            finalClasses)
+        for i, classes in classesIter:
             spec = gr.AttrSpec('{0}_{1}'.format(classAttr, i),'int')
             gmod.graph.addNodeAttrSpec(spec)
             gmod.graph.setNodeAttrFromDict(spec.name, classes)
 
         self._callChangeHandlers(gmod)
 
+    def _classifyByRegularEquivalenceIncremental(self, gmod, classAttr,
+            preClassAttr, edgeClassAttr, regularType, maxIterations,
+            classForEveryIteration):
+
+        if maxIterations > 0 or classForEveryIteration:
+            raise ValueError(
+                "Modo incremental calcula apenas a classificação final")
+
+        maintainer = gmod.regEquivMaintainers.get(classAttr)
+
+        if maintainer is not None:
+            if (maintainer.preClassAttr != preClassAttr
+                    or maintainer.edgeClassAttr != edgeClassAttr
+                    or maintainer.regularType != regularType):
+                raise ValueError(
+                    "Atributo '{0}' foi calculado com outros parâmetros".format(
+                        classAttr))
+        else:
+            spec = gr.AttrSpec(classAttr, 'int')
+
+            isOk, errMsg = self.validateNewAttrs(gmod, [spec], 'node')
+            if not isOk:
+                raise KeyError("'classAttr' inválido. " + errMsg)
+
+            if preClassAttr is not None:
+                if preClassAttr not in gmod.graph.getNodeAttrNames():
+                    raise KeyError("Atributo de nodo '{0}' não existe".format(preClassAttr))
+
+            if edgeClassAttr is not None:
+                if edgeClassAttr not in gmod.graph.getEdgeAttrNames():
+                    raise KeyError("Atributo de aresta '{0}' não existe".format(edgeClassAttr))
+
+            if regularType not in gr.REGULAR_TYPES:
+                raise ValueError(
+                    "Tipo de regularidade inválido: {0}".format(regularType))
+
+            maintainer = gr.RegularEquivalenceMaintainer(gmod.graph,
+                preClassAttr=preClassAttr, edgeClassAttr=edgeClassAttr,
+                regularType=regularType)
+            gmod.regEquivMaintainers[classAttr] = maintainer
+            gmod.graph.addNodeAttrSpec(spec)
+
+        self.logger.info(
+            'Regular equivalence (incremental) - {0} classes'.format(
+                maintainer.getNumClasses()))
+        gmod.graph.setNodeAttrFromDict(classAttr, maintainer.classes())
+
+        self._callChangeHandlers(gmod)
+
     def fullHomomorphism(self, graphName, newGraphName, nodeClassAttr=None,
             edgeClassAttr=None, regIdxPrefix=None, countPrefix=None):
 
@@ -712,10 +856,12 @@ class GraphAppControl(object):
 
         iterProf = itertools.product(gmod.graph.relations,
             classValues,('in','out'))
+        # Cada nodo tem poucos perfis diferentes de 0: os atributos são
+        # esparsos e só os valores não nulos são guardados
         profAttrs = {}
         for prof in iterProf:
             name = '_'.join(itertools.chain([attrPrefix], map(str,prof)))
-            spec = gr.AttrSpec(name,int,0)
+            spec = gr.AttrSpec(name, int, 0, sparse=True)
             gmod.graph.addNodeAttrSpec(spec)
             profAttrs[prof] = name
 
@@ -1,6 +1,8 @@
 # coding: utf-8
 import math
 import collections
+from array import array
+from collections.abc import Mapping
 
 class NumericAggregator(object):
     """Agregador de valores núméricos.
@@ -130,6 +132,219 @@ class NumericAggregator(object):
         v.__iadd__(other)
         return v
 
+class AggregatorColumn(object):
+    """Agregadores numéricos de elementos indexados por um identificador
+    inteiro (como as colunas de attrStore), guardados em cinco vetores
+    tipados em vez de um NumericAggregator por elemento.
+
+    Atributos:
+        - counts: Vetor 'q' com o número de valores agregados em cada
+              posição.
+        - sums, sumSquares, mins, maxs: Vetores 'd' com a soma, a soma dos
+              quadrados, o mínimo e o máximo dos valores de cada posição.
+    """
+
+    __slots__ = ('counts', 'sums', 'sumSquares', 'mins', 'maxs', '_present')
+
+    def __init__(self, size=0):
+        self.counts = array('q', bytes(8 * size))
+        self.sums = array('d', bytes(8 * size))
+        self.sumSquares = array('d', bytes(8 * size))
+        self.mins = array('d', [float('inf')]) * size
+        self.maxs = array('d', [float('-inf')]) * size
+        self._present = bytearray(size)
+
+    def __len__(self):
+        return len(self._present)
+
+    def grow(self, size):
+        """Aumenta a coluna para 'size' posições, sem agregador."""
+        extra = size - len(self._present)
+        if extra <= 0:
+            return
+        self.counts.extend(array('q', bytes(8 * extra)))
+        self.sums.extend(array('d', bytes(8 * extra)))
+        self.sumSquares.extend(array('d', bytes(8 * extra)))
+        self.mins.extend(array('d', [float('inf')]) * extra)
+        self.maxs.extend(array('d', [float('-inf')]) * extra)
+        self._present.extend(bytes(extra))
+
+    def has(self, i):
+        return i < len(self._present) and self._present[i]
+
+    def ids(self):
+        """Identificadores das posições que possuem agregador, em ordem
+        crescente.
+        """
+        return (i for i, present in enumerate(self._present) if present)
+
+    def count(self):
+        """Número de posições que possuem agregador."""
+        return len(self._present) - self._present.count(0)
+
+    def aggregator(self, i):
+        """NumericAggregator da posição 'i' (ColumnAggregator), criado
+        vazio se ainda não existir. Alterá-lo altera a coluna.
+        """
+        self._touch(i)
+        return ColumnAggregator(self, i)
+
+    def get(self, i):
+        """Cópia do agregador da posição 'i' em um NumericAggregator
+        independente da coluna.
+        """
+        aggr = NumericAggregator()
+        if self.counts[i] > 0:
+            aggr._count = self.counts[i]
+            aggr._sum = self.sums[i]
+            aggr._sumOfSquares = self.sumSquares[i]
+            aggr._min = self.mins[i]
+            aggr._max = self.maxs[i]
+        return aggr
+
+    def _touch(self, i):
+        if i >= len(self._present):
+            self.grow(max(i + 1, 2 * len(self._present)))
+        self._present[i] = 1
+
+    def discard(self, i):
+        """Remove o agregador da posição 'i'."""
+        if self.has(i):
+            self._present[i] = 0
+            self.counts[i] = 0
+            self.sums[i] = 0.0
+            self.sumSquares[i] = 0.0
+            self.mins[i] = float('inf')
+            self.maxs[i] = float('-inf')
+
+    def add(self, i, value):
+        """Agrega 'value' na posição 'i', como NumericAggregator.__iadd__:
+        'value' pode ser um número, um NumericAggregator ou None (que apenas
+        cria o agregador).
+
+        Raises:
+            - TypeError: Para outros valores.
+        """
+        self._touch(i)
+        if isinstance(value, NumericAggregator):
+            if value._count > 0:
+                self._merge(i, value._count, value._sum, value._sumOfSquares,
+                        value._min, value._max)
+        elif isinstance(value, (int, float)):
+            self._merge(i, 1, value, value**2, value, value)
+        elif value is not None:
+            raise TypeError('Valor não numérico: {0!r}'.format(value))
+
+    def _merge(self, i, count, total, totalSquares, minimum, maximum):
+        self.counts[i] += count
+        self.sums[i] += total
+        self.sumSquares[i] += totalSquares
+        if minimum < self.mins[i]:
+            self.mins[i] = minimum
+        if maximum > self.maxs[i]:
+            self.maxs[i] = maximum
+
+    def scatterMerge(self, source, sourceIds, groupIds):
+        """Agrega, para cada k, o agregador da posição sourceIds[k] da
+        AggregatorColumn 'source' no da posição groupIds[k] desta coluna,
+        em uma única passada sobre os vetores, sem criar objetos por
+        elemento. As posições groupIds[k] passam a ter agregador mesmo que
+        sourceIds[k] não tenha.
+        """
+        groupIds = list(groupIds)
+        self.grow(max(groupIds, default=-1) + 1)
+        present = self._present
+        for i in set(groupIds):
+            present[i] = 1
+
+        counts, sums, sumSquares = self.counts, self.sums, self.sumSquares
+        mins, maxs = self.mins, self.maxs
+        srcCounts, srcSums = source.counts, source.sums
+        srcSumSquares = source.sumSquares
+        srcMins, srcMaxs = source.mins, source.maxs
+        srcSize = len(source)
+
+        for j, i in zip(sourceIds, groupIds):
+            if j >= srcSize:
+                continue
+            count = srcCounts[j]
+            if not count:
+                continue
+            counts[i] += count
+            sums[i] += srcSums[j]
+            sumSquares[i] += srcSumSquares[j]
+            value = srcMins[j]
+            if value < mins[i]:
+                mins[i] = value
+            value = srcMaxs[j]
+            if value > maxs[i]:
+                maxs[i] = value
+
+    def copy(self):
+        column = AggregatorColumn()
+        column.counts = self.counts[:]
+        column.sums = self.sums[:]
+        column.sumSquares = self.sumSquares[:]
+        column.mins = self.mins[:]
+        column.maxs = self.maxs[:]
+        column._present = bytearray(self._present)
+        return column
+
+def _columnField(name):
+    def get(self):
+        return getattr(self._column, name)[self._i]
+    def set(self, value):
+        getattr(self._column, name)[self._i] = value
+    return property(get, set)
+
+class ColumnAggregator(NumericAggregator):
+    """NumericAggregator de uma posição de uma AggregatorColumn: as
+    estatísticas são lidas dos vetores da coluna e 'aggr += valor' os
+    altera.
+    """
+
+    __slots__ = ('_column', '_i')
+
+    _count = _columnField('counts')
+    _sum = _columnField('sums')
+    _sumOfSquares = _columnField('sumSquares')
+    _min = _columnField('mins')
+    _max = _columnField('maxs')
+
+    def __init__(self, column, i):
+        self._column = column
+        self._i = i
+
+class AggregatorView(Mapping):
+    """Visão somente leitura de uma AggregatorColumn como um dicionário
+    elemento -> NumericAggregator. Os agregadores retornados são cópias
+    (AggregatorColumn.get): alterá-los não altera a coluna.
+
+    Atributos:
+        - index: Índice dos elementos (attrStore.ElemIndex).
+        - column: AggregatorColumn.
+    """
+
+    __slots__ = ('index', 'column')
+
+    def __init__(self, index, column):
+        self.index = index
+        self.column = column
+
+    def __getitem__(self, key):
+        i = self.index.ids.get(key)
+        if i is None or not self.column.has(i):
+            raise KeyError(key)
+        return self.column.get(i)
+
+    def __iter__(self):
+        keys = self.index.keys
+        for i in self.column.ids():
+            yield keys[i]
+
+    def __len__(self):
+        return self.column.count()
+
 class SymbolicAggregator(object):
     """Agregador de símbolos.
     """
@@ -0,0 +1,795 @@
+# coding: utf-8
+"""Armazenamento colunar tipado dos atributos de nodos e arestas.
+
+Cada elemento (nodo ou aresta) recebe de um ElemIndex um identificador inteiro
+denso e cada atributo é guardado em uma AttrColumn: um vetor tipado (módulo
+array) indexado por estes identificadores e um vetor de presença que indica
+quais elementos possuem valor. O tipo do vetor vem do AttrSpec do atributo:
+
+    - 'int', 'long': inteiros de 64 bits
+    - 'float', 'double': ponto flutuante de 64 bits
+    - 'boolean': um byte por elemento
+    - 'string' ou atributo sem AttrSpec: lista de objetos Python
+
+Um valor que não cabe no tipo da coluna (por exemplo uma tupla em um atributo
+'int') faz a coluna passar a guardar objetos Python, de forma que nenhum valor
+aceito antes deixa de ser aceito.
+
+AttrStore e AttrColumnView mantêm a interface de dicionários de
+MultiGraph.nodeAttrs e MultiGraph.edgeAttrs (atributo -> elemento -> valor),
+e os vetores das colunas podem ser obtidos sem cópia para processamento em
+bloco (MultiGraph.getNodeAttrColumn, getEdgeAttrColumn)::
+
+    values, present = g.getEdgeAttrColumn('peso')
+    pesos = numpy.asarray(values)[numpy.asarray(present, dtype=bool)]
+
+Atributos cujo AttrSpec tem 'sparse' verdadeiro e um valor padrão usam
+colunas esparsas: valores iguais ao padrão não são guardados (a leitura
+recai no padrão do AttrSpec, como para elementos sem valor) e, enquanto
+poucos elementos têm valor, os valores ficam em um dicionário identificador
+-> valor em vez do vetor tipado e do vetor de presença.
+
+Uma coluna pode ter ainda um índice invertido (valor -> identificadores dos
+elementos com aquele valor), criado na primeira consulta que o usa
+(AttrColumn.inverted, MultiGraph.getNodesByAttr) e mantido pelas alterações
+seguintes da coluna. Como escritas feitas diretamente nos vetores exportados
+por values() não podem ser acompanhadas, exportá-los descarta o índice, que é
+recriado na próxima consulta.
+
+Cópias de um grafo (MultiGraph.snapshot) compartilham as colunas de
+atributos (AttrStore.shareColumns) e os elementos do ElemIndex
+(ElemIndex.share): cada coluna é copiada apenas quando um dos AttrStores que
+a compartilham a altera.
+"""
+
+from array import array
+from collections.abc import MutableMapping
+
+# Código do módulo array para cada tipo de AttrSpec. Tipos ausentes são
+# guardados em listas.
+TYPECODES = {
+    'int': 'q',
+    'long': 'q',
+    'float': 'd',
+    'double': 'd',
+    'boolean': 'b'
+}
+
+# Formatos de buffer (memoryview.format) aceitos sem conversão por cada código
+# de tipo, além da verificação de tamanho do item
+_BUFFER_FORMATS = {
+    'q': 'qlL',
+    'd': 'd',
+    'b': '?b'
+}
+
+# Fração de elementos com valor a partir da qual uma coluna esparsa passa a
+# guardar os valores no vetor tipado. Abaixo dela o dicionário, com dezenas de
+# bytes por valor, ocupa menos que o vetor com 8 bytes por elemento.
+_DENSE_FRACTION = 1 / 16
+
+# Inteiros guardados sem conversão nas colunas 'q' estão em
+# [-_INT64_LIMIT, _INT64_LIMIT)
+_INT64_LIMIT = 2 ** 63
+
+def typecodeForSpec(spec):
+    """Código de tipo da coluna de um atributo com o AttrSpec fornecido, ou
+    None para colunas de objetos Python.
+    """
+    if spec is None:
+        return None
+    return TYPECODES.get(spec.type)
+
+def sparseDefaultForSpec(spec):
+    """Valor padrão não guardado pela coluna de um atributo com o AttrSpec
+    fornecido, ou None se a coluna não for esparsa.
+    """
+    if spec is None or not getattr(spec, 'sparse', False):
+        return None
+    return spec.default
+
+class ElemIndex(object):
+    """Associa cada elemento a um identificador inteiro denso.
+
+    Os identificadores são atribuídos em ordem crescente e não são
+    reaproveitados quando o elemento é removido; as posições livres
+    permanecem como buracos (chave None) em 'keys'.
+
+    Atributos:
+        - ids: Mapa do elemento ao seu identificador.
+        - keys: Lista do identificador ao elemento.
+    """
+
+    __slots__ = ('ids', 'keys')
+
+    def __init__(self):
+        self.ids = {}
+        self.keys = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, key):
+        return key in self.ids
+
+    def capacity(self):
+        """Tamanho dos vetores indexados pelos identificadores."""
+        return len(self.keys)
+
+    def add(self, key):
+        """Identificador do elemento, criado se ainda não existir."""
+        i = self.ids.get(key)
+        if i is None:
+            i = len(self.keys)
+            self.ids[key] = i
+            self.keys.append(key)
+        return i
+
+    def remove(self, key):
+        """Remove o elemento e retorna seu identificador (None se não
+        existir).
+        """
+        i = self.ids.pop(key, None)
+        if i is not None:
+            self.keys[i] = None
+        return i
+
+    def items(self):
+        return self.ids.items()
+
+    def share(self, other):
+        """Passa a usar o dicionário e a lista de elementos de 'other', sem
+        cópia. Antes de alterar qualquer um dos dois índices deve-se chamar
+        unshare.
+        """
+        self.ids = other.ids
+        self.keys = other.keys
+
+    def unshare(self):
+        """Copia o dicionário e a lista de elementos, deixando de
+        compartilhá-los.
+        """
+        self.ids = dict(self.ids)
+        self.keys = list(self.keys)
+
+class AttrColumn(object):
+    """Valores de um atributo indexados pelo identificador do elemento.
+
+    Atributos:
+        - typecode: Código de tipo do vetor de valores ou None para uma
+              lista de objetos Python.
+        - sparseDefault: Valor padrão não guardado por uma coluna esparsa,
+              ou None para colunas normais.
+    """
+
+    __slots__ = ('typecode', '_values', '_present', '_size', '_inverted',
+            'sparseDefault')
+
+    def __init__(self, typecode=None, size=0, sparseDefault=None):
+        self.typecode = typecode
+        # Índice invertido valor -> conjunto de identificadores (inverted)
+        self._inverted = None
+        self.sparseDefault = sparseDefault
+        # Colunas esparsas começam com os valores em um dicionário; neste
+        # caso não há vetor de presença (_present é None) e o tamanho da
+        # coluna fica em _size
+        self._size = size
+        if sparseDefault is None:
+            self._values = self._newValues(typecode, size)
+            self._present = bytearray(size)
+        else:
+            self._values = {}
+            self._present = None
+
+    @staticmethod
+    def _newValues(typecode, size):
+        if typecode is None:
+            return [None] * size
+        return array(typecode, bytes(size * array(typecode).itemsize))
+
+    def __len__(self):
+        if self._present is None:
+            return self._size
+        return len(self._present)
+
+    def copy(self):
+        """Cópia da coluna, sem o índice invertido."""
+        column = AttrColumn(self.typecode)
+        column.sparseDefault = self.sparseDefault
+        column._size = self._size
+        if self._present is None:
+            column._values = dict(self._values)
+            column._present = None
+        else:
+            column._values = self._values[:]
+            column._present = bytearray(self._present)
+        return column
+
+    def grow(self, size):
+        """Aumenta a coluna para 'size' posições, sem valor."""
+        extra = size - len(self)
+        if extra <= 0:
+            return
+        if self._present is None:
+            self._size = size
+            return
+        try:
+            self._values.extend(self._newValues(self.typecode, extra))
+        except BufferError:
+            # Há visões exportadas do vetor (values()); elas continuam
+            # válidas sobre o vetor antigo
+            self._values = self._values + self._newValues(self.typecode,
+                    extra)
+        try:
+            self._present.extend(bytes(extra))
+        except BufferError:
+            self._present = self._present + bytes(extra)
+
+    def has(self, i):
+        if self._present is None:
+            return i in self._values
+        return i < len(self._present) and self._present[i]
+
+    def get(self, i, dflt=None):
+        if self._present is None:
+            return self._values.get(i, dflt)
+        if i < len(self._present) and self._present[i]:
+            if self.typecode == 'b':
+                return bool(self._values[i])
+            return self._values[i]
+        return dflt
+
+    def _store(self, values, i, value):
+        if self.typecode == 'b' and value.__class__ is not bool:
+            raise TypeError('Valor não booleano')
+        values[i] = value
+
+    def set(self, i, value):
+        if i >= len(self):
+            self.grow(max(i + 1, 2 * len(self)))
+        if self.sparseDefault is not None and value == self.sparseDefault:
+            self.discard(i)
+            return
+        if self._inverted is not None:
+            self._unindex(i)
+        if self._present is None:
+            self._setInDict(i, value)
+        else:
+            try:
+                if self.typecode == 'b' and value.__class__ is not bool:
+                    raise TypeError('Valor não booleano')
+                self._values[i] = value
+            except (TypeError, OverflowError):
+                self.retype(None)
+                self._values[i] = value
+            self._present[i] = 1
+        if self._inverted is not None:
+            self._index(i)
+
+    def _setInDict(self, i, value):
+        try:
+            value = self._coerce(self.typecode, value)
+        except (TypeError, OverflowError):
+            self.retype(None)
+        self._values[i] = value
+        if len(self._values) > self._size * _DENSE_FRACTION:
+            self._toArray()
+
+    @staticmethod
+    def _coerce(typecode, value):
+        """Valor como seria lido do vetor tipado de código 'typecode'.
+
+        Raises:
+            - TypeError, OverflowError: Se o valor não couber no tipo.
+        """
+        if typecode is None:
+            return value
+        if typecode == 'b':
+            if value.__class__ is not bool:
+                raise TypeError('Valor não booleano')
+            return value
+        if typecode == 'd' and value.__class__ is float:
+            return value
+        if (typecode == 'q' and value.__class__ is int
+                and -_INT64_LIMIT <= value < _INT64_LIMIT):
+            return value
+        return array(typecode, (value,))[0]
+
+    def _toArray(self):
+        """Passa os valores do dicionário para o vetor tipado."""
+        values = self._newValues(self.typecode, self._size)
+        present = bytearray(self._size)
+        for i, value in self._values.items():
+            values[i] = value
+            present[i] = 1
+        self._values = values
+        self._present = present
+
+    def compact(self):
+        """Volta a guardar os valores de uma coluna esparsa em um dicionário
+        se poucos elementos tiverem valor.
+        """
+        if (self.sparseDefault is None or self._present is None
+                or self.count() > len(self._present) * _DENSE_FRACTION):
+            return
+        self._values = {i: self.get(i) for i in self.ids()}
+        self._size = len(self._present)
+        self._present = None
+
+    def setSparseDefault(self, sparseDefault):
+        """Torna a coluna esparsa, sem guardar os valores iguais a
+        'sparseDefault', ou normal se 'sparseDefault' for None.
+        """
+        self.sparseDefault = sparseDefault
+        if sparseDefault is None:
+            if self._present is None:
+                self._toArray()
+            return
+        for i in [i for i in self.ids() if self.get(i) == sparseDefault]:
+            self.discard(i)
+        self.compact()
+
+    def discard(self, i):
+        if self._present is None:
+            if i in self._values:
+                if self._inverted is not None:
+                    self._unindex(i)
+                del self._values[i]
+        elif i < len(self._present) and self._present[i]:
+            if self._inverted is not None:
+                self._unindex(i)
+            self._present[i] = 0
+            if self.typecode is None:
+                self._values[i] = None
+
+    def inverted(self):
+        """Índice invertido da coluna: dicionário de cada valor presente ao
+        conjunto dos identificadores dos elementos com este valor. É criado
+        na primeira chamada e mantido pelas alterações seguintes da coluna;
+        não deve ser alterado por quem o consulta.
+
+        Raises:
+            - TypeError: Se algum valor da coluna não for hasheável.
+        """
+        if self._inverted is None:
+            inverted = {}
+            for i in self.ids():
+                value = self.get(i)
+                ids = inverted.get(value)
+                if ids is None:
+                    inverted[value] = {i}
+                else:
+                    ids.add(i)
+            self._inverted = inverted
+        return self._inverted
+
+    def hasInverted(self):
+        return self._inverted is not None
+
+    def dropInverted(self):
+        """Descarta o índice invertido."""
+        self._inverted = None
+
+    def _index(self, i):
+        value = self.get(i)
+        try:
+            ids = self._inverted.get(value)
+        except TypeError:
+            # Valor não hasheável: a coluna deixa de ter índice
+            self._inverted = None
+            return
+        if ids is None:
+            self._inverted[value] = {i}
+        else:
+            ids.add(i)
+
+    def _unindex(self, i):
+        if self.has(i):
+            value = self.get(i)
+            ids = self._inverted.get(value)
+            if ids is None or i not in ids:
+                # Valores que não são iguais a si mesmos (NaN) não são
+                # encontrados no índice: a coluna deixa de ter índice
+                self._inverted = None
+                return
+            ids.discard(i)
+            if not ids:
+                del self._inverted[value]
+
+    def retype(self, typecode):
+        """Converte a coluna para o tipo fornecido. Se algum valor presente
+        não couber no novo tipo a coluna passa a guardar objetos Python.
+        """
+        if typecode == self.typecode:
+            return
+        if self._present is None:
+            try:
+                self._values = {i: self._coerce(typecode, value)
+                        for i, value in self._values.items()}
+                self.typecode = typecode
+            except (TypeError, OverflowError):
+                self.typecode = None
+            return
+        values = self._newValues(typecode, len(self._present))
+        oldValues = [self.get(i) for i in self.ids()]
+        try:
+            self.typecode = typecode
+            for i, value in zip(self.ids(), oldValues):
+                self._store(values, i, value)
+        except (TypeError, OverflowError):
+            values = self._newValues(None, len(self._present))
+            for i, value in zip(self.ids(), oldValues):
+                values[i] = value
+            self.typecode = None
+        self._values = values
+
+    def ids(self):
+        """Identificadores dos elementos que possuem valor, em ordem
+        crescente.
+        """
+        if self._present is None:
+            return iter(sorted(self._values))
+        return (i for i, present in enumerate(self._present) if present)
+
+    def count(self):
+        """Número de elementos que possuem valor."""
+        if self._present is None:
+            return len(self._values)
+        return len(self._present) - self._present.count(0)
+
+    def values(self):
+        """Vetor de valores indexado pelo identificador do elemento, sem
+        cópia: memoryview para colunas tipadas ou a própria lista para
+        colunas de objetos. Posições sem valor têm conteúdo indefinido.
+
+        O índice invertido, se existir, é descartado, pois não acompanha
+        escritas feitas diretamente no vetor. Colunas esparsas passam a
+        guardar os valores no vetor.
+        """
+        self._inverted = None
+        if self._present is None:
+            self._toArray()
+        if self.typecode is None:
+            return self._values
+        return memoryview(self._values)
+
+    def presence(self):
+        """memoryview de bytes, sem cópia, com 1 nas posições que possuem
+        valor. Colunas esparsas passam a guardar os valores no vetor.
+        """
+        if self._present is None:
+            self._toArray()
+        return memoryview(self._present)
+
+    def setValues(self, values, present=None):
+        """Substitui todos os valores da coluna.
+
+        Args:
+            - values: Sequência de valores indexada pelo identificador do
+                  elemento.
+            - [present]: Sequência com um valor verdadeiro para as posições
+                  que possuem valor. Se None todas as posições de 'values'
+                  passam a ter valor.
+        """
+        size = len(values)
+        if present is None:
+            present = bytearray(b'\x01') * size
+        else:
+            present = bytearray(1 if p else 0 for p in present)
+            if len(present) != size:
+                raise ValueError('Vetores de valores e de presença com '
+                        'tamanhos diferentes')
+
+        try:
+            if self.typecode is None:
+                newValues = list(values)
+            else:
+                newValues = self._typedValues(values, present)
+        except (TypeError, OverflowError):
+            self.typecode = None
+            newValues = list(values)
+
+        self._values = newValues
+        self._present = present
+        self._inverted = None
+
+        if self.sparseDefault is not None:
+            for i in [i for i in self.ids()
+                    if self.get(i) == self.sparseDefault]:
+                self.discard(i)
+            self.compact()
+
+    def setMany(self, ids, values, combine=None):
+        """Atribui values[k] ao elemento de identificador ids[k], na ordem.
+
+        Args:
+            - ids: Sequência de identificadores.
+            - values: Sequência de valores paralela a 'ids'. Valores None não
+                  são atribuídos.
+            - [combine]: Função f(valorAtual, novoValor) usada quando o
+                  elemento já possui valor. Se None prevalece o último valor.
+        """
+        self.grow(max(ids, default=-1) + 1)
+        if (combine is None and self.typecode != 'b'
+                and self._inverted is None and self.sparseDefault is None):
+            stored = self._values
+            present = self._present
+            try:
+                for i, value in zip(ids, values):
+                    if value is not None:
+                        stored[i] = value
+                        present[i] = 1
+                return
+            except (TypeError, OverflowError):
+                # Refaz pelo caminho geral, que troca o tipo da coluna
+                pass
+
+        for i, value in zip(ids, values):
+            if value is None:
+                continue
+            if combine is not None and self.has(i):
+                value = combine(self.get(i), value)
+            self.set(i, value)
+
+    def _typedValues(self, values, present):
+        newValues = array(self.typecode)
+        try:
+            buf = memoryview(values)
+        except TypeError:
+            buf = None
+        if (buf is not None and buf.ndim == 1
+                and buf.itemsize == newValues.itemsize
+                and buf.format[-1] in _BUFFER_FORMATS[self.typecode]):
+            # Vetores numpy ou array do mesmo tipo: cópia dos bytes
+            newValues.frombytes(buf.tobytes())
+            return newValues
+
+        if self.typecode == 'b' and not all(isinstance(v, bool)
+                for v, p in zip(values, present) if p):
+            raise TypeError('Valor não booleano')
+        newValues.extend(values)
+        return newValues
+
+    def presentValues(self):
+        """Valores dos elementos que possuem valor."""
+        return (self.get(i) for i in self.ids())
+
+class AttrColumnView(MutableMapping):
+    """Visão da AttrColumn de um atributo de um AttrStore como um dicionário
+    elemento -> valor.
+    """
+
+    __slots__ = ('_store', '_attr')
+
+    def __init__(self, store, attr):
+        self._store = store
+        self._attr = attr
+
+    @property
+    def column(self):
+        return self._store._columns[self._attr]
+
+    def __getitem__(self, key):
+        i = self._store.index.ids.get(key)
+        column = self.column
+        if i is None or not column.has(i):
+            raise KeyError(key)
+        return column.get(i)
+
+    def get(self, key, default=None):
+        i = self._store.index.ids.get(key)
+        if i is None:
+            return default
+        return self.column.get(i, default)
+
+    def __contains__(self, key):
+        i = self._store.index.ids.get(key)
+        return i is not None and self.column.has(i)
+
+    def __setitem__(self, key, value):
+        i = self._store.index.ids.get(key)
+        if i is None:
+            raise KeyError(key)
+        self._store.ownColumn(self._attr).set(i, value)
+
+    def __delitem__(self, key):
+        i = self._store.index.ids.get(key)
+        if i is None or not self.column.has(i):
+            raise KeyError(key)
+        self._store.ownColumn(self._attr).discard(i)
+
+    # Colunas de um AttrStore que compartilha o ElemIndex de outro (como a
+    # camada de atributos de graphView.SubgraphView) não são limpas quando
+    # o dono do índice remove um elemento: a posição dele fica com chave
+    # None e é ignorada
+
+    def __iter__(self):
+        keys = self._store.index.keys
+        for i in self.column.ids():
+            key = keys[i]
+            if key is not None:
+                yield key
+
+    def __len__(self):
+        index = self._store.index
+        if len(index) == index.capacity():
+            return self.column.count()
+        keys = index.keys
+        return sum(1 for i in self.column.ids() if keys[i] is not None)
+
+class AttrStore(MutableMapping):
+    """Atributos de um escopo de elementos: dicionário do nome do atributo à
+    AttrColumnView de seus valores.
+    """
+
+    def __init__(self, index, specs):
+        """
+        Args:
+            - index: ElemIndex dos elementos do escopo.
+            - specs: Dicionário de AttrSpecs do escopo, consultado para
+                  definir o tipo das colunas criadas.
+        """
+        self.index = index
+        self._specs = specs
+        self._columns = {}
+        # Atributos cujas colunas são compartilhadas com outro AttrStore
+        # (shareColumns) e devem ser copiadas antes de alteradas
+        self._shared = set()
+
+    def column(self, attr, create=False):
+        """AttrColumn do atributo. Se não existir, é criada se 'create' for
+        verdadeiro ou retorna-se None caso contrário.
+        """
+        column = self._columns.get(attr)
+        if column is None and create:
+            column = self.newColumn(attr)
+        return column
+
+    def ownColumn(self, attr, create=False):
+        """AttrColumn do atributo para alteração: como column, mas uma
+        coluna compartilhada com outro AttrStore é antes copiada.
+        """
+        if attr in self._shared:
+            self._shared.discard(attr)
+            self._columns[attr] = self._columns[attr].copy()
+        return self.column(attr, create)
+
+    def shareColumns(self, other):
+        """Passa a ter as colunas de 'other', sem cópia. Cada coluna é
+        copiada depois por quem a alterar primeiro (ownColumn).
+        """
+        self._columns = dict(other._columns)
+        self._shared = set(self._columns)
+        other._shared.update(self._columns)
+
+    def newColumn(self, attr):
+        """Cria para o atributo uma coluna vazia, com o tipo de seu AttrSpec,
+        substituindo a existente.
+        """
+        spec = self._specs.get(attr)
+        column = AttrColumn(typecodeForSpec(spec), self.index.capacity(),
+                sparseDefaultForSpec(spec))
+        self._columns[attr] = column
+        self._shared.discard(attr)
+        return column
+
+    # getValue e setValue repetem AttrColumn.get e AttrColumn.set para
+    # evitar uma chamada de método por acesso a atributo
+
+    def getValue(self, attr, key, dflt=None):
+        column = self._columns.get(attr)
+        i = self.index.ids.get(key)
+        if column is None or i is None:
+            return dflt
+        present = column._present
+        if present is None:
+            return column._values.get(i, dflt)
+        try:
+            if present[i]:
+                if column.typecode == 'b':
+                    return bool(column._values[i])
+                return column._values[i]
+        except IndexError:
+            pass
+        return dflt
+
+    def setValue(self, attr, key, value):
+        i = self.index.ids.get(key)
+        if i is None:
+            raise KeyError(key)
+        self.setValueById(attr, i, value)
+
+    def getValueById(self, attr, i, dflt=None):
+        column = self._columns.get(attr)
+        if column is None:
+            return dflt
+        present = column._present
+        if present is None:
+            return column._values.get(i, dflt)
+        try:
+            if present[i]:
+                if column.typecode == 'b':
+                    return bool(column._values[i])
+                return column._values[i]
+        except IndexError:
+            pass
+        return dflt
+
+    def setValueById(self, attr, i, value):
+        column = self._columns.get(attr)
+        if column is None:
+            column = self.newColumn(attr)
+        elif self._shared and attr in self._shared:
+            column = self.ownColumn(attr)
+        if (column.typecode != 'b' and column._inverted is None
+                and column.sparseDefault is None):
+            try:
+                column._values[i] = value
+                column._present[i] = 1
+                return
+            except (IndexError, TypeError, OverflowError):
+                pass
+        column.set(i, value)
+
+    def setColumn(self, attr, values, present=None):
+        """Substitui os valores do atributo pelos vetores fornecidos,
+        indexados pelo identificador dos elementos. Posições sem elemento
+        são ignoradas.
+        """
+        column = self.ownColumn(attr, create=True)
+        column.setValues(values, present)
+        keys = self.index.keys
+        if len(keys) > len(self.index):
+            for i in range(min(len(column), len(keys))):
+                if keys[i] is None:
+                    column.discard(i)
+        for i in range(len(keys), len(column)):
+            column.discard(i)
+
+    def retype(self, attr):
+        """Ajusta o tipo e o modo esparso da coluna do atributo ao seu
+        AttrSpec atual.
+        """
+        column = self.ownColumn(attr)
+        if column is not None:
+            spec = self._specs.get(attr)
+            column.retype(typecodeForSpec(spec))
+            column.setSparseDefault(sparseDefaultForSpec(spec))
+
+    def discardElem(self, i):
+        """Remove de todas as colunas o valor do elemento de identificador
+        'i'.
+        """
+        for attr, column in self._columns.items():
+            if column.has(i):
+                if attr in self._shared:
+                    self._shared.discard(attr)
+                    column = self._columns[attr] = column.copy()
+                column.discard(i)
+
+    def __getitem__(self, attr):
+        if attr not in self._columns:
+            raise KeyError(attr)
+        return AttrColumnView(self, attr)
+
+    def __setitem__(self, attr, values):
+        column = self.newColumn(attr)
+        ids = self.index.ids
+        for key, value in values.items():
+            i = ids.get(key)
+            if i is None:
+                raise KeyError(key)
+            column.set(i, value)
+
+    def __delitem__(self, attr):
+        del self._columns[attr]
+        self._shared.discard(attr)
+
+    def __contains__(self, attr):
+        return attr in self._columns
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
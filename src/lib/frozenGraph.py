@@ -0,0 +1,392 @@
+# coding: utf-8
+"""Representação imutável e compacta de um graph.MultiGraph.
+
+MultiGraph guarda a adjacência em dicionários de conjuntos de tuplas
+(vizinho, relação), o que custa centenas de bytes por aresta e obriga os
+algoritmos a calcular o hash de nodos arbitrários. FrozenMultiGraph troca os
+nodos e as relações por inteiros densos e guarda as adjacências de saída e de
+entrada no formato CSR (compressed sparse row): para cada direção, um vetor de
+deslocamentos por nodo e vetores com o vizinho e a relação de cada aresta.
+
+A API de leitura de MultiGraph (nodes, edges, outNeighboors, inNeighboors,
+neighboors, hasEdge, atributos) continua funcionando, e os algoritmos que
+usam graph.CompiledAdjacency (regularEquivalence, coarsestRegularPartition,
+spawnFromClassAttributes, RegIdxTracker, classificação semi regular) a
+constroem diretamente dos vetores.
+
+Exemplo::
+
+    frozen = g.freeze()
+    classes = gr.regularEquivalence(frozen)
+    g2 = frozen.thaw()
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain
+
+import graph as gr
+from attrStore import AttrStore, ElemIndex
+
+# Tipo dos vetores de inteiros
+_TYPECODE = 'l'
+
+class FrozenMultiGraph(object):
+    """Grafo imutável com adjacência em vetores CSR.
+
+    Os nodos são identificados internamente pela sua posição em 'nodeList'
+    (na ordem de MultiGraph.nodes()) e as relações pela sua posição em
+    'relationList' (na ordem em que aparecem nas arestas).
+
+    Atributos:
+        - nodeList, relationList: Nodos e relações originais.
+        - nodeIdx, relationIdx: Mapas de nodo e de relação ao seu índice.
+        - outOffsets, outNbr, outRel: Adjacência de saída em CSR. As arestas
+              de saída do nodo i ocupam as posições outOffsets[i] até
+              outOffsets[i+1] - 1 de outNbr (índice do destino) e outRel
+              (índice da relação), ordenadas por (destino, relação).
+        - inOffsets, inNbr, inRel: Mesmo que os anteriores para as arestas de
+              entrada.
+        - nodeAttrs, edgeAttrs: attrStore.AttrStore com colunas tipadas
+              indexadas pela posição do nodo em 'nodeList' e pela posição da
+              aresta na adjacência de saída (getEdgeId).
+    """
+
+    def __init__(self, graph):
+        """
+        Args:
+            - graph: MultiGraph a ser congelado. Os atributos são copiados, de
+                  forma que alterações posteriores em 'graph' não afetam o
+                  grafo congelado.
+        """
+        self.nodeList = list(graph.nodes())
+        self.nodeIdx = {node: i for i, node in enumerate(self.nodeList)}
+        self.relationList = []
+        self.relationIdx = {}
+
+        numNodes = len(self.nodeList)
+        nodeIdx = self.nodeIdx
+        relationIdx = self.relationIdx
+
+        outLists = [[] for _ in range(numNodes)]
+        inLists = [[] for _ in range(numNodes)]
+        for edge in graph.edges():
+            src, tgt, rel = edge
+            r = relationIdx.get(rel)
+            if r is None:
+                r = len(self.relationList)
+                relationIdx[rel] = r
+                self.relationList.append(rel)
+            u = nodeIdx[src]
+            v = nodeIdx[tgt]
+            outLists[u].append((v, r, graph.getEdgeId(edge)))
+            inLists[v].append((u, r))
+
+        self.outOffsets, self.outNbr, self.outRel = self._toCSR(outLists)
+        self.inOffsets, self.inNbr, self.inRel = self._toCSR(inLists)
+
+        self.graphAttrs = dict(graph.graphAttrs)
+        self.nodeAttrSpecs = dict(graph.nodeAttrSpecs)
+        self.edgeAttrSpecs = dict(graph.edgeAttrSpecs)
+        self.graphAttrSpecs = dict(graph.graphAttrSpecs)
+        self.relations = set(self.relationList)
+
+        # Os nodos já têm índices densos em nodeIdx e as arestas são
+        # identificadas pela posição na adjacência de saída, sem dicionário
+        # de tuplas (src, tgt, rel)
+        nodeIndex = ElemIndex()
+        nodeIndex.ids = self.nodeIdx
+        nodeIndex.keys = self.nodeList
+        self.nodeAttrs = AttrStore(nodeIndex, self.nodeAttrSpecs)
+        self.edgeAttrs = AttrStore(_EdgePositionIndex(self),
+                self.edgeAttrSpecs)
+        _copyColumns(graph.nodeAttrs, self.nodeAttrs,
+                [graph.getElemId(gr.MultiGraph.SCOPE_NODE, node)
+                    for node in self.nodeList])
+        _copyColumns(graph.edgeAttrs, self.edgeAttrs,
+                [item[2] for adj in outLists for item in adj])
+
+        self.attrs = {
+            gr.MultiGraph.SCOPE_NODE: self.nodeAttrs,
+            gr.MultiGraph.SCOPE_EDGE: self.edgeAttrs
+        }
+        self.attrSpecs = {
+            gr.MultiGraph.SCOPE_NODE: self.nodeAttrSpecs,
+            gr.MultiGraph.SCOPE_EDGE: self.edgeAttrSpecs
+        }
+
+    @staticmethod
+    def _toCSR(adjLists):
+        offsets = array(_TYPECODE, [0])
+        nbr = array(_TYPECODE)
+        rel = array(_TYPECODE)
+        for adj in adjLists:
+            adj.sort()
+            for item in adj:
+                nbr.append(item[0])
+                rel.append(item[1])
+            offsets.append(len(nbr))
+        return offsets, nbr, rel
+
+    def edgeArrays(self):
+        """Vetores (src, tgt, rel) com os índices de origem, destino e relação
+        de cada aresta, na ordem de edges().
+        """
+        src = array(_TYPECODE)
+        for u in range(len(self.nodeList)):
+            src.extend([u] * (self.outOffsets[u + 1] - self.outOffsets[u]))
+        return src, self.outNbr, self.outRel
+
+    def thaw(self):
+        """Cria um MultiGraph mutável com o mesmo conteúdo.
+
+        Os nodos e as arestas são acrescentados na ordem de nodeList e de
+        edges(), de forma que seus identificadores no grafo criado são as
+        posições usadas aqui e as colunas de atributos são compartilhadas
+        sem cópia (AttrStore.shareColumns) até a primeira alteração.
+        """
+        g = gr.MultiGraph()
+        for spec in self.nodeAttrSpecs.values():
+            g.addNodeAttrSpec(spec)
+        for spec in self.edgeAttrSpecs.values():
+            g.addEdgeAttrSpec(spec)
+        for spec in self.graphAttrSpecs.values():
+            g.addGraphAttrSpec(spec)
+        g.graphAttrs.update(self.graphAttrs)
+
+        g.addNodesFrom(self.nodeList)
+        g.addEdgesFrom(self.edges())
+        g.nodeAttrs.shareColumns(self.nodeAttrs)
+        g.edgeAttrs.shareColumns(self.edgeAttrs)
+        return g
+
+    def nodes(self):
+        return self.nodeList
+
+    def getNumNodes(self):
+        return len(self.nodeList)
+
+    def edges(self, rel=None):
+        nodes = self.nodeList
+        rels = self.relationList
+        outNbr = self.outNbr
+        outRel = self.outRel
+        offsets = self.outOffsets
+        if rel is None:
+            for u, src in enumerate(nodes):
+                for k in range(offsets[u], offsets[u + 1]):
+                    yield (src, nodes[outNbr[k]], rels[outRel[k]])
+        else:
+            r = self.relationIdx.get(rel)
+            for u, src in enumerate(nodes):
+                for k in range(offsets[u], offsets[u + 1]):
+                    if outRel[k] == r:
+                        yield (src, nodes[outNbr[k]], rel)
+
+    def getNumEdges(self, rel=None):
+        if rel is None:
+            return len(self.outNbr)
+        return self.outRel.count(self.relationIdx.get(rel, -1))
+
+    def edgeIds(self):
+        """Identificadores das arestas: sua posição na adjacência de saída,
+        na ordem de edges().
+        """
+        return iter(range(len(self.outNbr)))
+
+    def getEdgeId(self, edge):
+        src, tgt, rel = edge
+        u = self.nodeIdx.get(src)
+        v = self.nodeIdx.get(tgt)
+        r = self.relationIdx.get(rel)
+        if u is None or v is None or r is None:
+            return None
+
+        # As arestas de cada nodo estão ordenadas por (destino, relação)
+        end = self.outOffsets[u + 1]
+        k = bisect_left(self.outNbr, v, self.outOffsets[u], end)
+        while k < end and self.outNbr[k] == v:
+            if self.outRel[k] == r:
+                return k
+            k += 1
+        return None
+
+    def getEdgeById(self, edgeId):
+        u = bisect_right(self.outOffsets, edgeId) - 1
+        return (self.nodeList[u], self.nodeList[self.outNbr[edgeId]],
+                self.relationList[self.outRel[edgeId]])
+
+    def _neighboors(self, node, offsets, nbr, rel, onlyRel):
+        u = self.nodeIdx[node]
+        nodes = self.nodeList
+        rels = self.relationList
+        if onlyRel is None:
+            for k in range(offsets[u], offsets[u + 1]):
+                yield (nodes[nbr[k]], rels[rel[k]])
+        else:
+            r = self.relationIdx.get(onlyRel)
+            for k in range(offsets[u], offsets[u + 1]):
+                if rel[k] == r:
+                    yield (nodes[nbr[k]], onlyRel)
+
+    def outNeighboors(self, node, rel=None):
+        """outNeighboors(node) -> (tgt1, rel), (tgt2, rel), ...
+
+        Com 'rel' apenas os vizinhos por arestas desta relação.
+        """
+        return self._neighboors(node, self.outOffsets, self.outNbr,
+                self.outRel, rel)
+
+    def inNeighboors(self, node, rel=None):
+        """inNeighboors(node) -> (src1, rel), (src2, rel), ...
+        """
+        return self._neighboors(node, self.inOffsets, self.inNbr, self.inRel,
+                rel)
+
+    def neighboors(self, node, rel=None):
+        """Vizinhos de entrada e de saída do nodo, como em
+        MultiGraph.neighboors.
+        """
+        return chain(self.outNeighboors(node, rel),
+                self.inNeighboors(node, rel))
+
+    def outDegree(self, node, rel=None):
+        u = self.nodeIdx[node]
+        if rel is None:
+            return self.outOffsets[u + 1] - self.outOffsets[u]
+        return sum(1 for _ in self.outNeighboors(node, rel))
+
+    def inDegree(self, node, rel=None):
+        u = self.nodeIdx[node]
+        if rel is None:
+            return self.inOffsets[u + 1] - self.inOffsets[u]
+        return sum(1 for _ in self.inNeighboors(node, rel))
+
+    def hasNode(self, node):
+        return node in self.nodeIdx
+
+    def hasRelationIndex(self):
+        return False
+
+    def hasEdge(self, src, tgt, rel):
+        return self.getEdgeId((src, tgt, rel)) is not None
+
+    def getGraphAttrSpec(self, attrName):
+        return self.graphAttrSpecs.get(attrName)
+
+    def getNodeAttrSpec(self, attrName):
+        return self.nodeAttrSpecs.get(attrName)
+
+    def getEdgeAttrSpec(self, attrName):
+        return self.edgeAttrSpecs.get(attrName)
+
+    def getAttrSpec(self, scope, attrName):
+        return self.attrSpecs[scope].get(attrName)
+
+    def getNodeAttrNames(self):
+        return set(self.nodeAttrs.keys())
+
+    def getEdgeAttrNames(self):
+        return set(self.edgeAttrs.keys())
+
+    def getGraphAttrNames(self):
+        return set(self.graphAttrs.keys())
+
+    def getNodeAttrValueSet(self, attrName, default=None):
+        return gr.MultiGraph._attrValueSet(self.nodeAttrs.column(attrName),
+                self.nodeAttrSpecs.get(attrName), self.getNumNodes(), default)
+
+    def getEdgeAttrValueSet(self, attrName, default=None):
+        return gr.MultiGraph._attrValueSet(self.edgeAttrs.column(attrName),
+                self.edgeAttrSpecs.get(attrName), self.getNumEdges(), default)
+
+    def getNodesByAttr(self, attrName, attrValue):
+        return self.getElemsByAttr(gr.MultiGraph.SCOPE_NODE, attrName,
+                attrValue)
+
+    def getEdgesByAttr(self, attrName, attrValue):
+        return self.getElemsByAttr(gr.MultiGraph.SCOPE_EDGE, attrName,
+                attrValue)
+
+    def getElemsByAttr(self, scope, attrName, attrValue):
+        return [elem for elem in self.elements(scope)
+                if self.getElemAttr(scope, elem, attrName) == attrValue]
+
+    def getGraphAttr(self, attr, dflt=None):
+        return gr.MultiGraph.getGraphAttr(self, attr, dflt)
+
+    def getNodeAttr(self, node, attr, dflt=None):
+        return self.getElemAttr(gr.MultiGraph.SCOPE_NODE, node, attr, dflt)
+
+    def getEdgeAttr(self, edge, attr, dflt=None):
+        return self.getElemAttr(gr.MultiGraph.SCOPE_EDGE, edge, attr, dflt)
+
+    def getEdgeAttrById(self, edgeId, attr, dflt=None):
+        if dflt is None:
+            spec = self.edgeAttrSpecs.get(attr)
+            if spec is not None:
+                dflt = spec.default
+        return self.edgeAttrs.getValueById(attr, edgeId, dflt)
+
+    def getElemAttr(self, scope, elem, attr, dflt=None):
+        if dflt is None:
+            spec = self.attrSpecs[scope].get(attr)
+            if spec is not None:
+                dflt = spec.default
+        return self.attrs[scope].getValue(attr, elem, dflt)
+
+    def elements(self, scope):
+        return gr.MultiGraph.elements(self, scope)
+
+    def writeGraphml(self, filePath):
+        gr.writeGraphml(self, filePath)
+
+class _EdgePositionIndex(object):
+    """Índice das arestas de um FrozenMultiGraph com a interface de
+    attrStore.ElemIndex usada por AttrStore ('ids.get', 'keys[i]', len e
+    capacity): o identificador de cada aresta é a sua posição na adjacência
+    de saída, encontrado por busca binária em getEdgeId.
+    """
+
+    __slots__ = ('_graph',)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    @property
+    def ids(self):
+        return self
+
+    @property
+    def keys(self):
+        return self
+
+    def get(self, edge, dflt=None):
+        edgeId = self._graph.getEdgeId(edge)
+        return dflt if edgeId is None else edgeId
+
+    def __contains__(self, edge):
+        return self._graph.getEdgeId(edge) is not None
+
+    def __getitem__(self, edgeId):
+        return self._graph.getEdgeById(edgeId)
+
+    def __len__(self):
+        return len(self._graph.outNbr)
+
+    def capacity(self):
+        return len(self._graph.outNbr)
+
+def _copyColumns(source, target, sourceIds):
+    """Copia as colunas do AttrStore 'source' para 'target', que as cria
+    com o tipo de seus AttrSpecs: a posição k de cada coluna de 'target'
+    recebe o valor do elemento de identificador sourceIds[k] de 'source'.
+    """
+    for attr in source:
+        column = source.column(attr)
+        newColumn = target.newColumn(attr)
+        # Posições sem valor precisam de um valor aceito pelo vetor tipado
+        dflt = None if newColumn.typecode is None else 0
+        get = column.get
+        newColumn.setValues([get(i, dflt) for i in sourceIds],
+                [column.has(i) for i in sourceIds])
@@ -1,14 +1,22 @@
 # coding: utf-8
 
 import os.path
+import copy
 import math
+import time
+import heapq
+import concurrent.futures
 import xml.etree.ElementTree as ET
 from collections import Counter, defaultdict, namedtuple
 from itertools import chain
-from aggregate import NumericAggregator
+from aggregate import NumericAggregator, AggregatorColumn, AggregatorView
+from attrStore import AttrStore, ElemIndex
 
 EDGE_RELATION_ATTR='_relation'
 
+# Valor padrão que indica atributo ausente
+_MISSING = object()
+
 # Tipos de equivalencia regular
 REGULAR_TOTAL='total'
 REGULAR_SOURCE='source'
@@ -19,11 +27,106 @@ def _trueFunc(*argv, **argd):
     """Função que só retorna True"""
     return True
 
+class CompiledAdjacency(object):
+    """Adjacência de um grafo codificada em inteiros.
+
+    Os nodos são trocados por seus índices na ordem de graph.nodes() e as
+    classes das arestas por códigos inteiros, atribuídos na ordem em que
+    aparecem. A classe de cada aresta é obtida uma única vez, evitando o custo
+    de getEdgeAttr nos laços internos dos algoritmos.
+
+    Atributos:
+        - nodes: Lista de nodos. O índice de um nodo é sua posição na lista.
+        - nodeIdx: Mapa de nodo a seu índice.
+        - edgeClasses: Lista de classes de aresta. O código de uma classe é
+              sua posição na lista.
+        - edges: Lista de tuplas (origem, destino, código), uma por aresta,
+              na ordem de graph.edges().
+        - outAdj, inAdj: Listas indexadas pelos índices dos nodos contendo as
+              listas de tuplas (vizinho, código) das arestas de saída e de
+              entrada de cada nodo.
+    """
+
+    def __init__(self, graph, edgeClassAttr=None, edgeClassDflt=None):
+        """
+        Args:
+            - graph: Grafo a ser compilado
+            - [edgeClassAttr]: Atributo de aresta que indica a classe da
+                  aresta. Se 'None', a relação da aresta será utilizada.
+            - [edgeClassDflt]: Classe das arestas que não possuem o atributo
+                  'edgeClassAttr'.
+        """
+        if edgeClassAttr is None and hasattr(graph, 'edgeArrays'):
+            # frozenGraph.FrozenMultiGraph: nodos e relações já são índices
+            self._initFromFrozen(graph)
+            return
+
+        self.nodes = list(graph.nodes())
+        self.nodeIdx = {node:i for i, node in enumerate(self.nodes)}
+        self.edgeClasses = []
+        self.edges = []
+        self.outAdj = [[] for _ in self.nodes]
+        self.inAdj = [[] for _ in self.nodes]
+
+        codes = {}
+        nodeIdx = self.nodeIdx
+        for edge in graph.edges():
+            src, tgt, rel = edge
+            if edgeClassAttr is None:
+                edgeClass = rel
+            else:
+                edgeClass = graph.getEdgeAttr(edge, edgeClassAttr,
+                        edgeClassDflt)
+            code = codes.get(edgeClass)
+            if code is None:
+                code = len(self.edgeClasses)
+                codes[edgeClass] = code
+                self.edgeClasses.append(edgeClass)
+
+            u = nodeIdx[src]
+            v = nodeIdx[tgt]
+            self.edges.append((u, v, code))
+            self.outAdj[u].append((v, code))
+            self.inAdj[v].append((u, code))
+
+    def _initFromFrozen(self, frozen):
+        self.nodes = list(frozen.nodeList)
+        self.nodeIdx = frozen.nodeIdx
+        self.edgeClasses = list(frozen.relationList)
+
+        src, tgt, rel = frozen.edgeArrays()
+        self.edges = list(zip(src, tgt, rel))
+
+        def adjLists(offsets, nbr, rel):
+            return [list(zip(nbr[offsets[i]:offsets[i+1]],
+                rel[offsets[i]:offsets[i+1]])) for i in range(len(self.nodes))]
+
+        self.outAdj = adjLists(frozen.outOffsets, frozen.outNbr, frozen.outRel)
+        self.inAdj = adjLists(frozen.inOffsets, frozen.inNbr, frozen.inRel)
+
+    def getNumNodes(self):
+        return len(self.nodes)
+
+    def getNumEdges(self):
+        return len(self.edges)
+
 def regularEquivalence(graph, preClassAttr=None, edgeClassAttr=None,
-    regularType=REGULAR_TOTAL, ctrlFunc=_trueFunc):
+    regularType=REGULAR_TOTAL, ctrlFunc=_trueFunc, worklist=False):
     """Cria um mapeamento dos nodos do grafo a uma classe de equivalência
     regular.
 
+    A cada iteração calcula-se para cada nodo uma assinatura canônica formada
+    pelos conjuntos de pares (classe anterior do vizinho, relação) de suas
+    arestas de entrada e de saída. As classes são então divididas agrupando os
+    nodos pelo par (classe anterior, assinatura), o que custa O(V + E) por
+    iteração.
+
+    No modo 'worklist' apenas os nodos vizinhos a nodos que mudaram de classe
+    na iteração anterior têm suas assinaturas recalculadas e as classes que
+    não possuem nenhum destes nodos são mantidas sem processamento. As
+    iterações finais, que costumam dividir poucas classes, passam a custar
+    tempo proporcional à fronteira de mudanças e não ao grafo inteiro.
+
     Args:
         - graph: Grafo a ser processado
         - [preClassAttr]: Atributo de nodo que indica uma pré classificação dos
@@ -51,20 +154,16 @@ def regularEquivalence(graph, preClassAttr=None, edgeClassAttr=None,
                 Return:
                     True: para que o algoritmo continue com a próxima iteração
                     False: para interromper o algoritmo
+        - [worklist]: Se True, utiliza o modo 'worklist'. Neste modo o
+              dicionário 'classesNow' fornecido a ctrlFunc é sempre o mesmo
+              objeto, atualizado a cada iteração. Quem precisar guardar a
+              classificação de uma iteração deve copiá-lo.
 
     Return:
         mapa de nodos a um inteiro que representa a classe de equivalência a que
         pertence.
     """
 
-    # Determinando como obter a relação da aresta
-    if edgeClassAttr is None:
-        def edgeRel(src,tgt,rel):
-            return rel
-    else:
-        def edgeRel(src,tgt,rel):
-            return graph.getEdgeAttr((src, tgt, rel), edgeClassAttr)
-
     # Determinando se vai levar em conta arestas de saída e de entrada
     ignoreIn = False
     ignoreOut = False
@@ -73,32 +172,56 @@ def regularEquivalence(graph, preClassAttr=None, edgeClassAttr=None,
     elif regularType == REGULAR_TARGET:
         ignoreOut = True
 
-    # Lista de tuplas (n, node) onde n é um numero único associado ao nodo.
-    # Iremos processar os nodos em sequência numérica e atribuiremos as
-    # clases de tal forma que o número de uma classe seja igual ao número do
-    # nodo de menor número pertencente àquela classe.
-    nodes = [(n+1, node) for n, node in enumerate(graph.nodes())]
+    # Os nodos são processados pelos seus índices na adjacência compilada.
+    # Atribuiremos as clases de tal forma que o número de uma classe seja
+    # igual ao número (índice + 1) do nodo de menor número pertencente àquela
+    # classe.
+    adj = CompiledAdjacency(graph, edgeClassAttr)
+    nodes = adj.nodes
+    numNodes = len(nodes)
+
+    if numNodes == 0:
+        return {}
 
     if preClassAttr is None:
         # Todos os nodos começam na classe de equivalência do primeiro nodo.
-        classesAnt = {node:nodes[0][0] for _, node in nodes}
+        classesAnt = [1] * numNodes
     else:
         # Dicionário que mapeia o valor do atributo de pre classificação para o
         # número do primeiro nodo que possui este valor de atributo. Isto é
         # feito pois o algoritmo utiliza os números dos nodos como
         # identificadores das classes geradas.
         attrClassNum = {}
-        classesAnt = {}
-        for num, node in nodes:
+        classesAnt = []
+        for i, node in enumerate(nodes):
             attr = graph.getNodeAttr(node, preClassAttr)
-            nodeClass = attrClassNum.setdefault(attr, num)
-            classesAnt[node] = nodeClass
+            classesAnt.append(attrClassNum.setdefault(attr, i + 1))
 
         # o mapeamento de atributos em classes não é mais necessário
         del attrClassNum
 
-    classesNow = {node:None for _, node in nodes}
-    changed = True
+    inAdj = adj.inAdj
+    outAdj = adj.outAdj
+
+    def signature(i):
+        """Assinatura canônica (hashable) das classes vizinhas de um nodo na
+        classificação anterior. Dois nodos de uma mesma classe anterior
+        continuam juntos se e somente se possuírem a mesma assinatura.
+        """
+        if ignoreIn:
+            classesIn = None
+        else:
+            classesIn = frozenset((classesAnt[j], c) for j, c in inAdj[i])
+        if ignoreOut:
+            classesOut = None
+        else:
+            classesOut = frozenset((classesAnt[j], c) for j, c in outAdj[i])
+        return (classesIn, classesOut)
+
+    if worklist:
+        return _worklistRefinement(adj, classesAnt, signature,
+                ignoreIn, ignoreOut, ctrlFunc)
+
     keepGoing = True
     itCount = 1
 
@@ -107,54 +230,813 @@ def regularEquivalence(graph, preClassAttr=None, edgeClassAttr=None,
         # criada.
         newClassesParents = {}
 
-        changed = False
-        for nodeNumber, n1 in nodes:
-            if classesNow[n1] is not None:
-                continue
+        # Mapeia cada par (classe anterior, assinatura) ao número do primeiro
+        # nodo que o apresentou. Como os nodos são processados em ordem
+        # numérica, este é o número do menor nodo da nova classe.
+        newClasses = {}
+        classesVet = []
 
-            classesNow[n1] = nodeNumber
-            if classesNow[n1] != classesAnt[n1]:
+        changed = False
+        for i in range(numNodes):
+            oldClass = classesAnt[i]
+            nodeClass = newClasses.setdefault((oldClass, signature(i)), i + 1)
+            classesVet.append(nodeClass)
+            if nodeClass != oldClass:
                 changed = True
-                newClassesParents[classesNow[n1]] = classesAnt[n1]
+                newClassesParents[nodeClass] = oldClass
 
-            # Conjuntos das classes de equivalencia que possuem arestas
-            # entrando e saindo de n1
-            classesInN1 = {(classesAnt[v], edgeRel(v,n1,r)) for v, r in graph.inNeighboors(n1)}
-            classesOutN1 = {(classesAnt[v], edgeRel(n1,v,r)) for v, r in graph.outNeighboors(n1)}
+        del newClasses
 
-            for _, n2 in nodes:
-                if classesAnt[n2] != classesAnt[n1]:
-                    # Se dois vertices nao estavam na mesma classe é porque já
-                    # foram considerados incompatíveis.
-                    continue
-                if classesNow[n2] is not None:
-                    # O nodo n2 já foi atribuido a uma classe, portanto não
-                    # precisa ser processado
-                    continue
-
-                # Conjuntos das classes de equivalencia que possuem arestas
-                # entrando e saindo de n2
-                classesInN2 = {(classesAnt[v], edgeRel(v,n2,r)) for v, r in graph.inNeighboors(n2)}
-                classesOutN2 = {(classesAnt[v], edgeRel(n2,v,r)) for v, r in graph.outNeighboors(n2)}
-
-                if ((ignoreIn or classesInN1 == classesInN2)
-                        and ( ignoreOut or classesOutN1 == classesOutN2)):
-                    classesNow[n2] = classesNow[n1]
-                    if classesNow[n2] != classesAnt[n2]:
-                        changed = True
-        # end for n1
+        classesNow = dict(zip(nodes, classesVet))
         keepGoing = ctrlFunc(itCount, classesNow, not changed, newClassesParents)
 
         keepGoing = keepGoing and changed
         itCount += 1
 
         # Preparando os vetores de classes para a próxima iteração
-        classesAnt = classesNow
-        classesNow = {node:None for _, node in nodes}
+        classesAnt = classesVet
+
+    return classesNow
+
+def _worklistRefinement(adj, classVet, signature, ignoreIn, ignoreOut,
+        ctrlFunc):
+    """Iterações do modo 'worklist' de regularEquivalence.
+
+    Mantém para cada classe o conjunto de seus membros e a assinatura comum a
+    todos os seus membros 'limpos', isto é, que não possuem vizinhos que
+    mudaram de classe na iteração anterior e portanto não tiveram sua
+    assinatura alterada. Apenas as classes que possuem nodos 'sujos' são
+    reprocessadas.
+
+    Args:
+        - adj: CompiledAdjacency do grafo sendo processado
+        - classVet: Classificação inicial dos nodos, indexada pelo índice dos
+              nodos. É atualizada a cada iteração.
+        - signature: Função que calcula a assinatura de um nodo, dado seu
+              índice, a partir da classificação atual em 'classVet'.
+        - ignoreIn, ignoreOut: Indicam se as arestas de entrada ou de saída
+              são desconsideradas nas assinaturas.
+        - ctrlFunc: Como em regularEquivalence.
+
+    Return:
+        A classificação final, como em regularEquivalence. É o mesmo
+        dicionário fornecido a ctrlFunc.
+    """
+    nodes = adj.nodes
+    classes = dict(zip(nodes, classVet))
+
+    # Os membros são guardados pelos índices dos nodos. O nodo de menor
+    # número de uma classe c tem índice c - 1.
+    members = defaultdict(set)
+    for i, nodeClass in enumerate(classVet):
+        members[nodeClass].add(i)
+
+    # Assinatura comum aos membros limpos de cada classe
+    classSig = {}
+
+    # Na primeira iteração todos os nodos precisam ter sua assinatura
+    # calculada.
+    dirty = range(len(nodes))
+
+    keepGoing = True
+    itCount = 1
+
+    while keepGoing:
+        newClassesParents = {}
+        moved = []
+
+        # As assinaturas devem ser calculadas com a classificação anterior,
+        # antes que qualquer nodo mude de classe nesta iteração.
+        sigs = {i:signature(i) for i in dirty}
+
+        dirtyByClass = defaultdict(list)
+        for i in dirty:
+            dirtyByClass[classVet[i]].append(i)
+
+        for oldClass, dirtyMembers in dirtyByClass.items():
+            classMembers = members[oldClass]
+            hasClean = len(dirtyMembers) < len(classMembers)
+            minIdx = oldClass - 1
+
+            # Agrupando os nodos sujos pela assinatura. Os que possuem a mesma
+            # assinatura dos membros limpos permanecem junto com eles.
+            groups = {}
+            for i in dirtyMembers:
+                sig = sigs[i]
+                if hasClean and sig == classSig[oldClass]:
+                    continue
+                groups.setdefault(sig, []).append(i)
+
+            if not hasClean:
+                # O grupo que contém o nodo de menor número da classe
+                # permanece na classe.
+                stayGroup = sigs[minIdx]
+                del groups[stayGroup]
+                classSig[oldClass] = stayGroup
+
+            if len(groups) == 0:
+                continue
+
+            for group in groups.values():
+                classMembers.difference_update(group)
+
+            departing = list(groups.items())
+            if minIdx not in classMembers:
+                # O nodo de menor número saiu junto com um dos grupos. Este
+                # grupo fica com o número da classe e o restante dos membros
+                # recebe um novo número.
+                for k, (sig, group) in enumerate(departing):
+                    if minIdx in group:
+                        break
+                del departing[k]
+                departing.append((classSig[oldClass], list(classMembers)))
+                classSig[oldClass] = sig
+                members[oldClass] = set(group)
+
+            for sig, group in departing:
+                newClass = min(group) + 1
+                members[newClass] = set(group)
+                classSig[newClass] = sig
+                newClassesParents[newClass] = oldClass
+                for i in group:
+                    classVet[i] = newClass
+                    classes[nodes[i]] = newClass
+                moved.extend(group)
+        # end for oldClass
+
+        changed = len(moved) > 0
+
+        keepGoing = ctrlFunc(itCount, classes, not changed, newClassesParents)
+
+        keepGoing = keepGoing and changed
+        itCount += 1
 
-    return classesAnt
+        # Apenas os vizinhos dos nodos que mudaram de classe podem ter sua
+        # assinatura alterada na próxima iteração.
+        dirty = set()
+        for i in moved:
+            if not ignoreOut:
+                dirty.update(j for j, c in adj.inAdj[i])
+            if not ignoreIn:
+                dirty.update(j for j, c in adj.outAdj[i])
+
+    return classes
+
+def coarsestRegularPartition(graph, preClassAttr=None, edgeClassAttr=None,
+        regularType=REGULAR_TOTAL):
+    """Calcula diretamente a classificação final de regularEquivalence, isto
+    é, a partição regular mais grossa que refina a pré classificação, sem
+    passar pelas classificações intermediárias.
+
+    Utiliza o algoritmo de refinamento de partições de Paige e Tarjan. As
+    arestas de entrada e de saída de cada classe de aresta são tratadas como
+    relações distintas. É mantida uma partição X de blocos compostos em
+    relação à qual a partição atual P é estável. Enquanto houver um bloco
+    composto S formado por mais de um bloco de P, escolhe-se um bloco B de S
+    com no máximo metade dos nodos de S e divide-se P em relação a B e a S-B
+    usando apenas as arestas que chegam em B. Cada aresta é processada no
+    máximo O(log V) vezes, o que resulta em O(E log V).
 
-def fullMorphismStats(g, nodeClassF, edgeClassF):
+    Args:
+        - graph: Grafo a ser processado
+        - [preClassAttr]: Como em regularEquivalence
+        - [edgeClassAttr]: Como em regularEquivalence
+        - [regularType]: Como em regularEquivalence
+
+    Return:
+        mapa de nodos a um inteiro que representa a classe de equivalência a que
+        pertence. As classes são numeradas como em regularEquivalence e o
+        resultado é igual à sua classificação final.
+    """
+    # Determinando se vai levar em conta arestas de saída e de entrada
+    ignoreIn = False
+    ignoreOut = False
+    if regularType == REGULAR_SOURCE:
+        ignoreIn = True
+    elif regularType == REGULAR_TARGET:
+        ignoreOut = True
+
+    adj = CompiledAdjacency(graph, edgeClassAttr)
+    nodes = adj.nodes
+
+    if len(nodes) == 0:
+        return {}
+
+    # Transições rotuladas x -(l)-> y. A aresta (u, v, r) gera a transição
+    # u -((OUT, r))-> v e a transição v -((IN, r))-> u. Para cada transição
+    # guardamos a origem, o rótulo e a célula de contagem, que contém o número
+    # de transições com a mesma origem e o mesmo rótulo que chegam no bloco
+    # composto do destino.
+    labels = {}
+    transSrc = []
+    transLabel = []
+    transCount = []
+    predTrans = [[] for _ in nodes]
+
+    def addTransition(x, label, y):
+        l = labels.setdefault(label, len(labels))
+        predTrans[y].append(len(transSrc))
+        transSrc.append(x)
+        transLabel.append(l)
+
+    for u, v, r in adj.edges:
+        if not ignoreOut:
+            addTransition(u, ('out', r), v)
+        if not ignoreIn:
+            addTransition(v, ('in', r), u)
+
+    # Inicialmente existe apenas o bloco composto com todos os nodos.
+    cells = {}
+    for x, l in zip(transSrc, transLabel):
+        cell = cells.setdefault((x, l), [0])
+        cell[0] += 1
+        transCount.append(cell)
+
+    blockOf = [0 for _ in nodes]
+    blockMembers = {0: set(range(len(nodes)))}
+    blockCompound = {0: 0}
+    compoundBlocks = {0: {0}}
+    queue = []
+    inQueue = set()
+
+    def splitBlocks(nodeKeys):
+        """Divide os blocos de P separando os nodos fornecidos de acordo com
+        suas chaves. Nodos não fornecidos permanecem em seus blocos.
+        """
+        byBlock = defaultdict(dict)
+        for x, key in nodeKeys.items():
+            byBlock[blockOf[x]].setdefault(key, []).append(x)
+
+        for block, groups in byBlock.items():
+            members = blockMembers[block]
+            groups = list(groups.values())
+            if sum(len(group) for group in groups) == len(members):
+                # Todos os nodos do bloco foram fornecidos, o primeiro grupo
+                # permanece no bloco.
+                groups = groups[1:]
+
+            compound = blockCompound[block]
+            for group in groups:
+                newBlock = len(blockCompound)
+                members.difference_update(group)
+                blockMembers[newBlock] = set(group)
+                for x in group:
+                    blockOf[x] = newBlock
+                blockCompound[newBlock] = compound
+                compoundBlocks[compound].add(newBlock)
+
+            if len(compoundBlocks[compound]) > 1 and compound not in inQueue:
+                queue.append(compound)
+                inQueue.add(compound)
+
+    # Partição inicial: pré classificação e a estabilidade em relação ao
+    # bloco composto inicial, ou seja, os rótulos das transições de cada nodo.
+    nodeLabels = [set() for _ in nodes]
+    for x, l in zip(transSrc, transLabel):
+        nodeLabels[x].add(l)
+
+    initialKeys = {}
+    for x, node in enumerate(nodes):
+        if preClassAttr is None:
+            preClass = None
+        else:
+            preClass = graph.getNodeAttr(node, preClassAttr)
+        initialKeys[x] = (preClass, frozenset(nodeLabels[x]))
+    del nodeLabels
+    splitBlocks(initialKeys)
+    del initialKeys
+
+    while len(queue) > 0:
+        compound = queue.pop()
+        inQueue.discard(compound)
+        blocks = compoundBlocks[compound]
+        if len(blocks) < 2:
+            continue
+
+        # Escolhendo o menor entre dois blocos do bloco composto, que terá no
+        # máximo metade dos nodos do bloco composto.
+        iterBlocks = iter(blocks)
+        splitter = next(iterBlocks)
+        other = next(iterBlocks)
+        if len(blockMembers[other]) < len(blockMembers[splitter]):
+            splitter = other
+
+        blocks.remove(splitter)
+        newCompound = len(compoundBlocks)
+        compoundBlocks[newCompound] = {splitter}
+        blockCompound[splitter] = newCompound
+        if len(blocks) > 1:
+            queue.append(compound)
+            inQueue.add(compound)
+
+        # Contando as transições que chegam no bloco escolhido
+        trans = []
+        countSplitter = {}
+        cellCompound = {}
+        for y in blockMembers[splitter]:
+            for t in predTrans[y]:
+                key = (transSrc[t], transLabel[t])
+                countSplitter[key] = countSplitter.get(key, 0) + 1
+                cellCompound[key] = transCount[t]
+                trans.append(t)
+
+        # Cada nodo que possui transições para o bloco escolhido é separado
+        # pelos rótulos destas transições e por possuir ou não transições com
+        # o mesmo rótulo para o restante do bloco composto.
+        nodeKeys = defaultdict(list)
+        for key, count in countSplitter.items():
+            x, l = key
+            nodeKeys[x].append((l, cellCompound[key][0] > count))
+        splitBlocks({x:tuple(sorted(k)) for x, k in nodeKeys.items()})
+
+        # Atualizando as contagens: as transições para o bloco escolhido
+        # passam a apontar para uma nova célula.
+        newCells = {}
+        for key, count in countSplitter.items():
+            cellCompound[key][0] -= count
+            newCells[key] = [count]
+        for t in trans:
+            transCount[t] = newCells[(transSrc[t], transLabel[t])]
+
+    # Numerando as classes pelo número do menor nodo de cada uma
+    classes = {}
+    for members in blockMembers.values():
+        classNum = min(members) + 1
+        for x in members:
+            classes[nodes[x]] = classNum
+
+    return classes
+
+class RegularEquivalenceMaintainer(object):
+    """Mantém a classificação final de regularEquivalence de um grafo enquanto
+    este é alterado.
+
+    O objeto se registra como change handler do grafo e acompanha as
+    operações addNode, removeNode, addEdge, removeEdge e a alteração dos
+    atributos de pré classificação e de classe de aresta por setNodeAttr e
+    setEdgeAttr. Operações que alteram atributos em massa, como
+    setNodeAttrFromDict, não são acompanhadas.
+
+    As alterações são acumuladas e processadas em lote quando a classificação
+    é solicitada:
+
+    - Divisão: as classes que possuem nodos afetados são divididas pelas
+      assinaturas destes nodos, propagando as mudanças de classe apenas pela
+      vizinhança dos nodos que mudaram, como no modo 'worklist' de
+      regularEquivalence. O resultado é uma partição estável, mas que pode
+      ser mais fina que a regular mais grossa.
+    - Junção: as classes equivalentes são unidas calculando a partição
+      regular mais grossa do grafo quociente, cujo tamanho é o número de
+      classes e de pares de classes ligados, que é mantido incrementalmente.
+      Esta etapa percorre todo o quociente a cada atualização (veja
+      _mergeEquivalentClasses).
+
+    Exemplo::
+
+        maintainer = RegularEquivalenceMaintainer(g)
+        for src, tgt, rel in novasArestas:
+            g.addEdge(src, tgt, rel)
+        classes = maintainer.classes()
+    """
+
+    def __init__(self, graph, preClassAttr=None, edgeClassAttr=None,
+            regularType=REGULAR_TOTAL):
+        self.graph = graph
+        self.preClassAttr = preClassAttr
+        self.edgeClassAttr = edgeClassAttr
+        self.regularType = regularType
+
+        self._ignoreIn = regularType == REGULAR_SOURCE
+        self._ignoreOut = regularType == REGULAR_TARGET
+
+        classes = coarsestRegularPartition(graph, preClassAttr=preClassAttr,
+                edgeClassAttr=edgeClassAttr, regularType=regularType)
+
+        # Classe (identificador interno) de cada nodo e membros de cada classe
+        self._classOf = classes
+        self._members = defaultdict(set)
+        for node, nodeClass in classes.items():
+            self._members[nodeClass].add(node)
+        self._nextClass = len(classes) + 1
+
+        self._preClass = {node:self._getPreClass(node) for node in classes}
+
+        # Grafo quociente: contagem de arestas de cada classe para cada par
+        # (classe de destino, classe da aresta)
+        self._quotientOut = defaultdict(Counter)
+        for edge in graph.edges():
+            src, tgt, _ = edge
+            key = (self._classOf[tgt], self._edgeClass(edge))
+            self._quotientOut[self._classOf[src]][key] += 1
+
+        # Nodos cuja assinatura pode ter mudado desde a última atualização
+        self._dirty = set()
+
+        graph.addChangeHandler(self._procChange)
+
+    def detach(self):
+        """Deixa de acompanhar as alterações do grafo."""
+        self.graph.removeChangeHandler(self._procChange)
+
+    def _getPreClass(self, node):
+        if self.preClassAttr is None:
+            return None
+        return self.graph.getNodeAttr(node, self.preClassAttr)
+
+    def _edgeClass(self, edge):
+        if self.edgeClassAttr is None:
+            return edge[2]
+        return self.graph.getEdgeAttr(edge, self.edgeClassAttr)
+
+    def _newClass(self):
+        nodeClass = self._nextClass
+        self._nextClass += 1
+        return nodeClass
+
+    def _changeQuotient(self, edge, edgeClass, delta):
+        src, tgt, _ = edge
+        counter = self._quotientOut[self._classOf[src]]
+        key = (self._classOf[tgt], edgeClass)
+        count = counter[key] + delta
+        if count > 0:
+            counter[key] = count
+        else:
+            del counter[key]
+
+    def _changeNodeQuotient(self, node, delta):
+        g = self.graph
+        for v, r in g.outNeighboors(node):
+            edge = (node, v, r)
+            self._changeQuotient(edge, self._edgeClass(edge), delta)
+        for v, r in g.inNeighboors(node):
+            if v != node:
+                edge = (v, node, r)
+                self._changeQuotient(edge, self._edgeClass(edge), delta)
+
+    def _moveNode(self, node, newClass):
+        oldClass = self._classOf[node]
+        self._changeNodeQuotient(node, -1)
+
+        members = self._members[oldClass]
+        members.discard(node)
+        if len(members) == 0:
+            del self._members[oldClass]
+            self._quotientOut.pop(oldClass, None)
+
+        self._classOf[node] = newClass
+        self._members[newClass].add(node)
+        self._changeNodeQuotient(node, 1)
+
+    def _addNeighboorsToDirty(self, node, dirty):
+        """Acrescenta em dirty os nodos cuja assinatura depende da classe do
+        nodo fornecido.
+        """
+        if not self._ignoreOut:
+            dirty.update(v for v, r in self.graph.inNeighboors(node))
+        if not self._ignoreIn:
+            dirty.update(v for v, r in self.graph.outNeighboors(node))
+
+    def _procChange(self, event, *args):
+        """Handler de alterações registrado no grafo (addChangeHandler)."""
+        if event == MultiGraph.EVENT_ADD_NODE:
+            node, = args
+            nodeClass = self._newClass()
+            self._classOf[node] = nodeClass
+            self._members[nodeClass].add(node)
+            self._preClass[node] = self._getPreClass(node)
+            self._dirty.add(node)
+        elif event == MultiGraph.EVENT_REMOVE_NODE:
+            node, = args
+            # As arestas do nodo já foram removidas
+            self._moveNode(node, None)
+            del self._members[None]
+            self._quotientOut.pop(None, None)
+            del self._classOf[node]
+            del self._preClass[node]
+            self._dirty.discard(node)
+        elif event in (MultiGraph.EVENT_ADD_EDGE, MultiGraph.EVENT_REMOVE_EDGE):
+            edge, = args
+            if event == MultiGraph.EVENT_ADD_EDGE:
+                delta = 1
+            else:
+                delta = -1
+            self._changeQuotient(edge, self._edgeClass(edge), delta)
+            self._dirty.add(edge[0])
+            self._dirty.add(edge[1])
+        elif event == MultiGraph.EVENT_SET_ATTR:
+            # setElemAttr chama os handlers antes de verificar se o elemento
+            # existe: alterações de elementos desconhecidos são ignoradas
+            # (setElemAttr levanta KeyError em seguida)
+            scope, elem, attr, value = args
+            if (scope == MultiGraph.SCOPE_NODE and attr == self.preClassAttr
+                    and elem in self._preClass
+                    and value != self._preClass[elem]):
+                # O nodo não pode mais permanecer em sua classe
+                self._preClass[elem] = value
+                self._moveNode(elem, self._newClass())
+                self._dirty.add(elem)
+                self._addNeighboorsToDirty(elem, self._dirty)
+            elif (scope == MultiGraph.SCOPE_EDGE
+                    and attr == self.edgeClassAttr
+                    and self.graph.hasEdge(*elem)):
+                oldValue = self._edgeClass(elem)
+                if value != oldValue:
+                    self._changeQuotient(elem, oldValue, -1)
+                    self._changeQuotient(elem, value, 1)
+                    self._dirty.add(elem[0])
+                    self._dirty.add(elem[1])
+
+    def _signature(self, node):
+        g = self.graph
+        classOf = self._classOf
+        if self._ignoreIn:
+            classesIn = None
+        else:
+            classesIn = frozenset((classOf[v], self._edgeClass((v,node,r)))
+                    for v, r in g.inNeighboors(node))
+        if self._ignoreOut:
+            classesOut = None
+        else:
+            classesOut = frozenset((classOf[v], self._edgeClass((node,v,r)))
+                    for v, r in g.outNeighboors(node))
+        return (classesIn, classesOut)
+
+    def _splitDirtyClasses(self):
+        """Divide as classes até que a partição volte a ser estável.
+
+        Os membros de uma classe que não estão sujos possuem todos a mesma
+        assinatura, pois a partição era estável e nem suas arestas nem as
+        classes de seus vizinhos mudaram.
+        """
+        dirty = self._dirty
+        self._dirty = set()
+
+        while len(dirty) > 0:
+            sigs = {node:self._signature(node) for node in dirty}
+
+            dirtyByClass = defaultdict(list)
+            for node in dirty:
+                dirtyByClass[self._classOf[node]].append(node)
+
+            # As mudanças só são aplicadas depois que todas as classes foram
+            # verificadas, para que as assinaturas sejam comparadas com a
+            # mesma partição
+            departures = []
+            for nodeClass, dirtyMembers in dirtyByClass.items():
+                cleanSig = None
+                hasClean = False
+                for node in self._members[nodeClass]:
+                    if node not in dirty:
+                        cleanSig = self._signature(node)
+                        hasClean = True
+                        break
+
+                groups = {}
+                for node in dirtyMembers:
+                    sig = sigs[node]
+                    if hasClean and sig == cleanSig:
+                        continue
+                    groups.setdefault(sig, []).append(node)
+
+                groups = list(groups.values())
+                if not hasClean:
+                    # O maior grupo permanece na classe
+                    groups.sort(key=len)
+                    groups.pop()
+
+                departures.extend(groups)
+
+            moved = []
+            for group in departures:
+                newClass = self._newClass()
+                for node in group:
+                    self._moveNode(node, newClass)
+                moved.extend(group)
+
+            dirty = set()
+            for node in moved:
+                self._addNeighboorsToDirty(node, dirty)
+
+    def _mergeEquivalentClasses(self):
+        """Une as classes equivalentes calculando a partição regular mais
+        grossa do grafo quociente.
+
+        O quociente inteiro é particionado, e não apenas as classes afetadas
+        pelas alterações: a equivalência de duas classes depende de toda a
+        vizinhança alcançável a partir delas, e uma alteração pode tornar
+        equivalentes classes arbitrariamente distantes dela (por exemplo, os
+        nodos de duas cadeias longas quando o fim de uma delas passa a ser
+        igual ao da outra). O custo é proporcional ao número de classes e de
+        pares de classes ligados, não ao tamanho do grafo.
+        """
+        quotient = MultiGraph()
+        for nodeClass, members in self._members.items():
+            quotient.addNode(nodeClass)
+            for node in members:
+                quotient.setNodeAttr(nodeClass, 'preClass',
+                        self._preClass[node])
+                break
+        for nodeClass, counter in self._quotientOut.items():
+            for tgtClass, edgeClass in counter.keys():
+                quotient.addEdge(nodeClass, tgtClass, edgeClass)
+
+        if self.preClassAttr is None:
+            preClassAttr = None
+        else:
+            preClassAttr = 'preClass'
+        quotientClasses = coarsestRegularPartition(quotient,
+                preClassAttr=preClassAttr, regularType=self.regularType)
+
+        groups = defaultdict(list)
+        for nodeClass, quotientClass in quotientClasses.items():
+            groups[quotientClass].append(nodeClass)
+
+        for group in groups.values():
+            if len(group) < 2:
+                continue
+            # As classes menores são unidas à maior
+            group.sort(key=lambda c: len(self._members[c]))
+            survivor = group.pop()
+            for nodeClass in group:
+                for node in list(self._members[nodeClass]):
+                    self._moveNode(node, survivor)
+
+    def update(self):
+        """Processa as alterações pendentes do grafo."""
+        if len(self._dirty) == 0:
+            return
+
+        self._splitDirtyClasses()
+        self._mergeEquivalentClasses()
+
+    def getNumClasses(self):
+        self.update()
+        return len(self._members)
+
+    def classes(self):
+        """Recupera a classificação atual.
+
+        Return:
+            mapa de nodos a um inteiro que representa a classe de equivalência
+            a que pertence, numeradas como em regularEquivalence.
+        """
+        self.update()
+
+        classNums = {}
+        classes = {}
+        for num, node in enumerate(self.graph.nodes(), 1):
+            classes[node] = classNums.setdefault(self._classOf[node], num)
+
+        return classes
+
+def _refineShard(shard):
+    """Calcula a partição regular mais grossa de um shard. Executada nos
+    processos de parallelRegularEquivalence.
+
+    Args:
+        shard: tupla (preClasses, edges, regularType), onde os nodos são os
+            índices de preClasses, preClasses contém o código de pré classe de
+            cada nodo (ou None) e edges é uma lista de (src, tgt, classe).
+
+    Return:
+        (classes, quotientEdges, elapsed): classe local de cada nodo, arestas
+        entre classes e tempo gasto, em segundos.
+    """
+    startTime = time.perf_counter()
+    preClasses, edges, regularType = shard
+
+    g = MultiGraph()
+    for node, preClass in enumerate(preClasses):
+        g.addNode(node)
+        g.setNodeAttr(node, 'preClass', preClass)
+    for edge in edges:
+        g.addEdge(*edge)
+
+    classes = coarsestRegularPartition(g, preClassAttr='preClass',
+            regularType=regularType)
+    classes = [classes[node] for node in range(len(preClasses))]
+    quotientEdges = {(classes[src], classes[tgt], edgeClass)
+            for src, tgt, edgeClass in edges}
+
+    return (classes, quotientEdges, time.perf_counter() - startTime)
+
+def parallelRegularEquivalence(graph, preClassAttr=None, edgeClassAttr=None,
+        regularType=REGULAR_TOTAL, maxWorkers=None, numShards=None,
+        shardFunc=_trueFunc):
+    """Calcula a mesma classificação final de regularEquivalence distribuindo
+    as componentes fracamente conexas do grafo entre processos.
+
+    As componentes são agrupadas em shards de tamanho (nodos + arestas)
+    equilibrado e cada shard tem sua partição regular mais grossa calculada
+    independentemente em um ProcessPoolExecutor. Como não há arestas entre
+    shards, a união das partições locais é estável no grafo todo e as classes
+    de shards diferentes são unidas calculando a partição regular mais grossa
+    da união dos grafos quociente dos shards, que é pequena quando as
+    componentes se repetem.
+
+    Args:
+        graph, preClassAttr, edgeClassAttr, regularType: Como em
+            regularEquivalence.
+        maxWorkers: Número máximo de processos. Com maxWorkers=1 os shards
+            são processados no próprio processo.
+        numShards: Número de shards. O padrão é 4 vezes o número de
+            processos, para equilibrar a carga.
+        shardFunc: Função chamada ao final de cada shard como
+            shardFunc(shardNum, numNodes, numEdges, elapsed), onde elapsed é o
+            tempo de processamento do shard em segundos.
+
+    Return:
+        mapa de nodos a um inteiro que representa a classe de equivalência a
+        que pertence, numeradas como em regularEquivalence.
+    """
+    if maxWorkers is None:
+        maxWorkers = os.cpu_count() or 1
+    if numShards is None:
+        numShards = 4 * maxWorkers
+
+    adj = CompiledAdjacency(graph, edgeClassAttr)
+    nodes = adj.nodes
+    if len(nodes) == 0:
+        return {}
+
+    # Índices dos nodos de cada componente. Os shards são enviados com as
+    # pré classes trocadas por códigos inteiros e as arestas com os códigos
+    # da adjacência compilada, para reduzir o custo de envio.
+    components = weaklyConnectedComponents(graph)
+    compNodes = defaultdict(list)
+    for i, node in enumerate(nodes):
+        compNodes[components[node]].append(i)
+
+    if preClassAttr is None:
+        preClasses = [None] * len(nodes)
+    else:
+        preClassCodes = {}
+        preClasses = [preClassCodes.setdefault(
+            graph.getNodeAttr(node, preClassAttr), len(preClassCodes))
+            for node in nodes]
+
+    # Distribui as componentes, da maior para a menor, sempre no shard de
+    # menor tamanho
+    outAdj = adj.outAdj
+    compSizes = {comp: len(members) + sum(len(outAdj[i]) for i in members)
+        for comp, members in compNodes.items()}
+    numShards = max(1, min(numShards, len(compNodes)))
+    shardHeap = [(0, shardNum) for shardNum in range(numShards)]
+    shardComps = [[] for _ in range(numShards)]
+    for comp in sorted(compNodes, key=lambda c: -compSizes[c]):
+        size, shardNum = heapq.heappop(shardHeap)
+        shardComps[shardNum].append(comp)
+        heapq.heappush(shardHeap, (size + compSizes[comp], shardNum))
+
+    shardNodes = []
+    shards = []
+    for comps in shardComps:
+        members = [i for comp in comps for i in compNodes[comp]]
+        index = {i: k for k, i in enumerate(members)}
+        edges = [(index[i], index[j], code)
+                for i in members for j, code in outAdj[i]]
+        shardNodes.append(members)
+        shards.append(([preClasses[i] for i in members], edges,
+            regularType))
+
+    if maxWorkers == 1:
+        results = [_refineShard(shard) for shard in shards]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=maxWorkers) as executor:
+            results = list(executor.map(_refineShard, shards))
+
+    # União dos grafos quociente: nodos são (shard, classe local)
+    quotient = MultiGraph()
+    for shardNum, (localClasses, quotientEdges, elapsed) in enumerate(results):
+        preClasses = shards[shardNum][0]
+        for node, localClass in enumerate(localClasses):
+            qNode = (shardNum, localClass)
+            if not quotient.hasNode(qNode):
+                quotient.addNode(qNode)
+                quotient.setNodeAttr(qNode, 'preClass', preClasses[node])
+        for src, tgt, edgeClass in quotientEdges:
+            quotient.addEdge((shardNum, src), (shardNum, tgt), edgeClass)
+        shardFunc(shardNum, len(preClasses), len(shards[shardNum][1]),
+                elapsed)
+
+    quotientClasses = coarsestRegularPartition(quotient,
+            preClassAttr='preClass', regularType=regularType)
+
+    globalClass = [None] * len(nodes)
+    for shardNum, (localClasses, _, _) in enumerate(results):
+        for i, localClass in zip(shardNodes[shardNum], localClasses):
+            globalClass[i] = quotientClasses[(shardNum, localClass)]
+
+    classNums = {}
+    classes = {}
+    for i, node in enumerate(nodes):
+        classes[node] = classNums.setdefault(globalClass[i], i + 1)
+
+    return classes
+
+def fullMorphismStats(g, nodeClassF, edgeClassF, adjacency=None,
+        distinctCounter=None, countErrors=None):
     """Calcula as estatísticas do homomorfismo de grafo cheio induzido pelo
     grafo 'g' e as funções de mapeamento de nodos e arestas em classes de nodos
     e arestas respectivamente.
@@ -165,6 +1047,16 @@ def fullMorphismStats(g, nodeClassF, edgeClassF):
     - nodeClassF: Função que mapeia cada nodo do grafo em uma classe de nodos.
     - edgeClassF: Função que mapeia cada aresta do grafo em uma classe de
       aresta.
+    - adjacency: CompiledAdjacency de 'g'. Se fornecida, as classes das
+      arestas são as da adjacência compilada e 'edgeClassF' é ignorada. Cada
+      nodo é classificado por 'nodeClassF' uma única vez.
+    - distinctCounter: Classe dos contadores de nodos distintos usados em
+      edgeSrcHits e edgeTgtHits (por exemplo hyperLogLog.HyperLogLog, para
+      contagens aproximadas em memória fixa). Se 'None', são usados conjuntos
+      e as contagens são exatas.
+    - countErrors: Dicionário opcional que recebe, para cada aresta gerada, o
+      CountErrors com os erros padrão das contagens de edgeSrcHits e
+      edgeTgtHits. Pode ser passado a calcGraphRegIdxError e similares.
 
     Ret:
 
@@ -179,10 +1071,17 @@ def fullMorphismStats(g, nodeClassF, edgeClassF):
       número de nodos do grafo domínio que se mapeia em seu destino.
     """
 
+    if adjacency is not None:
+        return _compiledMorphismStats(adjacency, nodeClassF, distinctCounter,
+                countErrors)
+
+    if distinctCounter is None:
+        distinctCounter = set
+
     nodeHits = {}
     edgeHits = {}
-    edgeSrcSets = defaultdict(set)
-    edgeTgtSets = defaultdict(set)
+    edgeSrcSets = defaultdict(distinctCounter)
+    edgeTgtSets = defaultdict(distinctCounter)
 
     for node in g.nodes():
         newNode = nodeClassF(node)
@@ -201,11 +1100,58 @@ def fullMorphismStats(g, nodeClassF, edgeClassF):
         edgeSrcSets[newEdge].add(src)
         edgeTgtSets[newEdge].add(tgt)
 
-    edgeSrcHits = {e:len(s) for e,s in edgeSrcSets.items()}
-    edgeTgtHits = {e:len(s) for e,s in edgeTgtSets.items()}
+    edgeSrcHits, edgeTgtHits = _distinctCounts(edgeSrcSets, edgeTgtSets,
+            countErrors)
 
     return nodeHits, edgeHits, edgeSrcHits, edgeTgtHits
 
+def _compiledMorphismStats(adj, nodeClassF, distinctCounter=None,
+        countErrors=None):
+    """fullMorphismStats sobre uma CompiledAdjacency."""
+    nodeClasses = [nodeClassF(node) for node in adj.nodes]
+    nodeHits = Counter(nodeClasses)
+
+    if distinctCounter is None:
+        distinctCounter = set
+
+    edgeClasses = adj.edgeClasses
+    edgeHits = Counter()
+    edgeSrcSets = defaultdict(distinctCounter)
+    edgeTgtSets = defaultdict(distinctCounter)
+
+    for u, v, code in adj.edges:
+        newEdge = (nodeClasses[u], nodeClasses[v], edgeClasses[code])
+        edgeHits[newEdge] += 1
+        edgeSrcSets[newEdge].add(u)
+        edgeTgtSets[newEdge].add(v)
+
+    edgeSrcHits, edgeTgtHits = _distinctCounts(edgeSrcSets, edgeTgtSets,
+            countErrors)
+
+    return dict(nodeHits), dict(edgeHits), edgeSrcHits, edgeTgtHits
+
+CountErrors = namedtuple('CountErrors', ['ns', 'nt'])
+
+def _counterCount(counter):
+    """Contagem e erro padrão de um conjunto ou contador de distintos."""
+    if isinstance(counter, set):
+        return len(counter), 0.0
+    return counter.count(), counter.stdError()
+
+def _distinctCounts(edgeSrcSets, edgeTgtSets, countErrors=None):
+    """Contagens de nodos distintos de origem e destino de cada aresta imagem.
+    Se 'countErrors' for fornecido, recebe os CountErrors de cada aresta.
+    """
+    edgeSrcHits = {}
+    edgeTgtHits = {}
+    for edge, srcCounter in edgeSrcSets.items():
+        edgeSrcHits[edge], srcErr = _counterCount(srcCounter)
+        edgeTgtHits[edge], tgtErr = _counterCount(edgeTgtSets[edge])
+        if countErrors is not None:
+            countErrors[edge] = CountErrors(srcErr, tgtErr)
+
+    return edgeSrcHits, edgeTgtHits
+
 PreRegIdxStats = namedtuple('PreRegIdxStats', ['ns','ds','nt','dt','ec'])
 
 def calcPreRegIdxStats(nodeHits, edgeHits, edgeSrcHits, edgeTgtHits):
@@ -396,23 +1342,154 @@ def calcGraphRegIdx(edgeStats):
 
     return GraphRegIdx(sumN/sumD, sumNs/sumDs, sumNt/sumDt)
 
+# Os erros dos índices abaixo propagam os erros padrão das contagens ns e nt
+# (CountErrors de fullMorphismStats) somando-os linearmente. O resultado é um
+# limite superior para o erro padrão do índice mesmo que os erros das
+# contagens sejam correlacionados, o que ocorre entre contadores que veem os
+# mesmos nodos. As contagens ds, dt e ec são sempre exatas.
+
+def calcEdgeRegIdxError(edgeStats, countErrors):
+    """Calcula os erros dos índices de regularidade de aresta.
+
+    Args:
+
+    - edgeStats: Estatísticas de cada aresta, como em calcEdgeRegIdx.
+    - countErrors: Erros das contagens de cada aresta, como preenchidos por
+      fullMorphismStats.
+
+    Ret:
+
+    Dicionário que mapeia cada aresta a um EdgeRegIxd com os erros de RI, SRI
+    e TRI.
+    """
+    edgeErr = {}
+
+    for edge, (ns,ds,nt,dt,ec) in edgeStats.items():
+        errNs, errNt = countErrors[edge]
+        edgeErr[edge] = EdgeRegIxd((errNs+errNt)/(ds+dt), errNs/ds, errNt/dt)
+
+    return edgeErr
+
+def calcNodeRegIdxError(nodeHits, edgeStats, countErrors):
+    """Calcula os erros dos índices de regularidade de nodo.
+
+    Args:
+
+    - nodeHits, edgeStats: Como em calcNodeRegIdx.
+    - countErrors: Erros das contagens de cada aresta, como preenchidos por
+      fullMorphismStats.
+
+    Ret:
+
+    Dicionário que mapeia cada nodo a um NodeRegIdx com os erros de RI, NRI,
+    SRI e TRI.
+    """
+    sumEcS = Counter()
+    sumEcT = Counter()
+    sumErrNS = Counter()
+    sumErrNT = Counter()
+    sumEdgeErrN = Counter()
+    sumEdgeD = Counter()
+
+    for edge, stats in edgeStats.items():
+        errNs, errNt = countErrors[edge]
+        sumEcS[edge[0]] += stats.ec
+        sumEcT[edge[1]] += stats.ec
+
+        sumErrNS[edge[0]] += stats.ec * errNs
+        sumErrNT[edge[1]] += stats.ec * errNt
+
+        n = stats.ec * (errNs + errNt)
+        sumEdgeErrN[edge[0]] += n
+        sumEdgeErrN[edge[1]] += n
+
+        d = stats.ec * (stats.ds + stats.dt)
+        sumEdgeD[edge[0]] += d
+        sumEdgeD[edge[1]] += d
+
+    nodeErr = {}
+    for node, d in nodeHits.items():
+        ecs = sumEcS[node]
+        ect = sumEcT[node]
+        if d <= 0 or ecs + ect <= 0:
+            # Índices constantes em calcNodeRegIdx
+            nodeErr[node] = NodeRegIdx(0.0,0.0,0.0,0.0)
+            continue
+
+        errNs = sumErrNS[node]
+        errNt = sumErrNT[node]
+
+        ri = sumEdgeErrN[node]/sumEdgeD[node]
+        nri = (errNs+errNt)/(d*(ecs+ect))
+        sri = errNs/(d*ecs) if ecs > 0 else 0.0
+        tri = errNt/(d*ect) if ect > 0 else 0.0
+
+        nodeErr[node] = NodeRegIdx(ri,nri,sri,tri)
+
+    return nodeErr
+
+def calcGraphRegIdxError(edgeStats, countErrors):
+    """Calcula os erros dos índices de regularidade de grafo.
+
+    Args:
+
+    - edgeStats: Estatísticas de cada aresta, como em calcGraphRegIdx.
+    - countErrors: Erros das contagens de cada aresta, como preenchidos por
+      fullMorphismStats.
+
+    Ret:
+
+    GraphRegIdx com os erros de RI, SRI e TRI.
+    """
+    sumErrNs = 0.0
+    sumErrNt = 0.0
+    sumDs = 0.0
+    sumDt = 0.0
+
+    for edge, (ns,ds,nt,dt,ec) in edgeStats.items():
+        errNs, errNt = countErrors[edge]
+        sumErrNs += ec*errNs
+        sumErrNt += ec*errNt
+        sumDs += ec*ds
+        sumDt += ec*dt
+
+    assert(sumDs > 0)
+    assert(sumDt > 0)
+
+    return GraphRegIdx((sumErrNs+sumErrNt)/(sumDs+sumDt), sumErrNs/sumDs,
+            sumErrNt/sumDt)
+
 class MultiGraph(object):
     SCOPE_NODE = 'node'
     SCOPE_EDGE = 'edge'
 
+    # Eventos de alteração do grafo informados aos handlers de
+    # addChangeHandler, como primeiro argumento. Os demais argumentos de cada
+    # evento estão descritos em addChangeHandler
+    EVENT_ADD_NODE = 'addNode'
+    EVENT_REMOVE_NODE = 'removeNode'
+    EVENT_ADD_EDGE = 'addEdge'
+    EVENT_REMOVE_EDGE = 'removeEdge'
+    EVENT_SET_ATTR = 'setAttr'
+
     def __init__(self):
         self._adjOut = {}
         self._adjIn = {}
         self._numNodes = 0
         self._numEdges = 0
-        self.nodeAttrs = {}
-        self.edgeAttrs = {}
         self.relations = set()
         self.nodeAttrSpecs = {}
         self.edgeAttrSpecs = {}
         self.graphAttrSpecs = {}
         self.graphAttrs = {}
 
+        # Atributos em colunas tipadas indexadas pelo identificador inteiro
+        # de cada elemento
+        self._nodeIndex = ElemIndex()
+        self._edgeIndex = ElemIndex()
+        self.nodeAttrs = AttrStore(self._nodeIndex, self.nodeAttrSpecs)
+        self.edgeAttrs = AttrStore(self._edgeIndex, self.edgeAttrSpecs)
+
         self.attrs = {
             MultiGraph.SCOPE_NODE: self.nodeAttrs,
             MultiGraph.SCOPE_EDGE: self.edgeAttrs
@@ -428,15 +1505,141 @@ class MultiGraph(object):
             MultiGraph.SCOPE_EDGE: {}
         }
 
+        self._changeHandlers = []
+
+        # Índice opcional da adjacência por relação (buildRelationIndex):
+        # relação -> nodo -> conjunto de vizinhos
+        self._relOut = None
+        self._relIn = None
+        self._relNumEdges = None
+
+        # Contador compartilhado ([n]) pelos n grafos que usam a mesma
+        # estrutura (adjacência, relações, índices de elementos e por
+        # relação) depois de snapshot, ou None se ela não é compartilhada.
+        # Antes de alterar a estrutura o grafo deixa o grupo e a copia se
+        # outro grafo ainda a usa (_ownStructure)
+        self._structureSharers = None
+
+        # Agregadores (escopo, nome) cujas colunas são compartilhadas com uma
+        # cópia de snapshot e devem ser copiadas antes de alteradas
+        # (_ownAggregator)
+        self._sharedAggregators = set()
+
+    def snapshot(self):
+        """Cria uma cópia copy-on-write do grafo.
+
+        A cópia compartilha com o grafo a estrutura e as colunas de
+        atributos, em tempo e memória que não dependem do número de nodos e
+        arestas. A estrutura é copiada pelo primeiro dos dois que acrescentar
+        ou remover nodos ou arestas enquanto outro grafo ainda a usar, e
+        cada coluna de atributo ou de agregador pelo primeiro que alterá-la;
+        até lá leituras não copiam nada. AttrSpecs e atributos de grafo são
+        copiados de imediato; change handlers não são copiados.
+
+        Escritas feitas diretamente em vetores obtidos antes da cópia com
+        getElemAttrColumn alteram também a cópia.
+        """
+        g = MultiGraph()
+        g._adjOut = self._adjOut
+        g._adjIn = self._adjIn
+        g._numNodes = self._numNodes
+        g._numEdges = self._numEdges
+        g.relations = self.relations
+        g._relOut = self._relOut
+        g._relIn = self._relIn
+        g._relNumEdges = self._relNumEdges
+        g._nodeIndex.share(self._nodeIndex)
+        g._edgeIndex.share(self._edgeIndex)
+        if self._structureSharers is None:
+            self._structureSharers = [1]
+        self._structureSharers[0] += 1
+        g._structureSharers = self._structureSharers
+
+        for scope in (MultiGraph.SCOPE_NODE, MultiGraph.SCOPE_EDGE):
+            g.attrSpecs[scope].update((name, copy.copy(spec))
+                    for name, spec in self.attrSpecs[scope].items())
+            g.attrs[scope].shareColumns(self.attrs[scope])
+        g.graphAttrSpecs.update((name, copy.copy(spec))
+                for name, spec in self.graphAttrSpecs.items())
+        g.graphAttrs.update(self.graphAttrs)
+        g.aggregators = {scope: dict(columns)
+            for scope, columns in self.aggregators.items()}
+        shared = {(scope, name) for scope, columns in self.aggregators.items()
+                for name in columns}
+        g._sharedAggregators = set(shared)
+        self._sharedAggregators.update(shared)
+        return g
+
+    def _ownStructure(self):
+        """Deixa de compartilhar a estrutura com as cópias de snapshot,
+        copiando-a apenas se outro grafo ainda a usa.
+        """
+        sharers = self._structureSharers
+        self._structureSharers = None
+        sharers[0] -= 1
+        if sharers[0] == 0:
+            # Os demais grafos já copiaram a estrutura: ela é só deste
+            return
+
+        self._adjOut = {node: set(nbrs) for node, nbrs in self._adjOut.items()}
+        self._adjIn = {node: set(nbrs) for node, nbrs in self._adjIn.items()}
+        self.relations = set(self.relations)
+        self._nodeIndex.unshare()
+        self._edgeIndex.unshare()
+        if self._relOut is not None:
+            self._relOut = {rel: {node: set(nbrs)
+                    for node, nbrs in byNode.items()}
+                for rel, byNode in self._relOut.items()}
+            self._relIn = {rel: {node: set(nbrs)
+                    for node, nbrs in byNode.items()}
+                for rel, byNode in self._relIn.items()}
+            self._relNumEdges = dict(self._relNumEdges)
+
+    def addChangeHandler(self, handler):
+        """Insere um handler que será chamado sempre que um nodo ou aresta
+        for adicionado ou removido ou que um atributo de elemento for
+        alterado por setElemAttr.
+
+        Os handlers são sempre chamados com o elemento presente no grafo:
+        depois de ser adicionado e antes de ser removido. Nas alterações de
+        atributos eles são chamados antes de o novo valor ser armazenado.
+
+        Args:
+            - handler: Função chamada como handler(event, *args), em que:
+                - EVENT_ADD_NODE, EVENT_REMOVE_NODE: args = (node,)
+                - EVENT_ADD_EDGE, EVENT_REMOVE_EDGE: args = ((src, tgt, rel),)
+                - EVENT_SET_ATTR: args = (scope, elem, attr, value)
+        """
+        if handler not in self._changeHandlers:
+            self._changeHandlers.append(handler)
+
+    def removeChangeHandler(self, handler):
+        """Remove um handler inserido por addChangeHandler. Não faz nada se
+        ele não estiver inserido.
+        """
+        if handler in self._changeHandlers:
+            self._changeHandlers.remove(handler)
+
+    def _callChangeHandlers(self, event, *args):
+        for handler in self._changeHandlers:
+            handler(event, *args)
+
     def addNode(self, node):
         if node not in self._adjOut:
+            if self._structureSharers is not None:
+                self._ownStructure()
             self._adjOut[node] = set()
             self._adjIn[node] = set()
             self._numNodes += 1
+            self._nodeIndex.add(node)
+            if self._changeHandlers:
+                self._callChangeHandlers(MultiGraph.EVENT_ADD_NODE, node)
 
     def removeNode(self, node):
         if not self.hasNode(node):
             return
+        if self._structureSharers is not None:
+            self._ownStructure()
 
         edgesToRemove = []
         for v, r in self.outNeighboors(node):
@@ -446,29 +1649,35 @@ class MultiGraph(object):
         for s,t,r in edgesToRemove:
             self.removeEdge(s,t,r)
 
+        if self._changeHandlers:
+            self._callChangeHandlers(MultiGraph.EVENT_REMOVE_NODE, node)
+
         if node in self._adjOut:
             del self._adjOut[node]
             self._numNodes -= 1
         if node in self._adjIn:
             del self._adjIn[node]
 
-        for attrDict in self.nodeAttrs.values():
-            if node in attrDict:
-                del attrDict[node]
+        i = self._nodeIndex.remove(node)
+        if i is not None:
+            self.nodeAttrs.discardElem(i)
+            self._discardAggregators(MultiGraph.SCOPE_NODE, i)
 
     def removeNodeByAttr(self, attrName, attrValue):
-        def filterNodes(node):
-            return self.getNodeAttr(node, attrName) == attrValue
-
-        toRemove = list(filter(filterNodes, self.nodes()))
-        for node in toRemove:
+        for node in self.getNodesByAttr(attrName, attrValue):
             self.removeNode(node)
 
     def addEdge(self, source, target, relation):
+        """Acrescenta a aresta, se ainda não existir.
+
+        :return: Identificador inteiro da aresta (veja getEdgeId).
+        """
         if self.hasEdge(source, target, relation):
             # Aresta já existe
-            return
+            return self._edgeIndex.ids[(source, target, relation)]
 
+        if self._structureSharers is not None:
+            self._ownStructure()
         if source not in self._adjOut:
             self.addNode(source)
         if target not in self._adjOut:
@@ -477,23 +1686,144 @@ class MultiGraph(object):
         self._adjIn[target].add( (source, relation) )
         self._numEdges += 1
         self.relations.add(relation)
+        if self._relOut is not None:
+            self._relIndexAdd(source, target, relation)
+        edgeId = self._edgeIndex.add((source, target, relation))
+
+        if self._changeHandlers:
+            self._callChangeHandlers(MultiGraph.EVENT_ADD_EDGE,
+                    (source, target, relation))
+
+        return edgeId
+
+    def addNodesFrom(self, nodes, attrs=None):
+        """Acrescenta em bloco os nodos e seus atributos.
+
+        :param nodes: Iterável de nodos. Nodos já existentes são mantidos.
+        :param attrs: Dicionário que associa o nome de cada atributo a uma
+            sequência de valores paralela a 'nodes' (o k-ésimo valor é do
+            k-ésimo nodo). Valores None não são atribuídos.
+        """
+        if self._changeHandlers:
+            # Caminho elemento a elemento para gerar os eventos
+            for k, node in enumerate(nodes):
+                self.addNode(node)
+                for attr, values in (attrs or {}).items():
+                    if values[k] is not None:
+                        self.setNodeAttr(node, attr, values[k])
+            return
+
+        if self._structureSharers is not None:
+            self._ownStructure()
+        adjOut = self._adjOut
+        adjIn = self._adjIn
+        index = self._nodeIndex
+        nodeIds = []
+        for node in nodes:
+            i = index.ids.get(node)
+            if i is None:
+                adjOut[node] = set()
+                adjIn[node] = set()
+                self._numNodes += 1
+                i = index.add(node)
+            nodeIds.append(i)
+
+        for attr, values in (attrs or {}).items():
+            self.nodeAttrs.ownColumn(attr, create=True).setMany(nodeIds,
+                    values)
+
+    def addEdgesFrom(self, edges, attrs=None, combine=None):
+        """Acrescenta em bloco as arestas e seus atributos, criando os nodos
+        necessários, em uma única passada sobre 'edges'.
+
+        Para vetores paralelos de origens, destinos e relações use
+        addEdgesFrom(zip(sources, targets, relations), attrs).
+
+        :param edges: Iterável de arestas (src, tgt, rel).
+        :param attrs: Dicionário que associa o nome de cada atributo de aresta
+            a uma sequência de valores paralela a 'edges'. Valores None não são
+            atribuídos.
+        :param combine: Dicionário que associa nomes de atributos a funções
+            f(valorAtual, novoValor) usadas quando uma aresta repetida (ou já
+            existente) recebe novamente o atributo. Para os demais atributos
+            prevalece o último valor.
+        """
+        if combine is None:
+            combine = {}
+        attrs = attrs or {}
+
+        if self._changeHandlers:
+            # Caminho elemento a elemento para gerar os eventos
+            for k, (src, tgt, rel) in enumerate(edges):
+                edgeId = self.addEdge(src, tgt, rel)
+                for attr, values in attrs.items():
+                    value = values[k]
+                    if value is None:
+                        continue
+                    current = self.getEdgeAttrById(edgeId, attr, _MISSING)
+                    if attr in combine and current is not _MISSING:
+                        value = combine[attr](current, value)
+                    self.setEdgeAttrById(edgeId, attr, value)
+            return
+
+        if self._structureSharers is not None:
+            self._ownStructure()
+        adjOut = self._adjOut
+        adjIn = self._adjIn
+        nodeIndex = self._nodeIndex
+        edgeIdOf = self._edgeIndex.ids
+        edgeKeys = self._edgeIndex.keys
+        relations = self.relations
+        relIndexed = self._relOut is not None
+
+        # Primeira passada: estrutura e identificadores das arestas
+        edgeIds = []
+        appendId = edgeIds.append
+        for src, tgt, rel in edges:
+            edge = (src, tgt, rel)
+            i = edgeIdOf.get(edge)
+            if i is None:
+                for node in (src, tgt):
+                    if node not in adjOut:
+                        adjOut[node] = set()
+                        adjIn[node] = set()
+                        self._numNodes += 1
+                        nodeIndex.add(node)
+                adjOut[src].add((tgt, rel))
+                adjIn[tgt].add((src, rel))
+                relations.add(rel)
+                if relIndexed:
+                    self._relIndexAdd(src, tgt, rel)
+                i = len(edgeKeys)
+                edgeIdOf[edge] = i
+                edgeKeys.append(edge)
+            appendId(i)
+        self._numEdges = len(edgeIdOf)
+
+        # Segunda passada: uma coluna de atributo por vez
+        for attr, values in attrs.items():
+            self.edgeAttrs.ownColumn(attr, create=True).setMany(edgeIds,
+                    values, combine.get(attr))
 
     def removeEdge(self, source, target, relation):
         if self.hasEdge(source, target, relation):
+            if self._structureSharers is not None:
+                self._ownStructure()
+            if self._changeHandlers:
+                self._callChangeHandlers(MultiGraph.EVENT_REMOVE_EDGE,
+                        (source, target, relation))
             self._adjOut[source].discard((target, relation))
             self._adjIn[target].discard((source, relation))
             self._numEdges -= 1
-            edge = (source, target, relation)
-            for attrDict in self.edgeAttrs.values():
-                if edge in attrDict:
-                    del attrDict[edge]
+            if self._relOut is not None:
+                self._relIndexRemove(source, target, relation)
+            i = self._edgeIndex.remove((source, target, relation))
+            if i is not None:
+                self.edgeAttrs.discardElem(i)
+                self._discardAggregators(MultiGraph.SCOPE_EDGE, i)
 
     def removeEdgeByAttr(self, attrName, attrValue):
-        def filterEdges(edge):
-            return self.getEdgeAttr(edge, attrName) == attrValue
-
-        toRemove = list(filter(filterEdges, self.edges()))
-        for src, tgt, rel in toRemove:
+        for src, tgt, rel in self.getEdgesByAttr(attrName, attrValue):
             self.removeEdge(src, tgt, rel)
 
     def nodes(self):
@@ -502,34 +1832,207 @@ class MultiGraph(object):
     def getNumNodes(self):
         return self._numNodes
 
-    def edges(self):
-        for src in self._adjOut.keys():
-            for tgt, rel in self._adjOut[src]:
-                yield (src, tgt, rel)
+    def edges(self, rel=None):
+        """Iterador para as arestas (src, tgt, rel).
 
-    def getNumEdges(self):
-        return self._numEdges
+        :param rel: Se fornecido, apenas as arestas desta relação. Com o
+            índice por relação (buildRelationIndex) o custo é proporcional ao
+            número de arestas da relação.
+        """
+        if rel is None:
+            for src in self._adjOut.keys():
+                for tgt, rel in self._adjOut[src]:
+                    yield (src, tgt, rel)
+        elif self._relOut is not None:
+            for src, tgts in self._relOut.get(rel, {}).items():
+                for tgt in tgts:
+                    yield (src, tgt, rel)
+        else:
+            for src in self._adjOut.keys():
+                for tgt, r in self._adjOut[src]:
+                    if r == rel:
+                        yield (src, tgt, rel)
+
+    def getNumEdges(self, rel=None):
+        """Número de arestas do grafo ou, se 'rel' for fornecido, da
+        relação 'rel'.
+        """
+        if rel is None:
+            return self._numEdges
+        if self._relOut is not None:
+            return self._relNumEdges.get(rel, 0)
+        return sum(1 for _ in self.edges(rel))
+
+    def buildRelationIndex(self):
+        """Cria o índice que agrupa a adjacência de cada nodo por relação.
+
+        Com o índice, outNeighboors, inNeighboors, outDegree, inDegree, edges
+        e getNumEdges restritos a uma relação custam tempo proporcional ao
+        resultado em vez de percorrer todos os vizinhos do nodo. O índice é
+        mantido por addEdge, addEdgesFrom, removeEdge e removeNode até ser
+        descartado com dropRelationIndex. Sem ele estes métodos continuam
+        funcionando, filtrando a adjacência completa.
+
+        O índice guarda um conjunto de vizinhos por par (relação, nodo) em
+        cada direção, o que aproximadamente dobra a memória e o tempo de
+        inserção da adjacência; por isso é opcional.
+        """
+        if self._relOut is not None:
+            return
+        self._relOut = {}
+        self._relIn = {}
+        self._relNumEdges = {}
+        for src, tgt, rel in self.edges():
+            self._relIndexAdd(src, tgt, rel)
+
+    def dropRelationIndex(self):
+        """Descarta o índice criado por buildRelationIndex."""
+        self._relOut = None
+        self._relIn = None
+        self._relNumEdges = None
+
+    def hasRelationIndex(self):
+        return self._relOut is not None
+
+    def _relIndexAdd(self, src, tgt, rel):
+        try:
+            outByNode = self._relOut[rel]
+            inByNode = self._relIn[rel]
+        except KeyError:
+            outByNode = self._relOut[rel] = {}
+            inByNode = self._relIn[rel] = {}
+            self._relNumEdges[rel] = 0
+        try:
+            outByNode[src].add(tgt)
+        except KeyError:
+            outByNode[src] = {tgt}
+        try:
+            inByNode[tgt].add(src)
+        except KeyError:
+            inByNode[tgt] = {src}
+        self._relNumEdges[rel] += 1
+
+    def _relIndexRemove(self, src, tgt, rel):
+        # Conjuntos vazios são removidos para que edges(rel) percorra apenas
+        # nodos com arestas na relação
+        byNode = self._relOut[rel]
+        byNode[src].discard(tgt)
+        if not byNode[src]:
+            del byNode[src]
+        byNode = self._relIn[rel]
+        byNode[tgt].discard(src)
+        if not byNode[tgt]:
+            del byNode[tgt]
+        self._relNumEdges[rel] -= 1
+
+    def edgeIds(self):
+        """Iterador para os identificadores inteiros das arestas, na ordem
+        em que foram acrescentadas.
+
+        Cada aresta recebe em addEdge um identificador que não muda enquanto
+        ela existir e não é reaproveitado depois de sua remoção. Percorrer as
+        arestas pelos identificadores e acessar seus atributos com
+        getEdgeAttrById evita criar e calcular o hash de uma tupla
+        (src, tgt, rel) por aresta.
+        """
+        return iter(self._edgeIndex.ids.values())
+
+    def getEdgeId(self, edge):
+        """Identificador inteiro da aresta (src, tgt, rel), ou None se ela não
+        existir.
+        """
+        return self._edgeIndex.ids.get(edge)
+
+    def getEdgeById(self, edgeId):
+        """Tupla (src, tgt, rel) da aresta de identificador 'edgeId'."""
+        edge = self._edgeIndex.keys[edgeId]
+        if edge is None:
+            raise KeyError(edgeId)
+        return edge
+
+    def getEdgeIdCapacity(self):
+        """Maior identificador de aresta já atribuído mais um: tamanho dos
+        vetores indexados por identificador de aresta.
+        """
+        return self._edgeIndex.capacity()
 
-    def outNeighboors(self, node):
+    def outNeighboors(self, node, rel=None):
         """outNeighboors(node) -> (tgt1, rel), (tgt2, rel), ...
+
+        :param rel: Se fornecido, apenas os vizinhos por arestas da relação
+            'rel' (veja buildRelationIndex).
         """
-        return iter(self._adjOut[node])
+        return self._neighboors(node, rel, self._adjOut, self._relOut)
 
-    def inNeighboors(self, node):
+    def inNeighboors(self, node, rel=None):
         """inNeighboors(node) -> (src1, rel), (src2, rel), ...
+
+        :param rel: Mesmo que em outNeighboors.
         """
-        return iter(self._adjIn[node])
+        return self._neighboors(node, rel, self._adjIn, self._relIn)
 
-    def neighboors(self, node):
+    def _neighboors(self, node, rel, adj, relAdj):
+        nbrs = adj[node]
+        if rel is None:
+            return iter(nbrs)
+        if relAdj is not None:
+            return ((v, rel) for v in relAdj.get(rel, {}).get(node, ()))
+        return ((v, r) for v, r in nbrs if r == rel)
+
+    def neighboors(self, node, rel=None):
         """Retorna um iterador para todos os vizinhos de um nodo, tanto os de
         entrada como os de saída. É equivalente a considerar que as arestas não
         possuem direção.
         """
-        return chain(self.outNeighboors(node), self.inNeighboors(node))
+        return chain(self.outNeighboors(node, rel),
+                self.inNeighboors(node, rel))
+
+    def outDegree(self, node, rel=None):
+        """Número de arestas de saída do nodo, todas ou apenas as da relação
+        'rel'.
+        """
+        return self._degree(node, rel, self._adjOut, self._relOut)
+
+    def inDegree(self, node, rel=None):
+        """Número de arestas de entrada do nodo, todas ou apenas as da
+        relação 'rel'.
+        """
+        return self._degree(node, rel, self._adjIn, self._relIn)
+
+    def _degree(self, node, rel, adj, relAdj):
+        nbrs = adj[node]
+        if rel is None:
+            return len(nbrs)
+        if relAdj is not None:
+            return len(relAdj.get(rel, {}).get(node, ()))
+        return sum(1 for _, r in nbrs if r == rel)
 
     def hasNode(self, node):
         return node in self._adjOut
 
+    def freeze(self):
+        """Cria uma cópia imutável do grafo com adjacência em vetores
+        inteiros (frozenGraph.FrozenMultiGraph).
+        """
+        from frozenGraph import FrozenMultiGraph
+        return FrozenMultiGraph(self)
+
+    def subgraphView(self, relations=None, nodeFilter=None, edgeFilter=None,
+            nodeAttrs=None, edgeAttrs=None):
+        """Cria uma visão somente leitura (graphView.SubgraphView) de um
+        subgrafo, sem copiar a estrutura nem os atributos do grafo.
+
+        :param relations: Relações das arestas mantidas. None mantém todas.
+        :param nodeFilter: Predicado dos nodos mantidos.
+        :param edgeFilter: Predicado das arestas (src, tgt, rel) mantidas.
+        :param nodeAttrs: Dicionário atributo -> valor que os nodos mantidos
+            devem ter.
+        :param edgeAttrs: Mesmo que 'nodeAttrs' para as arestas.
+        """
+        from graphView import SubgraphView
+        return SubgraphView(self, relations, nodeFilter, edgeFilter,
+                nodeAttrs, edgeAttrs)
+
     def hasEdge(self, src, tgt, rel):
         if src in self._adjOut:
             return (tgt, rel) in self._adjOut[src]
@@ -550,6 +2053,7 @@ class MultiGraph(object):
 
     def addNodeAttrSpec(self, attrSpec):
         self.nodeAttrSpecs[attrSpec.name] = attrSpec
+        self.nodeAttrs.retype(attrSpec.name)
 
     def getNodeAttrSpec(self, attrName):
         return self.nodeAttrSpecs.get(attrName)
@@ -562,6 +2066,7 @@ class MultiGraph(object):
 
     def addEdgeAttrSpec(self, attrSpec):
         self.edgeAttrSpecs[attrSpec.name] = attrSpec
+        self.edgeAttrs.retype(attrSpec.name)
 
     def getEdgeAttrSpec(self, attrName):
         return self.edgeAttrSpecs.get(attrName)
@@ -573,7 +2078,8 @@ class MultiGraph(object):
             del self.edgeAttrs[attrName]
 
     def addAttrSpec(self, scope, attrSpec):
-        self.attrSpecs[scope][attrSpecs.name] = attrSpec
+        self.attrSpecs[scope][attrSpec.name] = attrSpec
+        self.attrs[scope].retype(attrSpec.name)
 
     def getAttrSpec(self, scope, attrName):
         return self.attrSpecs[scope].get(attrName)
@@ -581,56 +2087,122 @@ class MultiGraph(object):
     def getNodeAttrValueSet(self, attrName, default=None):
         """Recupera o conjunto dos valores distintos de um atributo de nodo
         """
-        attrDict = self.nodeAttrs.get(attrName)
-        if attrDict is not None:
-            valueSet = set(attrDict.values())
-        else:
-            valueSet = set()
-
-        if default is not None:
-            valueSet.add(default)
-
-        return valueSet
+        return self._attrValueSet(self.nodeAttrs.column(attrName),
+                self.nodeAttrSpecs.get(attrName), self.getNumNodes(), default)
 
     def getEdgeAttrValueSet(self, attrName, default=None):
         """Recupera o conjunto dos valores distintos de um atributo de aresta.
         """
-        attrDict = self.edgeAttrs.get(attrName)
-        if attrDict is not None:
-            valueSet = set(attrDict.values())
-        else:
-            valueSet = set()
+        return self._attrValueSet(self.edgeAttrs.column(attrName),
+                self.edgeAttrSpecs.get(attrName), self.getNumEdges(), default)
 
+    @staticmethod
+    def _attrValueSet(column, spec, numElems, default):
+        """Valores distintos da coluna. O valor padrão do AttrSpec é incluído
+        se algum dos 'numElems' elementos não tiver valor guardado: colunas
+        esparsas não guardam os valores iguais a ele.
+        """
+        if column is None:
+            valueSet = set()
+            count = 0
+        else:
+            if column.hasInverted():
+                # O índice invertido já tem um item por valor distinto
+                valueSet = set(column.inverted())
+            else:
+                valueSet = set(column.presentValues())
+            count = column.count()
+
+        if (spec is not None and spec.default is not None
+                and count < numElems):
+            valueSet.add(spec.default)
         if default is not None:
             valueSet.add(default)
 
         return valueSet
 
+    def getNodesByAttr(self, attrName, attrValue):
+        """Lista dos nodos cujo atributo 'attrName' vale 'attrValue' (com o
+        valor padrão do AttrSpec para nodos sem valor, como em getNodeAttr).
+
+        A consulta usa o índice invertido do atributo, criado na primeira
+        consulta e mantido pelas alterações seguintes, e custa tempo
+        proporcional ao número de nodos encontrados. Apenas quando
+        'attrValue' é o valor padrão do atributo todos os nodos são
+        percorridos, em busca dos que não possuem valor.
+        """
+        return self.getElemsByAttr(MultiGraph.SCOPE_NODE, attrName, attrValue)
+
+    def getEdgesByAttr(self, attrName, attrValue):
+        """Lista das arestas cujo atributo 'attrName' vale 'attrValue'. Veja
+        getNodesByAttr.
+        """
+        return self.getElemsByAttr(MultiGraph.SCOPE_EDGE, attrName, attrValue)
+
+    def getElemsByAttr(self, scope, attrName, attrValue):
+        store = self.attrs[scope]
+        keys = store.index.keys
+        column = store.column(attrName)
+        elems = []
+        if column is not None:
+            try:
+                ids = column.inverted().get(attrValue, ())
+            except TypeError:
+                # Valores não hasheáveis: percorre a coluna
+                ids = [i for i in column.ids() if column.get(i) == attrValue]
+            elems = [keys[i] for i in ids]
+
+        spec = self.attrSpecs[scope].get(attrName)
+        if attrValue == (spec.default if spec is not None else None):
+            # Elementos sem valor também têm o valor padrão
+            has = column.has if column is not None else lambda i: False
+            elems.extend(key for i, key in enumerate(keys)
+                    if key is not None and not has(i))
+        return elems
+
+    def dropAttrIndex(self, scope, attrName):
+        """Descarta o índice invertido do atributo criado por getElemsByAttr,
+        liberando sua memória e o custo de mantê-lo.
+        """
+        column = self.attrs[scope].column(attrName)
+        if column is not None:
+            column.dropInverted()
+
     def setNodeAttrFromDict(self, attrName, attrDict, default=None,
             attrType=None):
-        self.nodeAttrs[attrName] = {}
-        for node in self.nodes():
-            value = attrDict.get(node, default)
-            if value is not None:
-                self.nodeAttrs[attrName][node] = value
+        """Define o atributo de todos os nodos a partir de um dicionário
+        nodo -> valor, usando 'default' para os nodos ausentes dele.
 
+        Se 'attrType' for fornecido é criado um AttrSpec esparso com o
+        padrão 'default': os valores iguais a ele não são guardados (veja
+        AttrSpec).
+        """
         if attrType is not None:
-            spec = AttrSpec(attrName, attrType)
+            spec = AttrSpec(attrName, attrType, sparse=True)
             spec.default = default
             self.addNodeAttrSpec(spec)
 
+        column = self.nodeAttrs.newColumn(attrName)
+        ids = self._nodeIndex.ids
+        for node in self.nodes():
+            value = attrDict.get(node, default)
+            if value is not None:
+                column.set(ids[node], value)
+
     def setEdgeAttrFromDict(self, attrName, attrDict, default=None,
             attrType=None):
-        self.edgeAttrs[attrName] = {}
+        """Mesmo que setNodeAttrFromDict para as arestas."""
+        if attrType is not None:
+            spec = AttrSpec(attrName, attrType, sparse=True)
+            spec.default = default
+            self.addEdgeAttrSpec(spec)
+
+        column = self.edgeAttrs.newColumn(attrName)
+        ids = self._edgeIndex.ids
         for edge in self.edges():
             value = attrDict.get(edge, default)
             if value is not None:
-                self.edgeAttrs[attrName][edge] = value
-
-        if attrType is not None:
-            spec = AttrSpec(attrName, attrType)
-            spec.default = None
-            self.addEdgeAttrSpec(spec)
+                column.set(ids[edge], value)
 
     def getNodeAttrNames(self):
         return set(self.nodeAttrs.keys())
@@ -662,16 +2234,90 @@ class MultiGraph(object):
     def getEdgeAttr(self, edge, attr, dflt=None):
         return self.getElemAttr(MultiGraph.SCOPE_EDGE, edge, attr, dflt)
 
+    def getEdgeAttrById(self, edgeId, attr, dflt=None):
+        """getEdgeAttr pelo identificador inteiro da aresta."""
+        if dflt is None:
+            spec = self.edgeAttrSpecs.get(attr)
+            if spec is not None:
+                dflt = spec.default
+        return self.edgeAttrs.getValueById(attr, edgeId, dflt)
+
+    def setEdgeAttrById(self, edgeId, attr, value):
+        """setEdgeAttr pelo identificador inteiro da aresta."""
+        edge = self.getEdgeById(edgeId)
+        if self._changeHandlers:
+            self._callChangeHandlers(MultiGraph.EVENT_SET_ATTR,
+                    MultiGraph.SCOPE_EDGE, edge, attr, value)
+        self.edgeAttrs.setValueById(attr, edgeId, value)
+
     def getElemAttr(self, scope, elem, attr, dflt=None):
         if dflt is None:
             spec = self.attrSpecs[scope].get(attr)
             if spec is not None:
                 dflt = spec.default
-        return self.attrs[scope].get(attr,{}).get(elem, dflt)
+        return self.attrs[scope].getValue(attr, elem, dflt)
 
     def setElemAttr(self, scope, elem, attr, value):
-        attrDict = self.attrs[scope].setdefault(attr, {})
-        attrDict[elem] = value
+        if self._changeHandlers:
+            self._callChangeHandlers(MultiGraph.EVENT_SET_ATTR, scope, elem,
+                    attr, value)
+        self.attrs[scope].setValue(attr, elem, value)
+
+    def getElemId(self, scope, elem):
+        """Identificador inteiro do elemento nas colunas de atributos
+        retornadas por getElemAttrColumn, ou None se o elemento não existir.
+        """
+        return self.attrs[scope].index.ids.get(elem)
+
+    def getElemById(self, scope, elemId):
+        """Elemento de identificador 'elemId' (None para posições vagas)."""
+        return self.attrs[scope].index.keys[elemId]
+
+    def getElemAttrColumn(self, scope, attr):
+        """Valores de um atributo em bloco, sem cópia.
+
+        :return: (values, present), vetores indexados pelo identificador de
+            cada elemento (getElemId): 'values' com os valores do atributo
+            (memoryview para atributos numéricos e booleanos com AttrSpec,
+            lista nos demais casos) e 'present' uma memoryview de bytes com
+            1 nos elementos que possuem valor. As visões não acompanham
+            elementos acrescentados depois de obtidas.
+        """
+        column = self.attrs[scope].ownColumn(attr)
+        if column is None:
+            raise KeyError(attr)
+        column.grow(self.attrs[scope].index.capacity())
+        return column.values(), column.presence()
+
+    def setElemAttrColumn(self, scope, attr, values, present=None):
+        """Define em bloco os valores de um atributo.
+
+        :param values: Sequência (memoryview, array, vetor numpy, lista)
+            indexada pelo identificador de cada elemento (getElemId).
+        :param present: Sequência com valor verdadeiro nos elementos que
+            possuem valor. Se None todos os elementos de 'values' recebem
+            valor.
+        """
+        store = self.attrs[scope]
+        if self._changeHandlers:
+            keys = store.index.keys
+            for i, value in enumerate(values):
+                if (present is None or present[i]) and keys[i] is not None:
+                    self._callChangeHandlers(MultiGraph.EVENT_SET_ATTR, scope,
+                            keys[i], attr, value)
+        store.setColumn(attr, values, present)
+
+    def getNodeAttrColumn(self, attr):
+        return self.getElemAttrColumn(MultiGraph.SCOPE_NODE, attr)
+
+    def setNodeAttrColumn(self, attr, values, present=None):
+        self.setElemAttrColumn(MultiGraph.SCOPE_NODE, attr, values, present)
+
+    def getEdgeAttrColumn(self, attr):
+        return self.getElemAttrColumn(MultiGraph.SCOPE_EDGE, attr)
+
+    def setEdgeAttrColumn(self, attr, values, present=None):
+        self.setElemAttrColumn(MultiGraph.SCOPE_EDGE, attr, values, present)
 
     def elements(self, scope):
         if scope == MultiGraph.SCOPE_NODE:
@@ -690,6 +2336,10 @@ class MultiGraph(object):
     def addAggregator(self, scope, name, initValue=None):
         """Adiciona um novo agregador zerado ao grafo.
 
+        Os agregadores de todos os elementos do escopo ficam em uma
+        aggregate.AggregatorColumn indexada pelo identificador do elemento
+        (getElemId).
+
         Args:
             - scope: Escopo do agregador: SCOPE_EDGE ou SCOPE_NODE
             - name: Nome para o agregador
@@ -698,14 +2348,14 @@ class MultiGraph(object):
         if self.hasAggregator(scope, name):
             raise KeyError('Já existe agregador de nome {0}'.format(name))
 
-        aggrMap = {}
+        index = self.attrs[scope].index
+        column = AggregatorColumn(index.capacity())
 
-        self.aggregators[scope][name] = aggrMap
+        self.aggregators[scope][name] = column
 
         if initValue is not None:
-            for elem in self.elements(scope):
-                aggr = self.getElemAggregator(scope, elem, name)
-                aggr += initValue
+            for i in index.ids.values():
+                column.add(i, initValue)
 
     def removeAggregator(self, scope, name):
         if scope not in self.aggregators:
@@ -715,6 +2365,7 @@ class MultiGraph(object):
             return
 
         del self.aggregators[scope][name]
+        self._sharedAggregators.discard((scope, name))
 
     def createAggregatorFromAttribute(self, scope, attrName):
         """Cria um aggregador para os elementos do grafo que terá o mesmo nome
@@ -726,10 +2377,12 @@ class MultiGraph(object):
         """
 
         self.addAggregator(scope, attrName)
-        for elem in self.elements(scope):
-            v = self.getElemAttr(scope, elem, attrName)
-            aggr = self.getElemAggregator(scope, elem, attrName)
-            aggr += v
+        column = self.aggregators[scope][attrName]
+        store = self.attrs[scope]
+        spec = self.attrSpecs[scope].get(attrName)
+        dflt = spec.default if spec is not None else None
+        for i in store.index.ids.values():
+            column.add(i, store.getValueById(attrName, i, dflt))
 
     def getAggregator(self, scope, name):
         """Recupera o mapa de agregadores de nome 'name' para o escopo de
@@ -739,25 +2392,53 @@ class MultiGraph(object):
             scope: Escopo de elementos do grafo
             name: Nome do agregador
         Return:
-            Mapa de agregadores ou 'None' caso não exista
+            Mapa somente leitura de agregadores (aggregate.AggregatorView) ou
+            'None' caso não exista. Para alterar o agregador de um elemento
+            use getElemAggregator.
         """
-        return self.aggregators[scope].get(name)
+        column = self.aggregators[scope].get(name)
+        if column is None:
+            return None
+        return AggregatorView(self.attrs[scope].index, column)
 
     def getElemAggregator(self, scope, elem, name):
-        aggrMap = self.getAggregator(scope, name)
+        """NumericAggregator do elemento, criado vazio se ainda não
+        existir. 'aggr += valor' altera o agregador guardado no grafo.
+        """
+        column = self._ownAggregator(scope, name)
 
-        if aggrMap is None:
+        if column is None:
             raise KeyError(
                 'Aggregator "{0}" does not exists in scope "{1}"'.format(
                     name, scope))
 
-        return aggrMap.setdefault(elem,NumericAggregator())
+        i = self.attrs[scope].index.ids.get(elem)
+        if i is None:
+            raise KeyError(elem)
+
+        return column.aggregator(i)
+
+    def _ownAggregator(self, scope, name):
+        """AggregatorColumn do agregador para alteração (None se não
+        existir): uma coluna compartilhada com uma cópia de snapshot é antes
+        copiada.
+        """
+        column = self.aggregators[scope].get(name)
+        if column is not None and (scope, name) in self._sharedAggregators:
+            self._sharedAggregators.discard((scope, name))
+            column = self.aggregators[scope][name] = column.copy()
+        return column
+
+    def _discardAggregators(self, scope, i):
+        for name, column in self.aggregators[scope].items():
+            if column.has(i):
+                self._ownAggregator(scope, name).discard(i)
 
     def getAggregatorNames(self, scope):
         return set(self.aggregators[scope].keys())
 
     def createAttributesFromAggregator(self, scope, name, stats):
-        if not set(stats).isubsetof(NumericAggregator.STAT_SET):
+        if not set(stats).issubset(NumericAggregator.STAT_SET):
             raise ValueError('Invalid stats: {0}'.format(str(set(stats) -
                             NumericAggregator.STAT_SET)))
 
@@ -772,25 +2453,37 @@ class MultiGraph(object):
             statType = NumericAggregator.getStatType(stat)
             spec = AttrSpec(name+'_'+stat, statType)
             self.addAttrSpec(scope, spec)
-            for elem in self.elements(scope):
-                aggr = aggrMap.get(elem)
-                if aggr:
-                    v = getattr(aggr, stat)
-                self.setElemAttr(scope, elem, spec.name, v)
+            for elem, aggr in aggrMap.items():
+                self.setElemAttr(scope, elem, spec.name, getattr(aggr, stat))
 
     def classifyNodesRegularEquivalence(self, classAttr='class',
             preClassAttr=None, edgeClassAttr=None,
-            regularType=REGULAR_TOTAL, ctrlFunc=_trueFunc):
+            regularType=REGULAR_TOTAL, ctrlFunc=_trueFunc, worklist=False,
+            coarsest=False, parallel=False):
         """Cria um atributo de nodos que os particiona em classes de
         equivalência de uma equivalência regular.
 
         :param classAttr: Nome do atributo de nodos que conterá a classe de
         equivalência a que o nodo foi atribuído.
+        :param coarsest: Se True, a classificação final é calculada diretamente
+        por coarsestRegularPartition. Neste caso 'ctrlFunc' e 'worklist' são
+        ignorados.
+        :param parallel: Se True, a classificação final é calculada por
+        parallelRegularEquivalence. Neste caso 'ctrlFunc', 'worklist' e
+        'coarsest' são ignorados.
         """
 
-        classes = regularEquivalence(self, preClassAttr=preClassAttr,
-                edgeClassAttr=edgeClassAttr, regularType=regularType,
-                ctrlFunc=ctrlFunc)
+        if parallel:
+            classes = parallelRegularEquivalence(self,
+                    preClassAttr=preClassAttr, edgeClassAttr=edgeClassAttr,
+                    regularType=regularType)
+        elif coarsest:
+            classes = coarsestRegularPartition(self, preClassAttr=preClassAttr,
+                    edgeClassAttr=edgeClassAttr, regularType=regularType)
+        else:
+            classes = regularEquivalence(self, preClassAttr=preClassAttr,
+                    edgeClassAttr=edgeClassAttr, regularType=regularType,
+                    ctrlFunc=ctrlFunc, worklist=worklist)
         spec = AttrSpec(classAttr,'int')
         self.addNodeAttrSpec(spec)
         self.setNodeAttrFromDict(classAttr, classes)
@@ -860,60 +2553,64 @@ class MultiGraph(object):
 
         :return: Grafo gerado
         """
-        def nodeClassByAttr(node):
-            return self.getNodeAttr(node, nodeClassAttr, nodeClassDflt)
-
-        def nodeIdentity(node):
-            return node
-
-        def edgeClassByAttr(edge):
-            return self.getEdgeAttr(edge, edgeClassAttr, edgeClassDflt)
-
-        def edgeClassByRelation(edge):
-            return edge[2]
-
+        # Construção em uma única passada sobre os nodos e uma sobre as
+        # arestas: a classe de cada nodo é obtida uma única vez e as
+        # estatísticas de fullMorphismStats são acumuladas junto com a
+        # adjacência do grafo gerado
         if nodeClassAttr is not None:
-            nodeClass = nodeClassByAttr
+            nodeClasses = {node: self.getNodeAttr(node, nodeClassAttr,
+                    nodeClassDflt) for node in self.nodes()}
         else:
-            nodeClass = nodeIdentity
+            nodeClasses = {node: node for node in self.nodes()}
 
         if edgeClassAttr is not None:
-            edgeClass = edgeClassByAttr
             relationAttr = edgeClassAttr
         else:
-            edgeClass = edgeClassByRelation
             relationAttr = 'relation'
 
-        newGraph = MultiGraph()
-
-        nodeAggrNames = self.getAggregatorNames(self.SCOPE_NODE)
-        edgeAggrNames = self.getAggregatorNames(self.SCOPE_EDGE)
-
-        for name in nodeAggrNames:
-            newGraph.addAggregator(self.SCOPE_NODE, name)
-        for name in edgeAggrNames:
-            newGraph.addAggregator(self.SCOPE_EDGE, name)
+        nodeHits = {}
+        for newNode in nodeClasses.values():
+            nodeHits[newNode] = nodeHits.get(newNode, 0) + 1
 
-        for node in self.nodes():
-            newNode = nodeClass(node)
-            newGraph.addNode(newNode)
-
-            for aggr in nodeAggrNames:
-                v = self.getElemAggregator(self.SCOPE_NODE, node, aggr)
-                vnew = newGraph.getElemAggregator(self.SCOPE_NODE, newNode,
-                        aggr)
-                vnew += v
+        # Arestas e suas imagens, guardadas apenas se houver agregadores
+        aggrEdges = [] if self.getAggregatorNames(self.SCOPE_EDGE) else None
+        aggrImages = []
 
+        edgeHits = {}
+        edgeSrcSets = {}
+        edgeTgtSets = {}
+        getEdgeAttr = self.getEdgeAttr
         for edge in self.edges():
             src, tgt, rel = edge
-            newEdge = (nodeClass(src), nodeClass(tgt), edgeClass(edge))
-            newGraph.addEdge(newEdge[0], newEdge[1], newEdge[2])
+            if edgeClassAttr is not None:
+                rel = getEdgeAttr(edge, edgeClassAttr, edgeClassDflt)
+            newEdge = (nodeClasses[src], nodeClasses[tgt], rel)
+
+            hits = edgeHits.get(newEdge)
+            if hits is None:
+                edgeHits[newEdge] = 1
+                edgeSrcSets[newEdge] = {src}
+                edgeTgtSets[newEdge] = {tgt}
+            else:
+                edgeHits[newEdge] = hits + 1
+                edgeSrcSets[newEdge].add(src)
+                edgeTgtSets[newEdge].add(tgt)
+
+            if aggrEdges is not None:
+                aggrEdges.append(edge)
+                aggrImages.append(newEdge)
+
+        # Mesma ordem de inserção de nodos e arestas de addNode e addEdge
+        # sobre os elementos originais: a da primeira ocorrência
+        newGraph = MultiGraph()
+        newGraph.addNodesFrom(nodeHits)
+        newGraph.addEdgesFrom(edgeHits)
 
-            for aggr in edgeAggrNames:
-                v = self.getElemAggregator(self.SCOPE_EDGE, edge, aggr)
-                vnew = newGraph.getElemAggregator(self.SCOPE_EDGE, newEdge,
-                        aggr)
-                vnew += v
+        _propagateAggregators(self, newGraph, self.SCOPE_NODE,
+                nodeClasses.keys(), nodeClasses.values())
+        if aggrEdges is not None:
+            _propagateAggregators(self, newGraph, self.SCOPE_EDGE, aggrEdges,
+                    aggrImages)
 
         if nodeClassAttr is not None:
             spec = self.getNodeAttrSpec(nodeClassAttr)
@@ -925,65 +2622,12 @@ class MultiGraph(object):
         # TODO: poderíamos gerar nomes que garantissem que não entrarão em
         # conflito com algum nome de atrinuto fornecido.
 
-        spec = AttrSpec(relationAttr, 'string')
-        if spec is not None:
-            newGraph.addEdgeAttrSpec(spec)
-        for edge in newGraph.edges():
-            newGraph.setEdgeAttr(edge, relationAttr, str(edge[2]))
-
         # Estatísticas de regularidade
-        nodeHits, edgeHits, edgeSrcHits, edgeTgtHits = fullMorphismStats(self,
-                nodeClass, edgeClass)
-
-        if countPrefix:
-            newGraph.setNodeAttrFromDict(countPrefix+'_node', nodeHits,
-                    default=0, attrType=int)
-            newGraph.setEdgeAttrFromDict(countPrefix+'_src', edgeSrcHits,
-                    default=0, attrType=int)
-            newGraph.setEdgeAttrFromDict(countPrefix+'_tgt', edgeTgtHits,
-                    default=0, attrType=int)
-            newGraph.setEdgeAttrFromDict(countPrefix+'_edge', edgeHits,
-                    default=0, attrType=int)
-
-        if regIdxPrefix:
-            preStats = calcPreRegIdxStats(nodeHits, edgeHits, edgeSrcHits,
-                    edgeTgtHits)
-
-            regIdx = calcEdgeRegIdx(preStats)
-            attrMap = {e:v.ri for e,v in regIdx.items()}
-            newGraph.setEdgeAttrFromDict(regIdxPrefix, attrMap, default=0,
-                    attrType=float)
-            attrMap = {e:v.sri for e,v in regIdx.items()}
-            newGraph.setEdgeAttrFromDict(regIdxPrefix+'_src', attrMap,
-                    default=0, attrType=float)
-            attrMap = {e:v.tri for e,v in regIdx.items()}
-            newGraph.setEdgeAttrFromDict(regIdxPrefix+'_tgt', attrMap,
-                    default=0, attrType=float)
-
-            regIdx = calcGraphRegIdx(preStats)
-            spec = AttrSpec(regIdxPrefix, float, 0.0)
-            newGraph.addGraphAttrSpec(spec)
-            newGraph.setGraphAttr(spec.name, regIdx.ri)
-            spec = AttrSpec(regIdxPrefix+'_src', float, 0.0)
-            newGraph.addGraphAttrSpec(spec)
-            newGraph.setGraphAttr(spec.name, regIdx.sri)
-            spec = AttrSpec(regIdxPrefix+'_tgt', float, 0.0)
-            newGraph.addGraphAttrSpec(spec)
-            newGraph.setGraphAttr(spec.name, regIdx.tri)
-
-            regIdx = calcNodeRegIdx(nodeHits, preStats)
-            attrMap = {n:v.ri for n,v in regIdx.items()}
-            newGraph.setNodeAttrFromDict(regIdxPrefix, attrMap, default=0.0,
-                    attrType=float)
-            attrMap = {n:v.nri for n,v in regIdx.items()}
-            newGraph.setNodeAttrFromDict(regIdxPrefix+'_node', attrMap,
-                    default=0.0, attrType=float)
-            attrMap = {n:v.sri for n,v in regIdx.items()}
-            newGraph.setNodeAttrFromDict(regIdxPrefix+'_src', attrMap,
-                    default=0.0, attrType=float)
-            attrMap = {n:v.tri for n,v in regIdx.items()}
-            newGraph.setNodeAttrFromDict(regIdxPrefix+'_tgt', attrMap,
-                    default=0.0, attrType=float)
+        edgeSrcHits = {edge: len(srcs) for edge, srcs in edgeSrcSets.items()}
+        edgeTgtHits = {edge: len(tgts) for edge, tgts in edgeTgtSets.items()}
+        _setQuotientAttrs(newGraph, relationAttr,
+                (nodeHits, edgeHits, edgeSrcHits, edgeTgtHits), countPrefix,
+                regIdxPrefix)
 
         return newGraph
 
@@ -1082,8 +2726,21 @@ class AttrSpec(object):
     VALID_TYPES = ('float','double','int','long','boolean','string')
     NUMERIC_TYPES = ('float','double','int','long')
 
-    def __init__(self, attr_name, attr_type, default=None):
+    def __init__(self, attr_name, attr_type, default=None, sparse=False):
+        """
+        Args:
+            - attr_name: Nome do atributo.
+            - attr_type: Tipo do atributo (um de VALID_TYPES ou um tipo
+                  Python).
+            - [default]: Valor do atributo nos elementos sem valor.
+            - [sparse]: Se verdadeiro, e houver valor padrão, os valores
+                  iguais ao padrão não são guardados e os demais ficam em
+                  uma coluna esparsa enquanto forem poucos (módulo
+                  attrStore). Indicado para atributos que quase sempre têm o
+                  valor padrão.
+        """
         self.name = attr_name
+        self.sparse = sparse
 
         if isinstance(attr_type, str):
             self.type = attr_type
@@ -1167,7 +2824,136 @@ def _computeAggregateFromSums(attr, specList, attrDicts, counts, sums, sumSqs):
             attrDicts[attrNameMean][key] = mean
             attrDicts[attrNameStdev][key] = stdev
 
-def aggregateClassAttr(gOri, nodeClassAttr=None, edgeClassAttr=None, nodeAttrs=None, edgeAttrs=None):
+def _propagateAggregators(g, newGraph, scope, elems, images):
+    """Cria em 'newGraph' os agregadores de 'g' do escopo fornecido,
+    acumulando o de cada elemento elems[k] de 'g' no de sua imagem images[k]
+    em 'newGraph' com AggregatorColumn.scatterMerge, uma coluna por vez.
+    """
+    names = g.getAggregatorNames(scope)
+    if not names:
+        return
+
+    sourceIds = None
+    ids = newGraph.attrs[scope].index.ids
+    groupIds = [ids[elem] for elem in images]
+    for name in names:
+        source = g.getAggregator(scope, name)
+        if sourceIds is None:
+            ids = source.index.ids
+            sourceIds = [ids[elem] for elem in elems]
+        newGraph.addAggregator(scope, name)
+        newGraph.getAggregator(scope, name).column.scatterMerge(
+                source.column, sourceIds, groupIds)
+
+def _setQuotientAttrs(newGraph, relationAttr, stats, countPrefix=None,
+        regIdxPrefix=None):
+    """Cria no grafo imagem 'newGraph' o atributo de relação das arestas e os
+    atributos de contagem e de índice de regularidade de
+    MultiGraph.spawnFromClassAttributes, a partir das estatísticas 'stats'
+    de fullMorphismStats.
+    """
+    spec = AttrSpec(relationAttr, 'string')
+    if spec is not None:
+        newGraph.addEdgeAttrSpec(spec)
+    for edge in newGraph.edges():
+        newGraph.setEdgeAttr(edge, relationAttr, str(edge[2]))
+
+    nodeHits, edgeHits, edgeSrcHits, edgeTgtHits = stats
+
+    if countPrefix:
+        newGraph.setNodeAttrFromDict(countPrefix+'_node', nodeHits,
+                default=0, attrType=int)
+        newGraph.setEdgeAttrFromDict(countPrefix+'_src', edgeSrcHits,
+                default=0, attrType=int)
+        newGraph.setEdgeAttrFromDict(countPrefix+'_tgt', edgeTgtHits,
+                default=0, attrType=int)
+        newGraph.setEdgeAttrFromDict(countPrefix+'_edge', edgeHits,
+                default=0, attrType=int)
+
+    if regIdxPrefix:
+        preStats = calcPreRegIdxStats(nodeHits, edgeHits, edgeSrcHits,
+                edgeTgtHits)
+
+        regIdx = calcEdgeRegIdx(preStats)
+        for field, suffix in enumerate(('', '_src', '_tgt')):
+            newGraph.setEdgeAttrFromDict(regIdxPrefix+suffix,
+                    _FieldView(regIdx, field), default=0.0, attrType=float)
+
+        regIdx = calcGraphRegIdx(preStats)
+        for value, suffix in zip(regIdx, ('', '_src', '_tgt')):
+            spec = AttrSpec(regIdxPrefix+suffix, float, 0.0)
+            newGraph.addGraphAttrSpec(spec)
+            newGraph.setGraphAttr(spec.name, value)
+
+        regIdx = calcNodeRegIdx(nodeHits, preStats)
+        for field, suffix in enumerate(('', '_node', '_src', '_tgt')):
+            newGraph.setNodeAttrFromDict(regIdxPrefix+suffix,
+                    _FieldView(regIdx, field), default=0.0, attrType=float)
+
+class _FieldView(object):
+    """Visão de um campo dos namedtuples de um dicionário, usada para
+    fornecer um campo a setEdgeAttrFromDict e setNodeAttrFromDict sem criar
+    um dicionário por campo.
+    """
+
+    __slots__ = ('_tuples', '_field')
+
+    def __init__(self, tuples, field):
+        self._tuples = tuples
+        self._field = field
+
+    def __getitem__(self, key):
+        return self._tuples[key][self._field]
+
+    def get(self, key, default=None):
+        value = self._tuples.get(key)
+        if value is None:
+            return default
+        return value[self._field]
+
+def graphFromMorphismStats(nodeHits, edgeHits, edgeSrcHits, edgeTgtHits,
+        nodeClassAttr=None, relationAttr='relation', countPrefix=None,
+        regIdxPrefix=None, nodeClassSpec=None):
+    """Cria o grafo imagem de um homomorfismo a partir das suas estatísticas,
+    sem percorrer o grafo domínio. O grafo gerado é o mesmo de
+    MultiGraph.spawnFromClassAttributes, exceto pelos agregadores, que não são
+    copiados.
+
+    :param nodeHits, edgeHits, edgeSrcHits, edgeTgtHits: Estatísticas como
+        calculadas por fullMorphismStats.
+    :param nodeClassAttr: Se não for None, atributo de nodo do grafo gerado
+        que recebe a própria classe de cada nodo.
+    :param relationAttr: Atributo de aresta que recebe a classe de cada
+        aresta.
+    :param countPrefix, regIdxPrefix: Como em spawnFromClassAttributes.
+    :param nodeClassSpec: AttrSpec do atributo 'nodeClassAttr' no grafo
+        domínio, acrescentado ao grafo gerado como em
+        spawnFromClassAttributes. Se None, o atributo fica sem AttrSpec, em
+        uma coluna de objetos.
+
+    :return: Grafo gerado
+    """
+    newGraph = MultiGraph()
+
+    for node in nodeHits:
+        newGraph.addNode(node)
+    for src, tgt, rel in edgeHits:
+        newGraph.addEdge(src, tgt, rel)
+
+    if nodeClassAttr is not None:
+        if nodeClassSpec is not None:
+            newGraph.addNodeAttrSpec(nodeClassSpec)
+        for node in newGraph.nodes():
+            newGraph.setNodeAttr(node, nodeClassAttr, node)
+
+    _setQuotientAttrs(newGraph, relationAttr,
+            (nodeHits, edgeHits, edgeSrcHits, edgeTgtHits), countPrefix,
+            regIdxPrefix)
+
+    return newGraph
+
+def aggregateClassAttr(gOri, nodeClassAttr=None, edgeClassAttr=None, nodeAttrs=None, edgeAttrs=None,
+        distinctCounter=None):
     """Cria dados agregados de atributos agrupados pelos valores dos atributos
     classificadores de nodos e arestas fornecidos.
 
@@ -1175,6 +2961,10 @@ def aggregateClassAttr(gOri, nodeClassAttr=None, edgeClassAttr=None, nodeAttrs=N
     :param edgeClassAttr: Atributo de aresta usado para classificar as arestas.
     :param nodeAttrs: Lista dos atributos de nodos que devem ser agregados.
     :param edgeAttrs: Lista dos atributos de arestas que devem ser agregados.
+    :param distinctCounter: Classe dos contadores de nodos distintos usados
+        nos atributos '_srcCount' e '_tgtCount', como em fullMorphismStats.
+        Se fornecida, são gerados também os atributos '_srcCountErr' e
+        '_tgtCountErr' com o erro padrão de cada contagem.
 
     :return: (attrNodes, attrEdges, specNodes, specEdges), onde:
 
@@ -1198,9 +2988,9 @@ def aggregateClassAttr(gOri, nodeClassAttr=None, edgeClassAttr=None, nodeAttrs=N
         nodeClassAttr='node'
 
     if edgeClassAttr is not None:
-        edgeRelFun = lambda e: gOri.getEdgeAttr(e, edgeClassAttr)
+        edgeRelFun = lambda i, e: gOri.getEdgeAttrById(i, edgeClassAttr)
     else:
-        edgeRelFun = lambda e: e[2]
+        edgeRelFun = lambda i, e: e[2]
         edgeClassAttr = 'edge'
 
     if nodeAttrs == None:
@@ -1208,8 +2998,12 @@ def aggregateClassAttr(gOri, nodeClassAttr=None, edgeClassAttr=None, nodeAttrs=N
     if edgeAttrs == None:
         edgeAttrs = []
 
-    edgeSrcSet = defaultdict(set)
-    edgeTgtSet = defaultdict(set)
+    if distinctCounter is None:
+        edgeSrcSet = defaultdict(set)
+        edgeTgtSet = defaultdict(set)
+    else:
+        edgeSrcSet = defaultdict(distinctCounter)
+        edgeTgtSet = defaultdict(distinctCounter)
     nodeClassCounts = Counter()
     edgeClassCounts = Counter()
     nodeAttrCounts = defaultdict(Counter)
@@ -1219,8 +3013,10 @@ def aggregateClassAttr(gOri, nodeClassAttr=None, edgeClassAttr=None, nodeAttrs=N
     edgeAttrSums = defaultdict(Counter)
     edgeAttrSumSqs = defaultdict(Counter)
 
+    nodeClassOf = {}
     for node in gOri.nodes():
         nodeClass = nodeClassFun(node)
+        nodeClassOf[node] = nodeClass
         nodeClassCounts[nodeClass] += 1
         for attr in nodeAttrs:
             value = gOri.getNodeAttr(node, attr)
@@ -1229,16 +3025,17 @@ def aggregateClassAttr(gOri, nodeClassAttr=None, edgeClassAttr=None, nodeAttrs=N
                 nodeAttrSums[attr][nodeClass] += value
                 nodeAttrSumSqs[attr][nodeClass] += value * value
 
-    for (src, tgt, rel) in gOri.edges():
-        srcClass = nodeClassFun(src)
-        tgtClass = nodeClassFun(tgt)
-        relClass = edgeRelFun((src, tgt, rel))
+    for edgeId in gOri.edgeIds():
+        src, tgt, rel = edge = gOri.getEdgeById(edgeId)
+        srcClass = nodeClassOf[src]
+        tgtClass = nodeClassOf[tgt]
+        relClass = edgeRelFun(edgeId, edge)
         edgeClass = (srcClass, tgtClass, relClass)
         edgeClassCounts[edgeClass] += 1
         edgeSrcSet[edgeClass].add(src)
         edgeTgtSet[edgeClass].add(tgt)
         for attr in edgeAttrs:
-            value = gOri.getEdgeAttr((src, tgt, rel), attr)
+            value = gOri.getEdgeAttrById(edgeId, attr)
             if value is not None:
                 edgeAttrCounts[attr][edgeClass] += 1
                 edgeAttrSums[attr][edgeClass] += value
@@ -1264,17 +3061,26 @@ def aggregateClassAttr(gOri, nodeClassAttr=None, edgeClassAttr=None, nodeAttrs=N
     edgeSpecs.append(AttrSpec(attrName, 'int',0))
     edgeAttrDicts[attrName] = dict(edgeClassCounts)
 
+    countErrors = {}
+    srcCounts, tgtCounts = _distinctCounts(edgeSrcSet, edgeTgtSet,
+            countErrors)
+
     attrName = edgeClassAttr + '_srcCount'
     edgeSpecs.append(AttrSpec(attrName, 'int',0))
-    edgeAttrDicts[attrName] = {}
-    for edge, s in edgeSrcSet.items():
-        edgeAttrDicts[attrName][edge] = len(s)
+    edgeAttrDicts[attrName] = srcCounts
 
     attrName = edgeClassAttr + '_tgtCount'
     edgeSpecs.append(AttrSpec(attrName, 'int',0))
-    edgeAttrDicts[attrName] = {}
-    for edge, s in edgeTgtSet.items():
-        edgeAttrDicts[attrName][edge] = len(s)
+    edgeAttrDicts[attrName] = tgtCounts
+
+    if distinctCounter is not None:
+        attrName = edgeClassAttr + '_srcCountErr'
+        edgeSpecs.append(AttrSpec(attrName, 'double',0.0))
+        edgeAttrDicts[attrName] = {e: err.ns for e, err in countErrors.items()}
+
+        attrName = edgeClassAttr + '_tgtCountErr'
+        edgeSpecs.append(AttrSpec(attrName, 'double',0.0))
+        edgeAttrDicts[attrName] = {e: err.nt for e, err in countErrors.items()}
 
     for attr in edgeAttrs:
         _computeAggregateFromSums(attr, edgeSpecs, edgeAttrDicts, edgeAttrCounts,
@@ -1304,6 +3110,9 @@ def weaklyConnectedComponents(g):
 
     :return: Dicionário mapeando cada nodo à sua componente.
     """
+    if hasattr(g, 'edgeArrays'):
+        return _frozenWeaklyConnectedComponents(g)
+
     components = {}
     stack = []
     compNum = 0
@@ -1327,6 +3136,32 @@ def weaklyConnectedComponents(g):
 
     return components
 
+def _frozenWeaklyConnectedComponents(frozen):
+    """weaklyConnectedComponents sobre os vetores de um FrozenMultiGraph."""
+    numNodes = frozen.getNumNodes()
+    comp = [0] * numNodes
+    compNum = 0
+    adjs = ((frozen.outOffsets, frozen.outNbr),
+            (frozen.inOffsets, frozen.inNbr))
+
+    for start in range(numNodes):
+        if comp[start]:
+            continue
+
+        compNum += 1
+        comp[start] = compNum
+        stack = [start]
+        while stack:
+            u = stack.pop()
+            for offsets, nbr in adjs:
+                for k in range(offsets[u], offsets[u + 1]):
+                    v = nbr[k]
+                    if not comp[v]:
+                        comp[v] = compNum
+                        stack.append(v)
+
+    return dict(zip(frozen.nodeList, comp))
+
 def _createXmlKeyForAttrs(root, attrNames, attrSpecs, attrIds, forElem):
     for attr in attrNames:
         attrSpec = attrSpecs[attr]
@@ -1409,12 +3244,14 @@ def writeGraphml(mGraph, filePath, encoding="UTF-8"):
         node.set('id', nodeIDs[vert])
         _createXmlDataForAttrs(node, nodeAttrs, mGraph.nodeAttrSpecs,
                 nodeAttrIDs, lambda a, d: mGraph.getNodeAttr(vert, a, d))
-    for v1, v2, rel in mGraph.edges():
+    for edgeId in mGraph.edgeIds():
+        v1, v2, rel = mGraph.getEdgeById(edgeId)
         edge = ET.SubElement(graph, 'edge')
         edge.set('source', nodeIDs[v1])
         edge.set('target', nodeIDs[v2])
         _createXmlDataForAttrs(edge, edgeAttrs, mGraph.edgeAttrSpecs,
-                edgeAttrIDs, lambda a, d: mGraph.getEdgeAttr((v1,v2,rel), a, d))
+                edgeAttrIDs,
+                lambda a, d: mGraph.getEdgeAttrById(edgeId, a, d))
 
     tree = ET.ElementTree(root)
     tree.write(filePath, encoding=encoding, xml_declaration=True, method="xml")
@@ -1432,7 +3269,7 @@ def loadGraphml(fileName, relationAttr=EDGE_RELATION_ATTR):
         attrName = xkey.get('attr.name')
         attrType = xkey.get('attr.type')
         if attrType in AttrSpec.VALID_TYPES:
-            attrSpec = AttrSpec(attrName, attrType)
+            attrSpec = AttrSpec(attrName, attrType, sparse=True)
             if xkey.get('for') == 'edge':
                 edgeAttrs[xkey.get('id')] = attrSpec
                 if attrSpec.name == relationAttr:
@@ -1449,6 +3286,17 @@ def loadGraphml(fileName, relationAttr=EDGE_RELATION_ATTR):
     xgraph = xtree.find('g:graph', namespaces)
     graph = MultiGraph()
 
+    # As especificações são criadas antes dos valores para que as colunas
+    # de atributos já nasçam com o tipo correto
+    for attrSpec in graphAttrs.values():
+        graph.addGraphAttrSpec(attrSpec)
+
+    for attrSpec in nodeAttrs.values():
+        graph.addNodeAttrSpec(attrSpec)
+
+    for attrSpec in edgeAttrs.values():
+        graph.addEdgeAttrSpec(attrSpec)
+
     for xdata in xgraph.iterfind('g:data', namespaces):
         key = xdata.get('key')
         if key in graphAttrs:
@@ -1457,57 +3305,45 @@ def loadGraphml(fileName, relationAttr=EDGE_RELATION_ATTR):
             if value != attrSpec.default:
                 graph.setGraphAttr(attrSpec.name, value)
 
-    for xnode in xgraph.iterfind('g:node', namespaces):
-        nid = xnode.get('id')
-        graph.addNode(nid)
-        for key in nodeAttrs.keys():
-            if nodeAttrs[key].default is not None:
-                attrSpec = nodeAttrs[key]
-                graph.setNodeAttr(nid, attrSpec.name,
-                    attrSpec.default)
-        for xdata in xnode.iterfind('g:data', namespaces):
-            key = xdata.get('key')
-            if key in nodeAttrs:
-                attrSpec = nodeAttrs[key]
-                graph.setNodeAttr(nid, attrSpec.name,
-                    attrSpec.fromStr(xdata.text))
-
-    for xedge in xgraph.iterfind('g:edge', namespaces):
+    # Os nodos e as arestas são lidos em colunas (uma lista por atributo,
+    # paralela à lista de elementos) e inseridos em bloco. Elementos sem
+    # <data> para uma chave ficam sem valor (None), e a leitura recai no
+    # <default> da chave; os AttrSpecs esparsos também descartam os valores
+    # lidos iguais ao padrão.
+    def readElems(xelems, attrs, elemKey):
+        elems = []
+        columns = {key: [] for key in attrs}
+        for xelem in xelems:
+            values = {}
+            for xdata in xelem.iterfind('g:data', namespaces):
+                key = xdata.get('key')
+                if key in attrs:
+                    values[key] = attrs[key].fromStr(xdata.text)
+            elems.append(elemKey(xelem, values))
+            for key, column in columns.items():
+                column.append(values.get(key))
+        return elems, {attrs[key].name: column
+                for key, column in columns.items()}
+
+    nodes, nodeColumns = readElems(xgraph.iterfind('g:node', namespaces),
+            nodeAttrs, lambda xnode, values: xnode.get('id'))
+    graph.addNodesFrom(nodes, nodeColumns)
+
+    # Sem atributo de relação, arestas paralelas recebem relações 0, 1, ...
+    parallelCount = Counter()
+    def edgeKey(xedge, values):
         src = xedge.get('source')
         tgt = xedge.get('target')
-        rel = None
         if relationKey is not None:
-            attrSpec = edgeAttrs[relationKey]
-            rel = attrSpec.default
-            xdata = xedge.find("g:data[@key='"+relationKey+"']", namespaces)
-            if xdata is not None:
-                rel = attrSpec.fromStr(xdata.text)
+            rel = values.get(relationKey, edgeAttrs[relationKey].default)
         else:
-            rel = 0
-            while graph.hasEdge(src,tgt,rel):
-                rel += 1
-        edge = (src, tgt, rel)
-        graph.addEdge(src, tgt, rel)
-        for key in edgeAttrs:
-            if edgeAttrs[key].default is not None:
-                attrSpec = edgeAttrs[key]
-                graph.setEdgeAttr(edge, attrSpec.name,
-                    attrSpec.default)
-        for xdata in xedge.iterfind('g:data', namespaces):
-            key = xdata.get('key')
-            if key in edgeAttrs:
-                attrSpec = edgeAttrs[key]
-                graph.setEdgeAttr(edge, attrSpec.name,
-                    attrSpec.fromStr(xdata.text))
-
-    for attrSpec in graphAttrs.values():
-        graph.addGraphAttrSpec(attrSpec)
+            rel = parallelCount[(src, tgt)]
+            parallelCount[(src, tgt)] += 1
+        return (src, tgt, rel)
 
-    for attrSpec in nodeAttrs.values():
-        graph.addNodeAttrSpec(attrSpec)
-
-    for attrSpec in edgeAttrs.values():
-        graph.addEdgeAttrSpec(attrSpec)
+    edges, edgeColumns = readElems(xgraph.iterfind('g:edge', namespaces),
+            edgeAttrs, edgeKey)
+    graph.addEdgesFrom(edges, edgeColumns)
 
     return graph
 
@@ -0,0 +1,447 @@
+# coding: utf-8
+"""Visões de subgrafos de um graph.MultiGraph sem cópia.
+
+Um SubgraphView seleciona nodos e arestas de um grafo pai por um conjunto de
+relações, por predicados de nodo e de aresta ou por valores de atributos, e
+oferece a API de leitura de MultiGraph sobre esta seleção. A estrutura e os
+atributos do pai não são copiados: cada consulta é respondida filtrando o pai
+no momento da chamada, de forma que a visão acompanha as alterações feitas
+nele.
+
+Atributos escritos por meio da visão (setNodeAttr, setNodeAttrFromDict,
+addNodeAttrSpec, ...) ficam em uma camada própria da visão, que usa os
+mesmos identificadores de elementos do pai e tem precedência sobre os
+atributos de mesmo nome do pai. O grafo pai nunca é alterado pela visão.
+
+Algoritmos que usam apenas a API de leitura (regularEquivalence,
+fullMorphismStats, weaklyConnectedComponents, writeGraphml, ...) e os métodos
+spawnFromClassAttributes e classifyNodesRegularEquivalence funcionam sobre a
+visão. materialize() cria explicitamente um MultiGraph independente.
+
+Exemplo::
+
+    b = g.subgraphView(edgeAttrs={'relationship': 'Liker'})
+    classes = gr.regularEquivalence(b, edgeClassAttr='relationship')
+    quociente = b.spawnFromClassAttributes(nodeClassAttr='class')
+"""
+
+from collections import ChainMap
+from itertools import chain
+
+import graph as gr
+from attrStore import AttrStore
+
+# Valor padrão que indica atributo ausente
+_MISSING = object()
+
+class SubgraphView(object):
+    """Subgrafo de um MultiGraph calculado sob demanda.
+
+    Um nodo pertence à visão se satisfaz o filtro de nodos. Uma aresta
+    pertence à visão se sua relação está em 'relations', se satisfaz o filtro
+    de arestas e se seus dois extremos pertencem à visão.
+    """
+
+    SCOPE_NODE = gr.MultiGraph.SCOPE_NODE
+    SCOPE_EDGE = gr.MultiGraph.SCOPE_EDGE
+
+    def __init__(self, parent, relations=None, nodeFilter=None,
+            edgeFilter=None, nodeAttrs=None, edgeAttrs=None):
+        """
+        Args:
+            - parent: MultiGraph (ou outra visão) de onde os elementos são
+                  selecionados.
+            - [relations]: Coleção das relações das arestas mantidas. None
+                  mantém todas as relações.
+            - [nodeFilter]: Predicado nodeFilter(node) dos nodos mantidos.
+            - [edgeFilter]: Predicado edgeFilter((src, tgt, rel)) das arestas
+                  mantidas.
+            - [nodeAttrs]: Dicionário atributo -> valor. Mantém apenas os
+                  nodos com estes valores de atributo.
+            - [edgeAttrs]: Mesmo que 'nodeAttrs' para as arestas.
+        """
+        self.parent = parent
+        root = parent
+        while isinstance(root, SubgraphView):
+            root = root.parent
+        self._root = root
+        self._relations = None if relations is None else frozenset(relations)
+        self._nodeFilters = self._filters(parent.getNodeAttr, nodeFilter,
+                nodeAttrs)
+        self._edgeFilters = self._filters(parent.getEdgeAttr, edgeFilter,
+                edgeAttrs)
+
+        # Atributos escritos pela visão
+        self._ownNodeSpecs = {}
+        self._ownEdgeSpecs = {}
+        self._ownGraphAttrs = {}
+        self._ownNodeAttrs = AttrStore(root.nodeAttrs.index,
+                self._ownNodeSpecs)
+        self._ownEdgeAttrs = AttrStore(root.edgeAttrs.index,
+                self._ownEdgeSpecs)
+        self._own = {
+            self.SCOPE_NODE: self._ownNodeAttrs,
+            self.SCOPE_EDGE: self._ownEdgeAttrs
+        }
+
+        self.nodeAttrSpecs = ChainMap(self._ownNodeSpecs, parent.nodeAttrSpecs)
+        self.edgeAttrSpecs = ChainMap(self._ownEdgeSpecs, parent.edgeAttrSpecs)
+        self.graphAttrSpecs = ChainMap({}, parent.graphAttrSpecs)
+        self.graphAttrs = ChainMap(self._ownGraphAttrs, parent.graphAttrs)
+        self.nodeAttrs = ChainMap(self._ownNodeAttrs, parent.nodeAttrs)
+        self.edgeAttrs = ChainMap(self._ownEdgeAttrs, parent.edgeAttrs)
+        self.attrs = {
+            self.SCOPE_NODE: self.nodeAttrs,
+            self.SCOPE_EDGE: self.edgeAttrs
+        }
+        self.attrSpecs = {
+            self.SCOPE_NODE: self.nodeAttrSpecs,
+            self.SCOPE_EDGE: self.edgeAttrSpecs
+        }
+
+    @staticmethod
+    def _filters(getAttr, predicate, attrValues):
+        filters = []
+        if predicate is not None:
+            filters.append(predicate)
+        if attrValues:
+            items = list(attrValues.items())
+            filters.append(lambda elem: all(getAttr(elem, attr) == value
+                for attr, value in items))
+        return filters
+
+    def _keepNode(self, node):
+        return all(f(node) for f in self._nodeFilters)
+
+    def _keepEdge(self, src, tgt, rel):
+        if self._relations is not None and rel not in self._relations:
+            return False
+        if self._edgeFilters:
+            edge = (src, tgt, rel)
+            if not all(f(edge) for f in self._edgeFilters):
+                return False
+        if self._nodeFilters:
+            return self._keepNode(src) and self._keepNode(tgt)
+        return True
+
+    # Estrutura
+
+    def nodes(self):
+        if not self._nodeFilters:
+            return self.parent.nodes()
+        return [node for node in self.parent.nodes() if self._keepNode(node)]
+
+    def getNumNodes(self):
+        if not self._nodeFilters:
+            return self.parent.getNumNodes()
+        return len(self.nodes())
+
+    def hasNode(self, node):
+        return self.parent.hasNode(node) and self._keepNode(node)
+
+    def _relationsToScan(self, rel):
+        """Relações consultadas uma a uma no pai, ou None se a adjacência
+        completa do pai deve ser filtrada. As consultas por relação só
+        compensam quando o pai tem o índice por relação.
+        """
+        if rel is not None:
+            if self._relations is None or rel in self._relations:
+                return (rel,)
+            return ()
+        if self._relations is not None and self.parent.hasRelationIndex():
+            return self._relations
+        return None
+
+    def hasRelationIndex(self):
+        return self.parent.hasRelationIndex()
+
+    def edges(self, rel=None):
+        rels = self._relationsToScan(rel)
+        if rels is not None and not self._nodeFilters:
+            for r in rels:
+                for src, tgt, _ in self.parent.edges(r):
+                    if self._keepEdge(src, tgt, r):
+                        yield (src, tgt, r)
+            return
+        for node in self.nodes():
+            for tgt, r in self.outNeighboors(node, rel):
+                yield (node, tgt, r)
+
+    def getNumEdges(self, rel=None):
+        rels = self._relationsToScan(rel)
+        if (rels is not None and not self._nodeFilters
+                and not self._edgeFilters):
+            return sum(self.parent.getNumEdges(r) for r in rels)
+        return sum(1 for _ in self.edges(rel))
+
+    @property
+    def relations(self):
+        return {rel for _, _, rel in self.edges()}
+
+    def hasEdge(self, src, tgt, rel):
+        return (self.parent.hasEdge(src, tgt, rel)
+                and self._keepEdge(src, tgt, rel))
+
+    def outNeighboors(self, node, rel=None):
+        """outNeighboors(node) -> (tgt1, rel), (tgt2, rel), ...
+        """
+        rels = self._relationsToScan(rel)
+        if rels is None:
+            return ((tgt, r) for tgt, r in self.parent.outNeighboors(node)
+                    if self._keepEdge(node, tgt, r))
+        return ((tgt, r) for r in rels
+                for tgt, _ in self.parent.outNeighboors(node, r)
+                if self._keepEdge(node, tgt, r))
+
+    def inNeighboors(self, node, rel=None):
+        """inNeighboors(node) -> (src1, rel), (src2, rel), ...
+        """
+        rels = self._relationsToScan(rel)
+        if rels is None:
+            return ((src, r) for src, r in self.parent.inNeighboors(node)
+                    if self._keepEdge(src, node, r))
+        return ((src, r) for r in rels
+                for src, _ in self.parent.inNeighboors(node, r)
+                if self._keepEdge(src, node, r))
+
+    def neighboors(self, node, rel=None):
+        return chain(self.outNeighboors(node, rel),
+                self.inNeighboors(node, rel))
+
+    def outDegree(self, node, rel=None):
+        return sum(1 for _ in self.outNeighboors(node, rel))
+
+    def inDegree(self, node, rel=None):
+        return sum(1 for _ in self.inNeighboors(node, rel))
+
+    def edgeIds(self):
+        """Identificadores (os mesmos do pai) das arestas da visão."""
+        getEdgeById = self.parent.getEdgeById
+        return (i for i in self.parent.edgeIds()
+                if self._keepEdge(*getEdgeById(i)))
+
+    def getEdgeId(self, edge):
+        if not self.hasEdge(*edge):
+            return None
+        return self.parent.getEdgeId(edge)
+
+    def getEdgeById(self, edgeId):
+        return self.parent.getEdgeById(edgeId)
+
+    def elements(self, scope):
+        if scope == self.SCOPE_NODE:
+            return self.nodes()
+        elif scope == self.SCOPE_EDGE:
+            return self.edges()
+        else:
+            raise ValueError('Invalid scope {0}'.format(scope))
+
+    # Atributos
+
+    def getGraphAttrSpec(self, attrName):
+        return self.graphAttrSpecs.get(attrName)
+
+    def getNodeAttrSpec(self, attrName):
+        return self.nodeAttrSpecs.get(attrName)
+
+    def getEdgeAttrSpec(self, attrName):
+        return self.edgeAttrSpecs.get(attrName)
+
+    def getAttrSpec(self, scope, attrName):
+        return self.attrSpecs[scope].get(attrName)
+
+    def addGraphAttrSpec(self, attrSpec):
+        self.graphAttrSpecs[attrSpec.name] = attrSpec
+
+    def addNodeAttrSpec(self, attrSpec):
+        self._ownNodeSpecs[attrSpec.name] = attrSpec
+        self._ownNodeAttrs.retype(attrSpec.name)
+
+    def addEdgeAttrSpec(self, attrSpec):
+        self._ownEdgeSpecs[attrSpec.name] = attrSpec
+        self._ownEdgeAttrs.retype(attrSpec.name)
+
+    def getNodeAttrNames(self):
+        return set(self.nodeAttrs.keys())
+
+    def getEdgeAttrNames(self):
+        return set(self.edgeAttrs.keys())
+
+    def getGraphAttrNames(self):
+        return set(self.graphAttrs.keys())
+
+    def getGraphAttr(self, attr, dflt=None):
+        spec = self.graphAttrSpecs.get(attr)
+        if spec is not None and spec.default is not None:
+            dflt = spec.default
+        return self.graphAttrs.get(attr, dflt)
+
+    def setGraphAttr(self, attr, value):
+        self._ownGraphAttrs[attr] = value
+
+    def getElemAttr(self, scope, elem, attr, dflt=None):
+        if dflt is None:
+            spec = self.attrSpecs[scope].get(attr)
+            if spec is not None:
+                dflt = spec.default
+        store = self._own[scope]
+        if attr not in store:
+            return self.parent.getElemAttr(scope, elem, attr, dflt)
+        return store.getValue(attr, elem, dflt)
+
+    def setElemAttr(self, scope, elem, attr, value):
+        store = self._own[scope]
+        if attr not in store:
+            store.newColumn(attr)
+        store.setValue(attr, elem, value)
+
+    def getNodeAttr(self, node, attr, dflt=None):
+        return self.getElemAttr(self.SCOPE_NODE, node, attr, dflt)
+
+    def setNodeAttr(self, node, attr, value):
+        self.setElemAttr(self.SCOPE_NODE, node, attr, value)
+
+    def getEdgeAttr(self, edge, attr, dflt=None):
+        return self.getElemAttr(self.SCOPE_EDGE, edge, attr, dflt)
+
+    def setEdgeAttr(self, edge, attr, value):
+        self.setElemAttr(self.SCOPE_EDGE, edge, attr, value)
+
+    def getEdgeAttrById(self, edgeId, attr, dflt=None):
+        if attr not in self._ownEdgeAttrs:
+            return self.parent.getEdgeAttrById(edgeId, attr, dflt)
+        if dflt is None:
+            spec = self.edgeAttrSpecs.get(attr)
+            if spec is not None:
+                dflt = spec.default
+        return self._ownEdgeAttrs.getValueById(attr, edgeId, dflt)
+
+    def _attrValueSet(self, scope, attrName, default):
+        valueSet = set()
+        if attrName in self.attrs[scope]:
+            for elem in self.elements(scope):
+                value = self.getElemAttr(scope, elem, attrName)
+                if value is not None:
+                    valueSet.add(value)
+        if default is not None:
+            valueSet.add(default)
+        return valueSet
+
+    def getNodeAttrValueSet(self, attrName, default=None):
+        """Valores distintos do atributo nos nodos da visão."""
+        return self._attrValueSet(self.SCOPE_NODE, attrName, default)
+
+    def getEdgeAttrValueSet(self, attrName, default=None):
+        """Valores distintos do atributo nas arestas da visão."""
+        return self._attrValueSet(self.SCOPE_EDGE, attrName, default)
+
+    def getNodesByAttr(self, attrName, attrValue):
+        """Nodos da visão com o valor de atributo fornecido, como em
+        MultiGraph.getNodesByAttr.
+        """
+        return self.getElemsByAttr(self.SCOPE_NODE, attrName, attrValue)
+
+    def getEdgesByAttr(self, attrName, attrValue):
+        return self.getElemsByAttr(self.SCOPE_EDGE, attrName, attrValue)
+
+    def getElemsByAttr(self, scope, attrName, attrValue):
+        if (attrName in self._own[scope]
+                or attrName in self.attrSpecs[scope].maps[0]):
+            # Atributo da própria visão: percorre os elementos
+            return [elem for elem in self.elements(scope)
+                    if self.getElemAttr(scope, elem, attrName) == attrValue]
+        # Atributo do pai: usa o índice invertido do pai e filtra os
+        # elementos que pertencem à visão
+        elems = self.parent.getElemsByAttr(scope, attrName, attrValue)
+        if scope == self.SCOPE_NODE:
+            if not self._nodeFilters:
+                return elems
+            return [node for node in elems if self._keepNode(node)]
+        return [edge for edge in elems if self._keepEdge(*edge)]
+
+    def setNodeAttrFromDict(self, attrName, attrDict, default=None,
+            attrType=None):
+        """Como MultiGraph.setNodeAttrFromDict, na camada de atributos da
+        visão e apenas para os nodos da visão.
+        """
+        if attrType is not None:
+            spec = gr.AttrSpec(attrName, attrType, sparse=True)
+            spec.default = default
+            self.addNodeAttrSpec(spec)
+
+        column = self._ownNodeAttrs.newColumn(attrName)
+        ids = self._ownNodeAttrs.index.ids
+        for node in self.nodes():
+            value = attrDict.get(node, default)
+            if value is not None:
+                column.set(ids[node], value)
+
+    def setEdgeAttrFromDict(self, attrName, attrDict, default=None,
+            attrType=None):
+        """Mesmo que setNodeAttrFromDict para as arestas."""
+        if attrType is not None:
+            spec = gr.AttrSpec(attrName, attrType, sparse=True)
+            spec.default = default
+            self.addEdgeAttrSpec(spec)
+
+        column = self._ownEdgeAttrs.newColumn(attrName)
+        ids = self._ownEdgeAttrs.index.ids
+        for edge in self.edges():
+            value = attrDict.get(edge, default)
+            if value is not None:
+                column.set(ids[edge], value)
+
+    # Agregadores: somente leitura dos agregadores do pai
+
+    def getAggregatorNames(self, scope):
+        return self.parent.getAggregatorNames(scope)
+
+    def getAggregator(self, scope, name):
+        return self.parent.getAggregator(scope, name)
+
+    def getElemAggregator(self, scope, elem, name):
+        return self.parent.getElemAggregator(scope, elem, name)
+
+    # Métodos de MultiGraph que usam apenas a API acima
+    classifyNodesRegularEquivalence = \
+            gr.MultiGraph.classifyNodesRegularEquivalence
+    spawnFromClassAttributes = gr.MultiGraph.spawnFromClassAttributes
+    extractNodeFeatureVectors = gr.MultiGraph.extractNodeFeatureVectors
+    extractEdgeFeatureVectors = gr.MultiGraph.extractEdgeFeatureVectors
+
+    def subgraphView(self, relations=None, nodeFilter=None, edgeFilter=None,
+            nodeAttrs=None, edgeAttrs=None):
+        """Visão de um subgrafo desta visão (veja MultiGraph.subgraphView)."""
+        return SubgraphView(self, relations, nodeFilter, edgeFilter,
+                nodeAttrs, edgeAttrs)
+
+    def writeGraphml(self, filePath):
+        gr.writeGraphml(self, filePath)
+
+    def materialize(self):
+        """Cria um MultiGraph independente com os nodos, arestas e atributos
+        da visão.
+        """
+        g = gr.MultiGraph()
+        for node in self.nodes():
+            g.addNode(node)
+        for src, tgt, rel in self.edges():
+            g.addEdge(src, tgt, rel)
+
+        for spec in self.graphAttrSpecs.values():
+            g.addGraphAttrSpec(spec)
+        for attr in self.graphAttrs:
+            g.setGraphAttr(attr, self.graphAttrs[attr])
+
+        for scope in (self.SCOPE_NODE, self.SCOPE_EDGE):
+            for spec in self.attrSpecs[scope].values():
+                g.addAttrSpec(scope, spec)
+            store = g.attrs[scope]
+            for attr in self.attrs[scope].keys():
+                column = store.newColumn(attr)
+                for elem, i in store.index.items():
+                    value = self.getElemAttr(scope, elem, attr, _MISSING)
+                    if value is not _MISSING:
+                        column.set(i, value)
+
+        return g
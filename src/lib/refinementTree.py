@@ -0,0 +1,284 @@
+# coding: utf-8
+"""Armazenamento compacto de uma sequência de classificações em que cada
+classificação refina a anterior, como as iterações de
+graph.regularEquivalence.
+
+Em vez de um dicionário {nodo: classe} por iteração, guarda-se a classificação
+do primeiro nível em um vetor de inteiros e, para cada nível seguinte, apenas
+os índices dos nodos que mudaram de classe, suas novas classes e o mapa de
+classes novas para classes pais. Qualquer nível pode ser reconstruído sob
+demanda.
+
+Exemplo de uso como ctrlFunc de regularEquivalence::
+
+    tree = RefinementTree(g.nodes())
+    def ctrlFunc(i, classes, done, parents):
+        if not done:
+            tree.addLevel(classes, parents)
+        return True
+    gr.regularEquivalence(g, ctrlFunc=ctrlFunc, worklist=True)
+    tree.save('refinamento.pkl')
+
+refinementMorphismStats calcula as estatísticas do homomorfismo de todos os
+níveis com uma única passada pelas arestas do grafo.
+"""
+
+import pickle
+from array import array
+
+from regIdxTracker import RegIdxTracker
+
+# Tipo dos vetores de inteiros
+_TYPECODE = 'l'
+
+class RefinementTree(object):
+    """Sequência de classificações refinadas dos nodos de um grafo.
+
+    Os níveis são numerados a partir de 0. Os nodos são identificados
+    internamente pela sua posição em 'nodes' e as classes devem ser inteiros.
+    """
+
+    def __init__(self, nodes):
+        """
+        Args:
+            - nodes: Sequência com os nodos classificados.
+        """
+        self.nodes = list(nodes)
+
+        # Classificação do nível 0
+        self._base = None
+        # Para cada nível: índices dos nodos que mudaram de classe em relação
+        # ao nível anterior e suas novas classes
+        self._movedIdx = []
+        self._movedClass = []
+        # Para cada nível: classes criadas no nível e suas classes pais
+        self._parentNew = []
+        self._parentOld = []
+        # Classificação do último nível
+        self._current = None
+
+    def getNumLevels(self):
+        return len(self._movedIdx)
+
+    def addLevel(self, classes, newClassesParents=None):
+        """Acrescenta um nível à árvore.
+
+        O dicionário fornecido não é referenciado pela árvore, que guarda
+        apenas as diferenças em relação ao nível anterior. Assim é possível
+        fornecer sempre o mesmo dicionário atualizado, como no modo
+        'worklist' de regularEquivalence.
+
+        Args:
+            - classes: Mapa de nodo a classe (inteiro) contendo todos os
+                  nodos.
+            - [newClassesParents]: Mapa das classes criadas neste nível às
+                  classes do nível anterior de onde vieram, como fornecido a
+                  ctrlFunc por regularEquivalence.
+        """
+        movedIdx = array(_TYPECODE)
+        movedClass = array(_TYPECODE)
+
+        if self._current is None:
+            self._base = array(_TYPECODE, (classes[node] for node in self.nodes))
+            self._current = array(_TYPECODE, self._base)
+        else:
+            current = self._current
+            for i, node in enumerate(self.nodes):
+                nodeClass = classes[node]
+                if nodeClass != current[i]:
+                    movedIdx.append(i)
+                    movedClass.append(nodeClass)
+                    current[i] = nodeClass
+
+        self._movedIdx.append(movedIdx)
+        self._movedClass.append(movedClass)
+
+        if newClassesParents is None:
+            newClassesParents = {}
+        self._parentNew.append(array(_TYPECODE, newClassesParents.keys()))
+        self._parentOld.append(array(_TYPECODE, newClassesParents.values()))
+
+    def _checkLevel(self, level):
+        if level < 0 or level >= self.getNumLevels():
+            raise IndexError('Nível inexistente: {0}'.format(level))
+
+    def iterClassVectors(self, lastLevel=None):
+        """Percorre as classificações dos níveis em ordem.
+
+        O vetor fornecido é o mesmo objeto, atualizado a cada nível. Quem
+        precisar guardá-lo deve copiá-lo.
+
+        Args:
+            - [lastLevel]: Último nível percorrido. Se None, todos os níveis
+                  são percorridos.
+
+        Return:
+            Gerador de tuplas (nível, vetor), onde vetor[i] é a classe de
+            nodes[i] no nível.
+        """
+        if lastLevel is None:
+            lastLevel = self.getNumLevels() - 1
+        elif lastLevel >= 0:
+            self._checkLevel(lastLevel)
+
+        if lastLevel < 0:
+            return
+
+        vector = array(_TYPECODE, self._base)
+        yield 0, vector
+        for level in range(1, lastLevel + 1):
+            for i, nodeClass in zip(self._movedIdx[level],
+                    self._movedClass[level]):
+                vector[i] = nodeClass
+            yield level, vector
+
+    def getClassVector(self, level):
+        """Classificação de um nível como um vetor alinhado com 'nodes'."""
+        self._checkLevel(level)
+        if level == self.getNumLevels() - 1:
+            return array(_TYPECODE, self._current)
+        for _, vector in self.iterClassVectors(level):
+            pass
+        return vector
+
+    def getClasses(self, level):
+        """Classificação de um nível como um mapa de nodo a classe."""
+        return dict(zip(self.nodes, self.getClassVector(level)))
+
+    def getMovedNodes(self, level):
+        """Nodos que mudaram de classe em relação ao nível anterior."""
+        self._checkLevel(level)
+        return [self.nodes[i] for i in self._movedIdx[level]]
+
+    def getNewClassesParents(self, level):
+        """Mapa das classes criadas no nível às suas classes pais."""
+        self._checkLevel(level)
+        return dict(zip(self._parentNew[level], self._parentOld[level]))
+
+    def save(self, filename):
+        """Grava a árvore em um único arquivo."""
+        data = {
+            'nodes': self.nodes,
+            'base': self._base,
+            'movedIdx': self._movedIdx,
+            'movedClass': self._movedClass,
+            'parentNew': self._parentNew,
+            'parentOld': self._parentOld,
+        }
+        with open(filename, 'wb') as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, filename):
+        """Carrega uma árvore gravada por save."""
+        with open(filename, 'rb') as f:
+            data = pickle.load(f)
+
+        tree = cls(data['nodes'])
+        tree._base = data['base']
+        tree._movedIdx = data['movedIdx']
+        tree._movedClass = data['movedClass']
+        tree._parentNew = data['parentNew']
+        tree._parentOld = data['parentOld']
+        if tree.getNumLevels() > 0:
+            for _, vector in tree.iterClassVectors():
+                pass
+            tree._current = vector
+
+        return tree
+
+def refinementMorphismStats(g, tree, edgeClassAttr=None):
+    """Calcula as estatísticas de graph.fullMorphismStats das classificações
+    de todos os níveis de uma árvore de refinamento com uma única passada
+    pelas arestas do grafo.
+
+    As estatísticas do primeiro nível são calculadas a partir das arestas e as
+    dos níveis seguintes são atualizadas apenas para os nodos que mudaram de
+    classe, com custo proporcional aos seus graus (veja
+    regIdxTracker.RegIdxTracker). Internamente, quando uma classe se divide, a
+    maior parte mantém a classe e só as demais são movidas, de forma que cada
+    nodo é movido no máximo log2(V) vezes. O custo total é o de uma passada
+    pelas arestas mais o dos nodos movidos e o dos grafos imagem gerados, em
+    vez de uma passada pelas arestas por nível.
+
+    Args:
+        - g: Grafo cujos nodos foram classificados.
+        - tree: RefinementTree com as classificações dos nodos de 'g'.
+        - [edgeClassAttr]: Atributo de aresta que indica a classe da aresta.
+              Se 'None', a relação da aresta é utilizada.
+
+    Return:
+        Lista com as estatísticas (nodeHits, edgeHits, edgeSrcHits,
+        edgeTgtHits) de cada nível, na ordem dos níveis.
+
+    Raises:
+        ValueError: Se um nível não for um refinamento do anterior.
+    """
+    if tree.getNumLevels() == 0:
+        return []
+
+    nodes = tree.nodes
+
+    # Classes internas, mantidas pelo tracker, e seus identificadores
+    # externos (os da árvore) no nível atual
+    int2ext = list(set(tree._base))
+    ext2int = {c: k for k, c in enumerate(int2ext)}
+    intCls = [ext2int[c] for c in tree._base]
+    members = [set() for _ in int2ext]
+    for i, k in enumerate(intCls):
+        members[k].add(i)
+    del ext2int
+
+    tracker = RegIdxTracker(g, dict(zip(nodes, intCls)), edgeClassAttr)
+
+    def move(idx, newInt):
+        for i in idx:
+            members[intCls[i]].discard(i)
+            members[newInt].add(i)
+            intCls[i] = newInt
+            tracker.moveNode(nodes[i], newInt)
+
+    def newClass(ext):
+        int2ext.append(ext)
+        members.append(set())
+        return len(int2ext) - 1
+
+    def levelMorphismStats(level):
+        stats = tracker.getMorphismStats(int2ext)
+        # Nenhuma classe interna fica vazia; duas classes internas com o
+        # mesmo identificador externo indicam classes unidas
+        if len(stats[0]) != len(int2ext):
+            raise ValueError('Nível {0} não refina o anterior'.format(level))
+        return stats
+
+    levelStats = [levelMorphismStats(0)]
+    for level in range(1, tree.getNumLevels()):
+        # Partes de cada classe interna que mudam de classe externa
+        parts = {}
+        for i, ext in zip(tree._movedIdx[level], tree._movedClass[level]):
+            parts.setdefault(intCls[i], {}).setdefault(ext, []).append(i)
+
+        for k, classParts in parts.items():
+            numMoved = sum(len(idx) for idx in classParts.values())
+            numStaying = len(members[k]) - numMoved
+            keepExt, keepIdx = max(classParts.items(),
+                    key=lambda item: len(item[1]))
+
+            if len(keepIdx) > numStaying:
+                # A maior parte fica com a classe interna k e os nodos que
+                # não mudaram de classe externa são movidos
+                del classParts[keepExt]
+                if numStaying > 0:
+                    movedIdx = set(keepIdx)
+                    for idx in classParts.values():
+                        movedIdx.update(idx)
+                    classParts[int2ext[k]] = [i for i in members[k]
+                            if i not in movedIdx]
+                int2ext[k] = keepExt
+
+            for ext, idx in classParts.items():
+                move(idx, newClass(ext))
+
+        levelStats.append(levelMorphismStats(level))
+
+    return levelStats
@@ -0,0 +1,285 @@
+# coding: utf-8
+"""Resultados colunares dos índices de regularidade.
+
+graph.calcPreRegIdxStats, graph.calcEdgeRegIdx e graph.calcNodeRegIdx
+retornam dicionários de namedtuples, um objeto por aresta ou nodo do grafo
+imagem. Aqui os mesmos resultados são guardados em tabelas colunares: uma
+lista de chaves (arestas ou nodos do grafo imagem) e um vetor numpy por
+estatística, calculados com operações vetorizadas. As colunas podem ser
+passadas a MultiGraph.setEdgeAttrFromDict e setNodeAttrFromDict por meio de
+ColumnView, sem criar dicionários intermediários.
+
+Exemplo::
+
+    tables = preRegIdxTables(*gr.fullMorphismStats(g, nodeClassF, edgeClassF))
+    edgeIdx = calcEdgeRegIdxTable(tables)
+    newGraph.setEdgeAttrFromDict('ri', edgeIdx.view('ri'), default=0,
+            attrType=float)
+"""
+
+from collections import namedtuple
+from collections.abc import Mapping
+
+import numpy as np
+
+import graph as gr
+
+class ColumnTable(object):
+    """Tabela com uma coluna numpy por campo e uma linha por chave."""
+
+    def __init__(self, keys, columns, positions=None):
+        """
+        Args:
+            - keys: Lista das chaves das linhas.
+            - columns: Mapa do nome de cada coluna ao vetor com seus valores,
+                  na ordem de 'keys'.
+            - [positions]: Mapa de cada chave à sua linha. Tabelas com as
+                  mesmas chaves podem compartilhá-lo.
+        """
+        self.keys = keys
+        self._columns = dict(columns)
+        self._positions = positions
+        for name, column in self._columns.items():
+            if len(column) != len(keys):
+                raise ValueError(
+                    'Coluna {0} com tamanho diferente das chaves'.format(name))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def getPositions(self):
+        """Mapa de cada chave à sua linha, criado na primeira chamada."""
+        if self._positions is None:
+            self._positions = {key: i for i, key in enumerate(self.keys)}
+        return self._positions
+
+    def getColumnNames(self):
+        return list(self._columns.keys())
+
+    def getColumn(self, name):
+        """Vetor numpy da coluna, sem cópia."""
+        return self._columns[name]
+
+    def view(self, name):
+        """ColumnView da coluna, utilizável como dicionário chave -> valor."""
+        return ColumnView(self.getPositions(), self._columns[name])
+
+    def withColumns(self, columns):
+        """Nova tabela com as mesmas chaves (compartilhadas) e as colunas
+        fornecidas.
+        """
+        return ColumnTable(self.keys, columns, self._positions)
+
+    def row(self, key):
+        """Valores da linha da chave, como um dicionário coluna -> valor."""
+        i = self.getPositions()[key]
+        return {name: column.item(i) for name, column in self._columns.items()}
+
+class ColumnView(Mapping):
+    """Visão somente leitura de uma coluna de ColumnTable como um mapa da
+    chave de cada linha ao valor (escalar Python) da coluna.
+    """
+
+    __slots__ = ('_positions', '_column')
+
+    def __init__(self, positions, column):
+        self._positions = positions
+        self._column = column
+
+    def __getitem__(self, key):
+        return self._column.item(self._positions[key])
+
+    def get(self, key, default=None):
+        i = self._positions.get(key)
+        if i is None:
+            return default
+        return self._column.item(i)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+PreRegIdxTables = namedtuple('PreRegIdxTables', ['nodes', 'edges'])
+PreRegIdxTables.__doc__ = """Estatísticas de calcPreRegIdxStats em forma
+colunar.
+
+- nodes: ColumnTable dos nodos do grafo imagem com a coluna 'd' (número de
+  nodos do grafo domínio mapeados em cada nodo).
+- edges: ColumnTable das arestas do grafo imagem com as colunas 'ns', 'ds',
+  'nt', 'dt' e 'ec' de graph.PreRegIdxStats e 'src' e 'tgt', as linhas em
+  'nodes' da origem e do destino de cada aresta.
+"""
+
+def _preRegIdxTables(nodeKeys, d, edgeKeys, src, tgt, ec, ns, nt,
+        nodePositions=None):
+    nodes = ColumnTable(nodeKeys, {'d': d}, nodePositions)
+    edges = ColumnTable(edgeKeys, {'src': src, 'tgt': tgt, 'ns': ns,
+        'ds': d[src], 'nt': nt, 'dt': d[tgt], 'ec': ec})
+    return PreRegIdxTables(nodes, edges)
+
+def preRegIdxTables(nodeHits, edgeHits, edgeSrcHits, edgeTgtHits):
+    """Equivalente colunar de graph.calcPreRegIdxStats.
+
+    Args:
+        Estatísticas como calculadas por graph.fullMorphismStats.
+
+    Return:
+        PreRegIdxTables
+    """
+    nodeKeys = list(nodeHits.keys())
+    nodePos = {node: i for i, node in enumerate(nodeKeys)}
+    d = np.fromiter(nodeHits.values(), dtype=np.int64, count=len(nodeKeys))
+
+    edgeKeys = list(edgeHits.keys())
+    numEdges = len(edgeKeys)
+    src = np.fromiter((nodePos[e[0]] for e in edgeKeys), dtype=np.int64,
+            count=numEdges)
+    tgt = np.fromiter((nodePos[e[1]] for e in edgeKeys), dtype=np.int64,
+            count=numEdges)
+    ec = np.fromiter(edgeHits.values(), dtype=np.int64, count=numEdges)
+    ns = np.fromiter((edgeSrcHits[e] for e in edgeKeys), dtype=np.int64,
+            count=numEdges)
+    nt = np.fromiter((edgeTgtHits[e] for e in edgeKeys), dtype=np.int64,
+            count=numEdges)
+
+    return _preRegIdxTables(nodeKeys, d, edgeKeys, src, tgt, ec, ns, nt,
+            nodePos)
+
+def preRegIdxTablesFromArrays(stats, classValues=None, relValues=None):
+    """PreRegIdxTables a partir de vecMorphism.MorphismStatsArrays, sem passar
+    pelos dicionários de graph.fullMorphismStats.
+
+    Args:
+        - stats, [classValues], [relValues]: Como em vecMorphism.statsToDicts.
+
+    Return:
+        PreRegIdxTables
+    """
+    classes = np.flatnonzero(stats.nodeHits > 0)
+    nodeRow = np.zeros(len(stats.nodeHits), dtype=np.int64)
+    nodeRow[classes] = np.arange(len(classes))
+
+    codes = classes.tolist()
+    srcCodes = stats.edgeSrc.tolist()
+    tgtCodes = stats.edgeTgt.tolist()
+    relCodes = stats.edgeRel.tolist()
+    if classValues is not None:
+        codes = [classValues[c] for c in codes]
+        srcCodes = [classValues[c] for c in srcCodes]
+        tgtCodes = [classValues[c] for c in tgtCodes]
+    if relValues is not None:
+        relCodes = [relValues[r] for r in relCodes]
+
+    return _preRegIdxTables(codes, stats.nodeHits[classes],
+            list(zip(srcCodes, tgtCodes, relCodes)), nodeRow[stats.edgeSrc],
+            nodeRow[stats.edgeTgt], stats.ec, stats.ns, stats.nt)
+
+def calcEdgeRegIdxTable(tables):
+    """Equivalente colunar de graph.calcEdgeRegIdx.
+
+    Return:
+        ColumnTable com as mesmas chaves de tables.edges e as colunas 'ri',
+        'sri' e 'tri'.
+    """
+    edges = tables.edges
+    ns = edges.getColumn('ns')
+    ds = edges.getColumn('ds')
+    nt = edges.getColumn('nt')
+    dt = edges.getColumn('dt')
+
+    return edges.withColumns({'ri': (ns + nt)/(ds + dt), 'sri': ns/ds,
+        'tri': nt/dt})
+
+def calcNodeRegIdxTable(tables):
+    """Equivalente colunar de graph.calcNodeRegIdx.
+
+    Return:
+        ColumnTable com as mesmas chaves de tables.nodes e as colunas 'ri',
+        'nri', 'sri' e 'tri'.
+    """
+    nodes = tables.nodes
+    edges = tables.edges
+    numNodes = len(nodes)
+    src = edges.getColumn('src')
+    tgt = edges.getColumn('tgt')
+    ec = edges.getColumn('ec')
+    ns = edges.getColumn('ns')
+    nt = edges.getColumn('nt')
+    d = nodes.getColumn('d').astype(np.float64)
+
+    def sumBy(idx, weights):
+        return np.bincount(idx, weights=weights, minlength=numNodes)
+
+    ecs = sumBy(src, ec)
+    ect = sumBy(tgt, ec)
+    sumNs = sumBy(src, ec * ns)
+    sumNt = sumBy(tgt, ec * nt)
+    n = ec * (ns + nt)
+    edgeN = sumBy(src, n) + sumBy(tgt, n)
+    dd = ec * (edges.getColumn('ds') + edges.getColumn('dt'))
+    edgeD = sumBy(src, dd) + sumBy(tgt, dd)
+
+    # Os casos sem arestas recebem os valores constantes de calcNodeRegIdx
+    ri = np.ones(numNodes)
+    nri = np.ones(numNodes)
+    sri = np.ones(numNodes)
+    tri = np.ones(numNodes)
+
+    nonEmpty = d > 0
+    hasEdges = nonEmpty & ((ecs + ect) > 0)
+    np.divide(edgeN, edgeD, out=ri, where=hasEdges)
+    np.divide(sumNs + sumNt, d * (ecs + ect), out=nri, where=hasEdges)
+    np.divide(sumNs, d * ecs, out=sri, where=hasEdges & (ecs > 0))
+    np.divide(sumNt, d * ect, out=tri, where=hasEdges & (ect > 0))
+
+    for column in (ri, nri, sri, tri):
+        column[~nonEmpty] = 0.0
+
+    return nodes.withColumns({'ri': ri, 'nri': nri, 'sri': sri, 'tri': tri})
+
+def calcGraphRegIdxTable(tables):
+    """Equivalente colunar de graph.calcGraphRegIdx.
+
+    Return:
+        graph.GraphRegIdx
+    """
+    edges = tables.edges
+    ec = edges.getColumn('ec')
+
+    sumNs = int(np.dot(ec, edges.getColumn('ns')))
+    sumNt = int(np.dot(ec, edges.getColumn('nt')))
+    sumDs = int(np.dot(ec, edges.getColumn('ds')))
+    sumDt = int(np.dot(ec, edges.getColumn('dt')))
+
+    assert(sumDs > 0)
+    assert(sumDt > 0)
+
+    return gr.GraphRegIdx((sumNs + sumNt)/(sumDs + sumDt), sumNs/sumDs,
+            sumNt/sumDt)
+
+def setRegIdxAttrs(g, tables, regIdxPrefix):
+    """Cria no grafo imagem 'g' os atributos de índice de regularidade de
+    MultiGraph.spawnFromClassAttributes (parâmetro 'regIdxPrefix') a partir
+    das tabelas colunares.
+    """
+    edgeIdx = calcEdgeRegIdxTable(tables)
+    for column, suffix in (('ri', ''), ('sri', '_src'), ('tri', '_tgt')):
+        g.setEdgeAttrFromDict(regIdxPrefix + suffix, edgeIdx.view(column),
+                default=0, attrType=float)
+
+    regIdx = calcGraphRegIdxTable(tables)
+    for value, suffix in zip(regIdx, ('', '_src', '_tgt')):
+        spec = gr.AttrSpec(regIdxPrefix + suffix, float, 0.0)
+        g.addGraphAttrSpec(spec)
+        g.setGraphAttr(spec.name, value)
+
+    nodeIdx = calcNodeRegIdxTable(tables)
+    for column, suffix in (('ri', ''), ('nri', '_node'), ('sri', '_src'),
+            ('tri', '_tgt')):
+        g.setNodeAttrFromDict(regIdxPrefix + suffix, nodeIdx.view(column),
+                default=0.0, attrType=float)
@@ -0,0 +1,229 @@
+# coding: utf-8
+"""Acompanhamento incremental do índice de regularidade de grafo do
+homomorfismo cheio induzido por uma classificação dos nodos.
+
+Algoritmos de busca local alteram a classe de poucos nodos por vez, mas
+recalcular o índice por graph.fullMorphismStats, graph.calcPreRegIdxStats e
+graph.calcGraphRegIdx custa O(V + E) a cada avaliação. RegIdxTracker mantém as
+estatísticas do homomorfismo e as somas que compõem o índice de forma que a
+mudança de classe de um nodo custe O(grau do nodo).
+
+As somas mantidas são as de graph.calcGraphRegIdx, onde para cada aresta e do
+grafo imagem com origem na classe a e destino na classe b:
+
+- sumNs = Sum(ec*ns), sumNt = Sum(ec*nt)
+- sumDs = Sum(ec*ds) = Sum_a(hits[a] * ecOut[a])
+- sumDt = Sum(ec*dt) = Sum_b(hits[b] * ecIn[b])
+
+sendo hits[a] o número de nodos na classe a e ecOut[a] (ecIn[b]) o número de
+arestas do grafo domínio que saem da classe a (chegam na classe b). Os valores
+ns e nt de cada aresta imagem são mantidos a partir do perfil de cada nodo: o
+número de suas arestas de saída (entrada) para cada par (classe do vizinho,
+classe da aresta).
+"""
+
+import graph as gr
+
+class RegIdxTracker(object):
+    """Mantém o índice de regularidade de grafo de uma classificação de nodos
+    que é alterada um nodo por vez.
+
+    Exemplo::
+
+        tracker = RegIdxTracker(g, nodeClass)
+        if tracker.evalMove(node, newClass).ri > tracker.getRegIdx().ri:
+            tracker.moveNode(node, newClass)
+    """
+
+    def __init__(self, g, nodeClass, edgeClassAttr=None):
+        """
+        Args:
+            - g: Grafo domínio do homomorfismo
+            - nodeClass: Mapa de cada nodo do grafo à sua classe inicial.
+            - [edgeClassAttr]: Atributo de aresta que indica a classe da
+                  aresta. Se 'None', a relação da aresta será utilizada.
+        """
+        self._adj = gr.CompiledAdjacency(g, edgeClassAttr)
+        adj = self._adj
+
+        self._cls = [nodeClass[node] for node in adj.nodes]
+
+        # Estatísticas [ec, ns, nt] de cada aresta imagem (a, b, código)
+        self._edgeStats = {}
+        # Perfis de cada nodo: (classe do vizinho, código) -> número de arestas
+        self._outProfile = [{} for _ in adj.nodes]
+        self._inProfile = [{} for _ in adj.nodes]
+
+        self._hits = {}
+        self._ecOut = {}
+        self._ecIn = {}
+
+        self._sumNs = 0
+        self._sumNt = 0
+        self._sumDs = 0
+        self._sumDt = 0
+
+        for cls in self._cls:
+            self._changeHits(cls, 1)
+        for u, v, code in adj.edges:
+            self._changeEdge(u, v, code, 1)
+
+    def _changeHits(self, cls, delta):
+        hits = self._hits.get(cls, 0) + delta
+        if hits:
+            self._hits[cls] = hits
+        else:
+            del self._hits[cls]
+        self._sumDs += delta * self._ecOut.get(cls, 0)
+        self._sumDt += delta * self._ecIn.get(cls, 0)
+
+    def _changeEdge(self, u, v, code, delta):
+        """Acrescenta (delta = 1) ou retira (delta = -1) a aresta (u, v, code)
+        do homomorfismo.
+        """
+        a = self._cls[u]
+        b = self._cls[v]
+        edge = (a, b, code)
+        stats = self._edgeStats.get(edge)
+        if stats is None:
+            stats = [0, 0, 0]
+            self._edgeStats[edge] = stats
+
+        # Retirando a contribuição anterior da aresta imagem
+        self._sumNs -= stats[0] * stats[1]
+        self._sumNt -= stats[0] * stats[2]
+
+        stats[0] += delta
+
+        profile = self._outProfile[u]
+        key = (b, code)
+        count = profile.get(key, 0) + delta
+        if count:
+            profile[key] = count
+        else:
+            del profile[key]
+        if (delta > 0 and count == 1) or (delta < 0 and count == 0):
+            # u passou a contribuir ou deixou de contribuir como origem
+            stats[1] += delta
+
+        profile = self._inProfile[v]
+        key = (a, code)
+        count = profile.get(key, 0) + delta
+        if count:
+            profile[key] = count
+        else:
+            del profile[key]
+        if (delta > 0 and count == 1) or (delta < 0 and count == 0):
+            stats[2] += delta
+
+        self._sumNs += stats[0] * stats[1]
+        self._sumNt += stats[0] * stats[2]
+
+        if stats[0] == 0:
+            del self._edgeStats[edge]
+
+        self._ecOut[a] = self._ecOut.get(a, 0) + delta
+        self._ecIn[b] = self._ecIn.get(b, 0) + delta
+        self._sumDs += delta * self._hits.get(a, 0)
+        self._sumDt += delta * self._hits.get(b, 0)
+
+    def getNodeClass(self, node):
+        return self._cls[self._adj.nodeIdx[node]]
+
+    def getNodeClasses(self):
+        """Mapa de cada nodo à sua classe atual."""
+        return dict(zip(self._adj.nodes, self._cls))
+
+    def getMorphismStats(self, classNames=None):
+        """Estatísticas do homomorfismo da classificação atual, como
+        calculadas por graph.fullMorphismStats.
+
+        Args:
+            - [classNames]: Mapa (ou sequência indexada pela classe) do nome
+                  com que cada classe deve aparecer nas estatísticas. Se
+                  'None', são usadas as próprias classes.
+
+        Return:
+            (nodeHits, edgeHits, edgeSrcHits, edgeTgtHits)
+        """
+        edgeClasses = self._adj.edgeClasses
+        nodeHits = {}
+        edgeHits = {}
+        edgeSrcHits = {}
+        edgeTgtHits = {}
+
+        if classNames is None:
+            nodeHits.update(self._hits)
+            for (a, b, code), (ec, ns, nt) in self._edgeStats.items():
+                edge = (a, b, edgeClasses[code])
+                edgeHits[edge] = ec
+                edgeSrcHits[edge] = ns
+                edgeTgtHits[edge] = nt
+        else:
+            for cls, hits in self._hits.items():
+                nodeHits[classNames[cls]] = hits
+            for (a, b, code), (ec, ns, nt) in self._edgeStats.items():
+                edge = (classNames[a], classNames[b], edgeClasses[code])
+                edgeHits[edge] = ec
+                edgeSrcHits[edge] = ns
+                edgeTgtHits[edge] = nt
+
+        return nodeHits, edgeHits, edgeSrcHits, edgeTgtHits
+
+    def getRegIdx(self):
+        """Índice de regularidade de grafo da classificação atual, como
+        calculado por graph.calcGraphRegIdx.
+        """
+        assert(self._sumDs > 0)
+        assert(self._sumDt > 0)
+
+        return gr.GraphRegIdx(
+                (self._sumNs + self._sumNt)/(self._sumDs + self._sumDt),
+                self._sumNs/self._sumDs, self._sumNt/self._sumDt)
+
+    def moveNode(self, node, newClass):
+        """Muda a classe de um nodo, em tempo proporcional ao seu grau."""
+        i = self._adj.nodeIdx[node]
+        oldClass = self._cls[i]
+        if oldClass == newClass:
+            return
+
+        # Laços aparecem nas duas listas de adjacência mas são uma só aresta
+        edges = [(i, v, code) for v, code in self._adj.outAdj[i]]
+        edges.extend((w, i, code) for w, code in self._adj.inAdj[i] if w != i)
+
+        for u, v, code in edges:
+            self._changeEdge(u, v, code, -1)
+        self._changeHits(oldClass, -1)
+
+        self._cls[i] = newClass
+
+        self._changeHits(newClass, 1)
+        for u, v, code in edges:
+            self._changeEdge(u, v, code, 1)
+
+    def evalMove(self, node, newClass):
+        """Índice de regularidade que se obteria mudando a classe do nodo,
+        sem alterar a classificação atual.
+        """
+        oldClass = self.getNodeClass(node)
+        self.moveNode(node, newClass)
+        try:
+            return self.getRegIdx()
+        finally:
+            self.moveNode(node, oldClass)
+
+    def setNodeClasses(self, nodeClass):
+        """Passa para a classificação fornecida movendo apenas os nodos cuja
+        classe mudou.
+
+        Return:
+            Número de nodos movidos.
+        """
+        moved = 0
+        for node, cls in zip(self._adj.nodes, list(self._cls)):
+            newClass = nodeClass[node]
+            if newClass != cls:
+                self.moveNode(node, newClass)
+                moved += 1
+        return moved
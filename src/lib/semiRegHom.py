@@ -6,7 +6,7 @@ aproximadamente regular.
 #---------------------------------------------------------------------
 # Importações
 #---------------------------------------------------------------------
-import graph as gr
+from regIdxTracker import RegIdxTracker
 import math
 import random
 import itertools
@@ -93,15 +93,22 @@ class KSemiRegClassVisitor(object):
         self.bestRankRegIdx = 0.0
         self.bestRankNodeClass = {}
 
+        self._regIdxTracker = None
+
     def begining(self, g, k, iMax):
         self.logger.info(
             "BEGIN ksemiRegularClass: {0} classes {1} iterations".format(
                 k, iMax))
+        self._regIdxTracker = None
 
     def iteration(self, g, i, nodeClass, clsPatterns, rank):
-        regStats = gr.fullMorphismStats(g, _createNodeClsF(nodeClass), _edgeClsF)
-        edgeStats = gr.calcPreRegIdxStats(*regStats)
-        graphRegIdx = gr.calcGraphRegIdx(edgeStats)
+        # O índice é atualizado movendo apenas os nodos que mudaram de classe
+        # desde a iteração anterior
+        if self._regIdxTracker is None:
+            self._regIdxTracker = RegIdxTracker(g, nodeClass)
+        else:
+            self._regIdxTracker.setNodeClasses(nodeClass)
+        graphRegIdx = self._regIdxTracker.getRegIdx()
         self.logger.info("Iter {0} {1:.4f} {2:.4f} {3:.4f} {4:.4f}".format(i,
                     graphRegIdx.ri, graphRegIdx.sri, graphRegIdx.tri, rank))
         self._writeClasses(i, nodeClass)
@@ -174,15 +181,6 @@ class KSemiRegClassVisitor(object):
                 self._bestClassFile.write('{0}\t{1}\t{2}\n'.format(node, cls,
                     self.bestRankNodeClass[node]))
 
-def _createNodeClsF(nodeClass):
-    def nodeClsF(node):
-        return nodeClass[node]
-
-    return nodeClsF
-
-def _edgeClsF(edge):
-    return edge[2]
-
 def _actualizeClassPatterns(clsPatterns, patternToIdx, edgeRegIdx):
     for vet in clsPatterns:
         for i in range(len(vet)):
@@ -0,0 +1,315 @@
+# coding: utf-8
+"""Estatísticas do homomorfismo cheio calculadas diretamente de arquivos de
+arestas, sem construir um graph.MultiGraph.
+
+graph.fullMorphismStats exige o grafo domínio inteiro em memória. Aqui as
+arestas são lidas em blocos de um arquivo CSV (no formato gerado por
+faceCsv.py) ou GraphML e acumuladas, junto com um mapa de cada nodo à sua
+classe, nas mesmas estatísticas nodeHits, edgeHits, edgeSrcHits e edgeTgtHits.
+O resultado pode ser passado sem alterações para graph.calcPreRegIdxStats,
+graph.calcEdgeRegIdx, graph.calcNodeRegIdx e graph.calcGraphRegIdx.
+
+A memória usada pelo acúmulo é a do grafo imagem (uma entrada por aresta
+imagem) mais a dos contadores de elementos distintos usados para edgeSrcHits e
+edgeTgtHits. O contador é configurável: ExactDistinctCounter guarda os nodos
+vistos e é exato, mas usa memória proporcional ao número de pares (aresta
+imagem, nodo) distintos; hyperLogLog.HyperLogLog limita a memória de cada
+aresta imagem ao custo de um erro de aproximação.
+
+Como nenhuma aresta do grafo domínio é guardada, arestas repetidas no arquivo
+não são eliminadas como em MultiGraph.addEdge: cada linha conta como uma aresta.
+Os arquivos gerados por faceCsv.py não têm linhas repetidas.
+
+Exemplo::
+
+    nodeClass = readNodeClassCsv('classes.csv')
+    stats = streamMorphismStats(nodeClass, iterCsvEdges('arestas.csv'))
+    ri = gr.calcGraphRegIdx(gr.calcPreRegIdxStats(*stats))
+"""
+
+import csv
+import xml.etree.ElementTree as ET
+from collections import Counter
+from itertools import islice
+
+import graph as gr
+
+# Formato dos arquivos CSV gerados por faceCsv.py
+FACECSV_FORMAT = {
+    'delimiter': '\t',
+    'quotechar': '"',
+    'escapechar': '\\',
+    'doublequote': False,
+    'skipinitialspace': True
+}
+
+GRAPHML_NS = '{http://graphml.graphdrawing.org/xmlns}'
+
+class ExactDistinctCounter(object):
+    """Contador exato do número de elementos distintos adicionados.
+
+    Outros contadores podem ser usados em MorphismStatsAccumulator desde que
+    ofereçam os mesmos métodos add, merge, count e stdError, como
+    hyperLogLog.HyperLogLog.
+    """
+
+    __slots__ = ('_elems',)
+
+    def __init__(self):
+        self._elems = set()
+
+    def add(self, elem):
+        self._elems.add(elem)
+
+    def merge(self, other):
+        """Acrescenta a este contador os elementos contados por 'other'."""
+        self._elems |= other._elems
+
+    def count(self):
+        return len(self._elems)
+
+    def stdError(self):
+        return 0.0
+
+class MorphismStatsAccumulator(object):
+    """Acumula, a partir de blocos de arestas, as estatísticas de
+    graph.fullMorphismStats.
+    """
+
+    def __init__(self, nodeClass, distinctCounter=ExactDistinctCounter,
+            dfltClass=None):
+        """
+        Args:
+            - nodeClass: Mapa de cada nodo do grafo domínio à sua classe. Os
+                  nodos do mapa são os nodos do grafo domínio, inclusive os
+                  que não aparecem em nenhuma aresta.
+            - [distinctCounter]: Classe (ou função sem argumentos) que cria os
+                  contadores de nodos distintos de origem e destino de cada
+                  aresta imagem.
+            - [dfltClass]: Classe dos nodos que aparecem nas arestas mas não
+                  em 'nodeClass'. Se 'None', esses nodos causam KeyError.
+        """
+        self._nodeClass = nodeClass
+        self._distinctCounter = distinctCounter
+        self._dfltClass = dfltClass
+        self._unmapped = distinctCounter()
+        self._edgeHits = {}
+        self._srcCounters = {}
+        self._tgtCounters = {}
+        self._numEdges = 0
+
+    def _classOf(self, node):
+        cls = self._nodeClass.get(node)
+        if cls is None:
+            if self._dfltClass is None:
+                raise KeyError(node)
+            self._unmapped.add(node)
+            cls = self._dfltClass
+        return cls
+
+    def addEdges(self, edges):
+        """Acrescenta as arestas (origem, destino, classe da aresta) de
+        'edges' às estatísticas.
+        """
+        classOf = self._classOf
+        edgeHits = self._edgeHits
+        srcCounters = self._srcCounters
+        tgtCounters = self._tgtCounters
+        numEdges = 0
+
+        for src, tgt, rel in edges:
+            newEdge = (classOf(src), classOf(tgt), rel)
+            hits = edgeHits.get(newEdge)
+            if hits is None:
+                edgeHits[newEdge] = 1
+                srcCounters[newEdge] = self._distinctCounter()
+                tgtCounters[newEdge] = self._distinctCounter()
+            else:
+                edgeHits[newEdge] = hits + 1
+            srcCounters[newEdge].add(src)
+            tgtCounters[newEdge].add(tgt)
+            numEdges += 1
+
+        self._numEdges += numEdges
+
+    def getNumEdges(self):
+        """Número de arestas acumuladas até agora."""
+        return self._numEdges
+
+    def getStats(self):
+        """Estatísticas acumuladas até agora.
+
+        Return:
+            (nodeHits, edgeHits, edgeSrcHits, edgeTgtHits) como em
+            graph.fullMorphismStats.
+        """
+        nodeHits = dict(Counter(self._nodeClass.values()))
+        numUnmapped = self._unmapped.count()
+        if numUnmapped:
+            nodeHits[self._dfltClass] = (nodeHits.get(self._dfltClass, 0)
+                    + numUnmapped)
+
+        edgeSrcHits = {e: c.count() for e, c in self._srcCounters.items()}
+        edgeTgtHits = {e: c.count() for e, c in self._tgtCounters.items()}
+
+        return nodeHits, dict(self._edgeHits), edgeSrcHits, edgeTgtHits
+
+    def getCountErrors(self):
+        """Erros padrão das contagens de edgeSrcHits e edgeTgtHits de cada
+        aresta imagem, como os 'countErrors' de graph.fullMorphismStats.
+        """
+        return {e: gr.CountErrors(c.stdError(),
+                self._tgtCounters[e].stdError())
+                for e, c in self._srcCounters.items()}
+
+def streamMorphismStats(nodeClass, edges, distinctCounter=ExactDistinctCounter,
+        dfltClass=None, chunkSize=100000, ctrlFunc=None, countErrors=None):
+    """Calcula as estatísticas de graph.fullMorphismStats a partir de um fluxo
+    de arestas, lido em blocos de 'chunkSize' arestas.
+
+    Args:
+        - nodeClass, distinctCounter, dfltClass: Como em
+              MorphismStatsAccumulator.
+        - edges: Iterável de arestas (origem, destino, classe da aresta), por
+              exemplo iterCsvEdges ou iterGraphmlEdges.
+        - [chunkSize]: Número de arestas lidas por bloco.
+        - [ctrlFunc]: Função chamada com o número de arestas já processadas
+              após cada bloco.
+        - [countErrors]: Dicionário opcional que recebe os erros padrão das
+              contagens, como em graph.fullMorphismStats.
+
+    Return:
+        (nodeHits, edgeHits, edgeSrcHits, edgeTgtHits)
+    """
+    acc = MorphismStatsAccumulator(nodeClass, distinctCounter, dfltClass)
+    edges = iter(edges)
+    while True:
+        chunk = list(islice(edges, chunkSize))
+        if not chunk:
+            break
+        acc.addEdges(chunk)
+        if ctrlFunc is not None:
+            ctrlFunc(acc.getNumEdges())
+
+    if countErrors is not None:
+        countErrors.update(acc.getCountErrors())
+
+    return acc.getStats()
+
+def _columnIndex(col, header):
+    if isinstance(col, str):
+        if header is None:
+            raise ValueError(
+                'Coluna {!r} indicada por nome em arquivo sem cabeçalho'.format(
+                    col))
+        return header.index(col)
+    return col
+
+def iterCsvEdges(fileName, srcCol=0, tgtCol=1, relCol=2, hasHeader=True,
+        **fmtParams):
+    """Itera sobre as arestas de um arquivo CSV, uma linha por aresta.
+
+    Args:
+        - fileName: Nome do arquivo.
+        - [srcCol, tgtCol, relCol]: Colunas (índice ou nome no cabeçalho) da
+              origem, destino e classe da aresta. Se 'relCol' for 'None',
+              todas as arestas têm classe 0.
+        - [hasHeader]: Se a primeira linha do arquivo é um cabeçalho.
+        - [fmtParams]: Parâmetros de formato do módulo csv. Por padrão é usado
+              FACECSV_FORMAT.
+
+    Return:
+        Gerador de tuplas (origem, destino, classe da aresta), todos como
+        strings.
+    """
+    if not fmtParams:
+        fmtParams = FACECSV_FORMAT
+
+    with open(fileName, newline='') as f:
+        reader = csv.reader(f, **fmtParams)
+        header = next(reader, None) if hasHeader else None
+        src = _columnIndex(srcCol, header)
+        tgt = _columnIndex(tgtCol, header)
+        if relCol is None:
+            for row in reader:
+                if row:
+                    yield (row[src], row[tgt], 0)
+        else:
+            rel = _columnIndex(relCol, header)
+            for row in reader:
+                if row:
+                    yield (row[src], row[tgt], row[rel])
+
+def readNodeClassCsv(fileName, nodeCol=0, classCol=1, hasHeader=True,
+        classType=str, **fmtParams):
+    """Lê de um arquivo CSV o mapa de cada nodo à sua classe.
+
+    Args:
+        - fileName: Nome do arquivo.
+        - [nodeCol, classCol]: Colunas (índice ou nome no cabeçalho) do nodo e
+              de sua classe.
+        - [hasHeader]: Se a primeira linha do arquivo é um cabeçalho.
+        - [classType]: Função que converte a classe lida do arquivo.
+        - [fmtParams]: Como em iterCsvEdges.
+
+    Return:
+        Dicionário nodo -> classe.
+    """
+    if not fmtParams:
+        fmtParams = FACECSV_FORMAT
+
+    nodeClass = {}
+    with open(fileName, newline='') as f:
+        reader = csv.reader(f, **fmtParams)
+        header = next(reader, None) if hasHeader else None
+        node = _columnIndex(nodeCol, header)
+        cls = _columnIndex(classCol, header)
+        for row in reader:
+            if row:
+                nodeClass[row[node]] = classType(row[cls])
+    return nodeClass
+
+def iterGraphmlEdges(fileName, relationAttr=gr.EDGE_RELATION_ATTR):
+    """Itera sobre as arestas de um arquivo GraphML sem carregar o documento
+    inteiro: cada elemento é descartado assim que processado.
+
+    Args:
+        - fileName: Nome do arquivo.
+        - [relationAttr]: Atributo de aresta usado como classe da aresta, como
+              em graph.loadGraphml. Se o arquivo não o definir, todas as
+              arestas têm classe 0 (arestas paralelas não são renumeradas como
+              em graph.loadGraphml, o que exigiria guardar as arestas).
+
+    Return:
+        Gerador de tuplas (origem, destino, classe da aresta).
+    """
+    relationKey = None
+    relationSpec = None
+    xgraph = None
+
+    for event, elem in ET.iterparse(fileName, events=('start', 'end')):
+        if event == 'start':
+            if elem.tag == GRAPHML_NS + 'graph':
+                xgraph = elem
+        elif elem.tag == GRAPHML_NS + 'key':
+            if (elem.get('for') == 'edge'
+                    and elem.get('attr.name') == relationAttr
+                    and elem.get('attr.type') in gr.AttrSpec.VALID_TYPES):
+                relationKey = elem.get('id')
+                relationSpec = gr.AttrSpec(relationAttr,
+                        elem.get('attr.type'))
+                xdefault = elem.find(GRAPHML_NS + 'default')
+                if xdefault is not None:
+                    relationSpec.setDefault(xdefault.text)
+        elif elem.tag == GRAPHML_NS + 'edge':
+            rel = 0
+            if relationKey is not None:
+                rel = relationSpec.default
+                for xdata in elem.iterfind(GRAPHML_NS + 'data'):
+                    if xdata.get('key') == relationKey:
+                        rel = relationSpec.fromStr(xdata.text)
+                        break
+            yield (elem.get('source'), elem.get('target'), rel)
+            xgraph.remove(elem)
+        elif elem.tag == GRAPHML_NS + 'node':
+            xgraph.remove(elem)
@@ -0,0 +1,262 @@
+import random
+import unittest
+import numpy as np
+import graph as gr
+from attrStore import AttrColumn
+from test_graph import randomGraph
+
+class AttrColumnTest(unittest.TestCase):
+
+    def test_typed(self):
+        column = AttrColumn('d')
+        column.set(3, 1.5)
+        column.set(0, 2)
+        self.assertEqual(column.typecode, 'd')
+        self.assertEqual(column.get(3), 1.5)
+        self.assertEqual(column.get(0), 2.0)
+        self.assertIsNone(column.get(1))
+        self.assertEqual(column.get(100, 'x'), 'x')
+        self.assertEqual(list(column.ids()), [0, 3])
+        column.discard(3)
+        self.assertEqual(column.count(), 1)
+
+    def test_fallbackToObjects(self):
+        column = AttrColumn('q')
+        column.set(0, 7)
+        column.set(1, (1, 2))
+        self.assertIsNone(column.typecode)
+        self.assertEqual(column.get(0), 7)
+        self.assertEqual(column.get(1), (1, 2))
+
+        column = AttrColumn('b')
+        column.set(0, True)
+        self.assertIs(column.get(0), True)
+        column.set(1, 2)
+        self.assertIsNone(column.typecode)
+        self.assertEqual(column.get(1), 2)
+
+    def test_retype(self):
+        column = AttrColumn()
+        column.set(0, 1)
+        column.set(2, 3)
+        column.retype('q')
+        self.assertEqual(column.typecode, 'q')
+        self.assertEqual(column.values()[2], 3)
+        column.set(1, 'a')
+        column.retype('q')
+        self.assertIsNone(column.typecode)
+
+    def test_growWithExportedView(self):
+        column = AttrColumn('q')
+        column.set(0, 5)
+        view = column.values()
+        column.set(1000, 6)
+        self.assertEqual(view[0], 5)
+        self.assertEqual(column.get(1000), 6)
+
+    def test_inverted(self):
+        column = AttrColumn('d')
+        for i in range(10):
+            column.set(i, float(i % 3))
+        self.assertEqual(column.inverted(), {0.0: {0, 3, 6, 9},
+            1.0: {1, 4, 7}, 2.0: {2, 5, 8}})
+        column.set(0, 1)
+        column.discard(1)
+        column.setMany([2, 20], [5.0, 1.0])
+        self.assertTrue(column.hasInverted())
+        self.assertEqual(column.inverted(), {0.0: {3, 6, 9},
+            1.0: {0, 4, 7, 20}, 2.0: {5, 8}, 5.0: {2}})
+
+        # Valores não hasheáveis e NaN descartam o índice
+        column.set(3, float('nan'))
+        column.set(3, 0.0)
+        self.assertFalse(column.hasInverted())
+        column.set(4, [1])
+        self.assertRaises(TypeError, column.inverted)
+
+        # Escritas pelos vetores exportados não são acompanhadas
+        column = AttrColumn('q')
+        column.set(0, 1)
+        column.inverted()
+        column.values()[0] = 2
+        self.assertEqual(column.inverted(), {2: {0}})
+
+    def test_sparse(self):
+        column = AttrColumn('q', 1000, sparseDefault=0)
+        column.set(5, 3)
+        column.set(7, 0)
+        column.set(9, 2)
+        self.assertEqual(column.count(), 2)
+        self.assertFalse(column.has(7))
+        self.assertEqual(list(column.ids()), [5, 9])
+        self.assertIsInstance(column._values, dict)
+        self.assertEqual(column.typecode, 'q')
+
+        # Valores que não cabem no tipo: objetos, como na coluna densa
+        column.set(10, 2.5)
+        self.assertIsNone(column.typecode)
+        self.assertEqual(column.get(10), 2.5)
+
+        # Muitos valores: passa ao vetor tipado e volta com compact
+        column = AttrColumn('d', 100, sparseDefault=0.0)
+        for i in range(50):
+            column.set(i, i + 1)
+        self.assertEqual(column.typecode, 'd')
+        self.assertNotIsInstance(column._values, dict)
+        self.assertEqual(column.get(10), 11.0)
+        for i in range(50):
+            column.set(i, 0.0)
+        self.assertEqual(column.count(), 0)
+        column.compact()
+        self.assertIsInstance(column._values, dict)
+
+        column.set(3, 1)
+        self.assertIsInstance(column.get(3), float)
+        self.assertEqual(len(column), 100)
+        self.assertEqual(list(column.presence())[2:5], [0, 1, 0])
+        column.compact()
+        column.set(3, 1.5)
+        column.setSparseDefault(None)
+        column.set(4, 0.0)
+        self.assertEqual(column.count(), 2)
+        self.assertEqual(column.values()[3], 1.5)
+
+class GraphAttrStore(unittest.TestCase):
+
+    def setUp(self):
+        self.g = randomGraph(50, 120, seed=3)
+        self.g.addEdgeAttrSpec(gr.AttrSpec('eclass', 'int'))
+
+    def test_dictInterface(self):
+        g = self.g
+        eclass = g.edgeAttrs['eclass']
+        self.assertEqual(eclass.column.typecode, 'q')
+        self.assertEqual(len(eclass), g.getNumEdges())
+        self.assertEqual(dict(eclass),
+                {e: g.getEdgeAttr(e, 'eclass') for e in g.edges()})
+        self.assertEqual(g.getEdgeAttrValueSet('eclass'), {0, 1})
+        self.assertIsNone(g.getNodeAttrSpec('preclass'))
+        self.assertIsNone(g.nodeAttrs['preclass'].column.typecode)
+
+        g.addNodeAttrSpec(gr.AttrSpec('preclass', 'int'))
+        self.assertEqual(g.nodeAttrs['preclass'].column.typecode, 'q')
+        self.assertEqual(g.getNodeAttr(0, 'preclass'),
+                g.nodeAttrs['preclass'][0])
+
+    def test_removeElements(self):
+        g = self.g
+        node = next(iter(g.nodes()))
+        edges = [(node, v, r) for v, r in g.outNeighboors(node)]
+        g.removeNode(node)
+        self.assertNotIn(node, g.nodeAttrs['preclass'])
+        for edge in edges:
+            self.assertIsNone(g.getEdgeAttr(edge, 'eclass'))
+        self.assertEqual(len(g.edgeAttrs['eclass']), g.getNumEdges())
+
+        g.addNode(node)
+        self.assertIsNone(g.getNodeAttr(node, 'preclass'))
+
+    def test_bulkColumns(self):
+        g = self.g
+        values, present = g.getEdgeAttrColumn('eclass')
+        for edge in g.edges():
+            i = g.getElemId(gr.MultiGraph.SCOPE_EDGE, edge)
+            self.assertEqual(g.getElemById(gr.MultiGraph.SCOPE_EDGE, i), edge)
+            self.assertTrue(present[i])
+            self.assertEqual(values[i], g.getEdgeAttr(edge, 'eclass'))
+
+        # As visões compartilham a memória da coluna
+        array = np.asarray(values)
+        array += 10
+        self.assertEqual(g.getEdgeAttrValueSet('eclass'), {10, 11})
+
+        g.addNodeAttrSpec(gr.AttrSpec('peso', 'double'))
+        numIds = len(g.nodeAttrs.index.keys)
+        weights = np.arange(numIds, dtype=np.float64)
+        mask = weights % 2 == 0
+        events = []
+        g.addChangeHandler(lambda *args: events.append(args))
+        g.setNodeAttrColumn('peso', weights, mask)
+        self.assertEqual(len(events), mask.sum())
+        for node in g.nodes():
+            i = g.getElemId(gr.MultiGraph.SCOPE_NODE, node)
+            self.assertEqual(g.getNodeAttr(node, 'peso'),
+                    float(i) if i % 2 == 0 else None)
+
+    def test_sparseAttrs(self):
+        g = self.g
+        g.addNodeAttrSpec(gr.AttrSpec('perfil', 'int', 0, sparse=True))
+        nodes = list(g.nodes())
+        for node in nodes:
+            g.setNodeAttr(node, 'perfil', 1 if node == nodes[0] else 0)
+        self.assertEqual(dict(g.nodeAttrs['perfil']), {nodes[0]: 1})
+        self.assertEqual([g.getNodeAttr(n, 'perfil') for n in nodes[:3]],
+                [1, 0, 0])
+        self.assertEqual(set(g.getNodesByAttr('perfil', 0)), set(nodes[1:]))
+
+        # Um AttrSpec normal volta a guardar todos os valores
+        g.addNodeAttrSpec(gr.AttrSpec('perfil', 'int', 0))
+        g.setNodeAttr(nodes[1], 'perfil', 0)
+        self.assertEqual(len(g.nodeAttrs['perfil']), 2)
+
+        g.setEdgeAttrFromDict('contagem', {}, default=0, attrType='int')
+        self.assertEqual(len(g.edgeAttrs['contagem']), 0)
+        edge = next(iter(g.edges()))
+        self.assertEqual(g.getEdgeAttr(edge, 'contagem'), 0)
+
+    def test_byAttr(self):
+        g = self.g
+        rnd = random.Random(5)
+        nodes = list(g.nodes())
+
+        def scan(scope, attr, value):
+            return {e for e in g.elements(scope)
+                    if g.getElemAttr(scope, e, attr) == value}
+
+        self.assertEqual(set(g.getNodesByAttr('preclass', 1)),
+                scan(g.SCOPE_NODE, 'preclass', 1))
+        self.assertTrue(g.nodeAttrs['preclass'].column.hasInverted())
+        for _ in range(200):
+            node = rnd.choice(nodes)
+            if g.hasNode(node):
+                g.setNodeAttr(node, 'preclass', rnd.randrange(4))
+        for node in rnd.sample(nodes, 5):
+            g.removeNode(node)
+        for value in range(5):
+            self.assertEqual(set(g.getNodesByAttr('preclass', value)),
+                    scan(g.SCOPE_NODE, 'preclass', value))
+        self.assertEqual(g.getNodeAttrValueSet('preclass'),
+                {g.getNodeAttr(n, 'preclass') for n in g.nodes()})
+
+        # Elementos sem valor têm o valor padrão do atributo
+        g.addNodeAttrSpec(gr.AttrSpec('preclass', 'int', 0))
+        g.addNode('novo')
+        self.assertIn('novo', g.getNodesByAttr('preclass', 0))
+        self.assertEqual(set(g.getNodesByAttr('preclass', 0)),
+                scan(g.SCOPE_NODE, 'preclass', 0))
+        self.assertEqual(g.getNodesByAttr('inexistente', 1), [])
+
+        edges = set(g.getEdgesByAttr('eclass', 1))
+        self.assertEqual(edges, scan(g.SCOPE_EDGE, 'eclass', 1))
+        g.removeEdgeByAttr('eclass', 1)
+        self.assertTrue(edges)
+        self.assertFalse(edges & set(g.edges()))
+        self.assertEqual(g.getEdgesByAttr('eclass', 1), [])
+
+        numNodes = g.getNumNodes()
+        removed = len(g.getNodesByAttr('preclass', 2))
+        g.removeNodeByAttr('preclass', 2)
+        self.assertEqual(g.getNumNodes(), numNodes - removed)
+        self.assertEqual(scan(g.SCOPE_NODE, 'preclass', 2), set())
+
+    def test_byAttrInView(self):
+        g = self.g
+        view = g.subgraphView(relations=[0])
+        self.assertEqual(set(view.getEdgesByAttr('eclass', 0)),
+                set(view.edges()))
+        view.setNodeAttr(0, 'preclass', 7)
+        self.assertEqual(view.getNodesByAttr('preclass', 7), [0])
+        self.assertEqual(g.getNodesByAttr('preclass', 7), [])
+
+if __name__ == '__main__':
+    unittest.main()
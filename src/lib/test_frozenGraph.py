@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+import unittest
+import graph as gr
+import vecMorphism as vm
+from test_graph import randomGraph, exampleGraph
+
+class FrozenMultiGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.graphs = [exampleGraph()]
+        for seed in range(4):
+            g = randomGraph(60, 150, numRelations=3, seed=seed)
+            g.addNode('isolado')
+            self.graphs.append(g)
+
+    def test_readApi(self):
+        for g in self.graphs:
+            frozen = g.freeze()
+            self.assertEqual(list(frozen.nodes()), list(g.nodes()))
+            self.assertEqual(frozen.getNumEdges(), g.getNumEdges())
+            self.assertEqual(set(frozen.edges()), set(g.edges()))
+            for node in g.nodes():
+                self.assertEqual(sorted(frozen.outNeighboors(node)),
+                        sorted(g.outNeighboors(node)))
+                self.assertEqual(sorted(frozen.inNeighboors(node)),
+                        sorted(g.inNeighboors(node)))
+                self.assertEqual(frozen.getNodeAttr(node, 'preclass'),
+                        g.getNodeAttr(node, 'preclass'))
+            for edge in g.edges():
+                self.assertTrue(frozen.hasEdge(*edge))
+                self.assertEqual(frozen.getEdgeAttr(edge, 'eclass'),
+                        g.getEdgeAttr(edge, 'eclass'))
+            self.assertFalse(frozen.hasEdge(0, 0, 'inexistente'))
+            self.assertFalse(frozen.hasEdge('inexistente', 0, 0))
+
+    def test_independentCopy(self):
+        g = self.graphs[1]
+        frozen = g.freeze()
+        g.setNodeAttr(0, 'preclass', 99)
+        g.addEdge(0, 'novo', 0)
+        self.assertNotEqual(frozen.getNodeAttr(0, 'preclass'), 99)
+        self.assertFalse(frozen.hasNode('novo'))
+
+    def test_thaw(self):
+        for g in self.graphs:
+            g2 = g.freeze().thaw()
+            self.assertEqual(set(g2.nodes()), set(g.nodes()))
+            self.assertEqual(set(g2.edges()), set(g.edges()))
+            self.assertEqual(g2.nodeAttrs, g.nodeAttrs)
+            self.assertEqual(g2.edgeAttrs, g.edgeAttrs)
+            g2.addEdge(0, 'novo', 0)
+
+    def test_thawTypedColumns(self):
+        g = self.graphs[2]
+        g.addNodeAttrSpec(gr.AttrSpec('peso', 'float'))
+        g.addNodeAttrSpec(gr.AttrSpec('conta', 'int', 0, sparse=True))
+        g.addEdgeAttrSpec(gr.AttrSpec('eclass', 'int'))
+        for node in g.nodes():
+            g.setNodeAttr(node, 'peso', 0.5)
+        g.setNodeAttr(1, 'conta', 3)
+        # Buracos nos identificadores de nodos e arestas do grafo original
+        g.removeNode(0)
+        g.removeEdge(*next(iter(g.edges())))
+
+        frozen = g.freeze()
+        self.assertEqual(frozen.nodeAttrs.column('peso').typecode, 'd')
+        self.assertEqual(frozen.getNodeAttr(1, 'conta'), 3)
+        for edge in g.edges():
+            self.assertEqual(frozen.getEdgeAttr(edge, 'eclass'),
+                    g.getEdgeAttr(edge, 'eclass'))
+            self.assertEqual(frozen.getEdgeAttrById(frozen.getEdgeId(edge),
+                'eclass'), g.getEdgeAttr(edge, 'eclass'))
+
+        g2 = frozen.thaw()
+        self.assertEqual(g2.nodeAttrs.column('peso').typecode, 'd')
+        self.assertIsInstance(g2.getNodeAttrColumn('peso')[0], memoryview)
+        self.assertTrue(g2.getNodeAttrSpec('conta').sparse)
+        self.assertEqual(g2.nodeAttrs.column('conta').count(), 1)
+        self.assertEqual(g2.getNodeAttr(2, 'conta'), 0)
+        self.assertEqual(g2.nodeAttrs, g.nodeAttrs)
+        self.assertEqual(g2.edgeAttrs, g.edgeAttrs)
+
+        # As colunas compartilhadas são copiadas na primeira alteração
+        g2.setNodeAttr(1, 'peso', 2.0)
+        g2.setEdgeAttr(next(iter(g2.edges())), 'eclass', 99)
+        self.assertEqual(frozen.getNodeAttr(1, 'peso'), 0.5)
+        self.assertEqual(frozen.edgeAttrs, g.edgeAttrs)
+
+    def test_algorithms(self):
+        for g in self.graphs:
+            frozen = g.freeze()
+            self.assertEqual(gr.regularEquivalence(frozen),
+                    gr.regularEquivalence(g))
+            self.assertEqual(
+                    gr.regularEquivalence(frozen, preClassAttr='preclass'),
+                    gr.regularEquivalence(g, preClassAttr='preclass'))
+            self.assertEqual(
+                    gr.regularEquivalence(frozen, edgeClassAttr='eclass'),
+                    gr.regularEquivalence(g, edgeClassAttr='eclass'))
+            self.assertEqual(gr.weaklyConnectedComponents(frozen),
+                    gr.weaklyConnectedComponents(g))
+
+            nodeClassF = lambda n: g.getNodeAttr(n, 'preclass')
+            edgeClassF = lambda e: e[2]
+            self.assertEqual(
+                    gr.fullMorphismStats(frozen, nodeClassF, edgeClassF),
+                    gr.fullMorphismStats(g, nodeClassF, edgeClassF))
+
+    def test_compiledAdjacency(self):
+        for g in self.graphs:
+            frozen = g.freeze()
+            adj = gr.CompiledAdjacency(frozen)
+            self.assertEqual(adj.nodes, list(g.nodes()))
+            self.assertEqual([(adj.nodes[u], adj.nodes[v],
+                adj.edgeClasses[c]) for u, v, c in adj.edges],
+                list(frozen.edges()))
+            for u, node in enumerate(adj.nodes):
+                self.assertEqual(
+                        sorted((adj.nodes[v], adj.edgeClasses[c])
+                            for v, c in adj.inAdj[u]),
+                        sorted(g.inNeighboors(node)))
+
+            src, tgt, rel = vm.edgeArrays(frozen)
+            self.assertEqual(list(zip(src.tolist(), tgt.tolist(),
+                rel.tolist())), adj.edges)
+
+    def test_writeGraphml(self):
+        tmpDir = tempfile.mkdtemp()
+        try:
+            g = self.graphs[1]
+            g.addNodeAttrSpec(gr.AttrSpec('preclass', 'int'))
+            frozenFile = os.path.join(tmpDir, 'frozen.graphml')
+            g.freeze().writeGraphml(frozenFile)
+            origFile = os.path.join(tmpDir, 'orig.graphml')
+            gr.writeGraphml(g, origFile)
+            g1 = gr.loadGraphml(origFile)
+            g2 = gr.loadGraphml(frozenFile)
+            self.assertEqual(set(g2.edges()), set(g1.edges()))
+            self.assertEqual(g2.nodeAttrs, g1.nodeAttrs)
+        finally:
+            shutil.rmtree(tmpDir)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,878 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+import graph as gr
+from aggregate import AggregatorColumn, NumericAggregator
+
+def naiveRegularEquivalence(graph, preClassAttr=None, edgeClassAttr=None,
+    regularType=gr.REGULAR_TOTAL):
+    """Implementação original, que compara cada par de nodos de uma mesma
+    classe, usada como referência para os testes.
+
+    Return:
+        Lista com a classificação produzida em cada iteração.
+    """
+    if edgeClassAttr is None:
+        def edgeRel(src,tgt,rel):
+            return rel
+    else:
+        def edgeRel(src,tgt,rel):
+            return graph.getEdgeAttr((src, tgt, rel), edgeClassAttr)
+
+    ignoreIn = regularType == gr.REGULAR_SOURCE
+    ignoreOut = regularType == gr.REGULAR_TARGET
+
+    nodes = [(n+1, node) for n, node in enumerate(graph.nodes())]
+
+    if preClassAttr is None:
+        classesAnt = {node:nodes[0][0] for _, node in nodes}
+    else:
+        attrClassNum = {}
+        classesAnt = {}
+        for num, node in nodes:
+            attr = graph.getNodeAttr(node, preClassAttr)
+            classesAnt[node] = attrClassNum.setdefault(attr, num)
+
+    def classesIn(node):
+        return {(classesAnt[v], edgeRel(v,node,r))
+                for v, r in graph.inNeighboors(node)}
+
+    def classesOut(node):
+        return {(classesAnt[v], edgeRel(node,v,r))
+                for v, r in graph.outNeighboors(node)}
+
+    iterations = []
+    changed = True
+    while changed:
+        changed = False
+        classesNow = {node:None for _, node in nodes}
+        for nodeNumber, n1 in nodes:
+            if classesNow[n1] is not None:
+                continue
+            classesNow[n1] = nodeNumber
+            if classesNow[n1] != classesAnt[n1]:
+                changed = True
+            for _, n2 in nodes:
+                if classesAnt[n2] != classesAnt[n1]:
+                    continue
+                if classesNow[n2] is not None:
+                    continue
+                if ((ignoreIn or classesIn(n1) == classesIn(n2))
+                        and (ignoreOut or classesOut(n1) == classesOut(n2))):
+                    classesNow[n2] = classesNow[n1]
+                    if classesNow[n2] != classesAnt[n2]:
+                        changed = True
+        iterations.append(classesNow)
+        classesAnt = classesNow
+
+    return iterations
+
+def naiveSpawnFromClassAttributes(g, nodeClassAttr=None, edgeClassAttr=None,
+        nodeClassDflt=None, edgeClassDflt=None, regIdxPrefix=None,
+        countPrefix=None):
+    """Implementação original de MultiGraph.spawnFromClassAttributes, que
+    percorre o grafo para criar o grafo imagem e novamente em
+    fullMorphismStats, usada como referência para os testes.
+    """
+    def nodeClass(node):
+        if nodeClassAttr is None:
+            return node
+        return g.getNodeAttr(node, nodeClassAttr, nodeClassDflt)
+
+    if edgeClassAttr is not None:
+        adjacency = gr.CompiledAdjacency(g, edgeClassAttr, edgeClassDflt)
+        edgeClasses = [adjacency.edgeClasses[code]
+                for _, _, code in adjacency.edges]
+        relationAttr = edgeClassAttr
+    else:
+        adjacency = None
+        edgeClasses = (rel for _, _, rel in g.edges())
+        relationAttr = 'relation'
+
+    newGraph = gr.MultiGraph()
+
+    nodeAggrNames = g.getAggregatorNames(g.SCOPE_NODE)
+    edgeAggrNames = g.getAggregatorNames(g.SCOPE_EDGE)
+    for name in nodeAggrNames:
+        newGraph.addAggregator(g.SCOPE_NODE, name)
+    for name in edgeAggrNames:
+        newGraph.addAggregator(g.SCOPE_EDGE, name)
+
+    for node in g.nodes():
+        newNode = nodeClass(node)
+        newGraph.addNode(newNode)
+        for aggr in nodeAggrNames:
+            vnew = newGraph.getElemAggregator(g.SCOPE_NODE, newNode, aggr)
+            vnew += g.getElemAggregator(g.SCOPE_NODE, node, aggr)
+
+    for edge, edgeClass in zip(g.edges(), edgeClasses):
+        src, tgt, rel = edge
+        newEdge = (nodeClass(src), nodeClass(tgt), edgeClass)
+        newGraph.addEdge(newEdge[0], newEdge[1], newEdge[2])
+        for aggr in edgeAggrNames:
+            vnew = newGraph.getElemAggregator(g.SCOPE_EDGE, newEdge, aggr)
+            vnew += g.getElemAggregator(g.SCOPE_EDGE, edge, aggr)
+
+    if nodeClassAttr is not None:
+        spec = g.getNodeAttrSpec(nodeClassAttr)
+        if spec is not None:
+            newGraph.addNodeAttrSpec(spec)
+        for node in newGraph.nodes():
+            newGraph.setNodeAttr(node, nodeClassAttr, node)
+
+    stats = gr.fullMorphismStats(g, nodeClass, lambda edge: edge[2],
+            adjacency)
+    gr._setQuotientAttrs(newGraph, relationAttr, stats, countPrefix,
+            regIdxPrefix)
+    return newGraph
+
+def randomGraph(numNodes, numEdges, numRelations=2, numPreClasses=2,
+        seed=None):
+    """Cria um grafo aleatório com os atributos 'preclass' em nodos e
+    'eclass' em arestas.
+    """
+    rnd = random.Random(seed)
+    g = gr.MultiGraph()
+    for n in range(numNodes):
+        g.addNode(n)
+        g.setNodeAttr(n, 'preclass', rnd.randrange(numPreClasses))
+    for _ in range(numEdges):
+        src = rnd.randrange(numNodes)
+        tgt = rnd.randrange(numNodes)
+        rel = rnd.randrange(numRelations)
+        g.addEdge(src, tgt, rel)
+        g.setEdgeAttr((src, tgt, rel), 'eclass', rel % 2)
+    return g
+
+def exampleGraph():
+    """Grafo de exemplo do módulo graph."""
+    g = gr.MultiGraph()
+    for src, tgt in [(0,2), (0,3), (3,0), (3,4), (0,5), (3,5), (0,6), (6,3),
+            (6,5), (6,2), (6,4), (5,3), (5,6), (5,0)]:
+        g.addEdge(src, tgt, 0)
+    return g
+
+class RegularEquivalence(unittest.TestCase):
+
+    def setUp(self):
+        self.graphs = [exampleGraph()]
+        for seed in range(6):
+            self.graphs.append(randomGraph(30, 40 + 10*seed, seed=seed))
+
+        self.configs = []
+        for regularType in gr.REGULAR_TYPES:
+            for preClassAttr in (None, 'preclass'):
+                for edgeClassAttr in (None, 'eclass'):
+                    self.configs.append({'regularType': regularType,
+                        'preClassAttr': preClassAttr,
+                        'edgeClassAttr': edgeClassAttr})
+
+    def test_sameIterationsAsNaive(self):
+        for gNum, g in enumerate(self.graphs):
+            for config in self.configs:
+                expected = naiveRegularEquivalence(g, **config)
+
+                iterations = []
+                def ctrlFunc(i, classes, done, parents):
+                    iterations.append(dict(classes))
+                    return True
+
+                classes = gr.regularEquivalence(g, ctrlFunc=ctrlFunc, **config)
+
+                msg = 'graph {} config {}'.format(gNum, config)
+                self.assertEqual(iterations, expected, msg=msg)
+                self.assertEqual(classes, expected[-1], msg=msg)
+
+    def test_worklistSameIterationsAsNaive(self):
+        for gNum, g in enumerate(self.graphs):
+            for config in self.configs:
+                expected = naiveRegularEquivalence(g, **config)
+
+                iterations = []
+                def ctrlFunc(i, classes, done, parents):
+                    iterations.append(dict(classes))
+                    return True
+
+                classes = gr.regularEquivalence(g, ctrlFunc=ctrlFunc,
+                        worklist=True, **config)
+
+                msg = 'graph {} config {}'.format(gNum, config)
+                self.assertEqual(iterations, expected, msg=msg)
+                self.assertEqual(classes, expected[-1], msg=msg)
+
+    def test_coarsestPartitionSameAsFinal(self):
+        graphs = self.graphs + [randomGraph(120, 100 + 20*seed,
+            numRelations=3, numPreClasses=3, seed=seed) for seed in range(6)]
+        for gNum, g in enumerate(graphs):
+            for config in self.configs:
+                expected = gr.regularEquivalence(g, **config)
+                classes = gr.coarsestRegularPartition(g, **config)
+                msg = 'graph {} config {}'.format(gNum, config)
+                self.assertEqual(classes, expected, msg=msg)
+
+    def test_coarsestPartitionLongPath(self):
+        g = gr.MultiGraph()
+        for n in range(50):
+            g.addEdge(n, n+1, 0)
+        self.assertEqual(gr.coarsestRegularPartition(g),
+                {n: n+1 for n in range(51)})
+
+    def test_newClassesParents(self):
+        g = self.graphs[1]
+        previous = [{n: 1 for n in g.nodes()}]
+        def ctrlFunc(i, classes, done, parents):
+            ant = previous[-1]
+            expected = {c: ant[n] for n, c in classes.items() if c != ant[n]}
+            self.assertEqual(parents, expected)
+            self.assertEqual(done, len(expected) == 0)
+            previous.append(dict(classes))
+            return True
+
+        gr.regularEquivalence(g, ctrlFunc=ctrlFunc)
+
+        previous[1:] = []
+        gr.regularEquivalence(g, ctrlFunc=ctrlFunc, worklist=True)
+
+    def test_ctrlFuncStops(self):
+        g = self.graphs[2]
+        counter = []
+        def ctrlFunc(i, classes, done, parents):
+            counter.append(i)
+            return i < 2
+
+        gr.regularEquivalence(g, ctrlFunc=ctrlFunc)
+        self.assertEqual(counter, [1, 2])
+
+    def test_emptyGraph(self):
+        self.assertEqual(gr.regularEquivalence(gr.MultiGraph()), {})
+        self.assertEqual(gr.coarsestRegularPartition(gr.MultiGraph()), {})
+
+    def test_parallelSameAsSerial(self):
+        # Grafos com muitas componentes, algumas repetidas
+        graphs = [randomGraph(150, 90, numRelations=3, seed=seed)
+                for seed in range(3)]
+        for gNum, g in enumerate(graphs):
+            for config in self.configs:
+                expected = gr.regularEquivalence(g, **config)
+                msg = 'graph {} config {}'.format(gNum, config)
+                for maxWorkers in (1, 2):
+                    shardTimes = []
+                    def shardFunc(shardNum, numNodes, numEdges, elapsed):
+                        shardTimes.append((numNodes, numEdges))
+                    classes = gr.parallelRegularEquivalence(g,
+                            maxWorkers=maxWorkers, numShards=5,
+                            shardFunc=shardFunc, **config)
+                    self.assertEqual(classes, expected, msg=msg)
+                    self.assertEqual(len(shardTimes), 5)
+                    self.assertEqual(sum(n for n, _ in shardTimes),
+                            g.getNumNodes())
+                    self.assertEqual(sum(e for _, e in shardTimes),
+                            g.getNumEdges())
+
+        self.assertEqual(gr.parallelRegularEquivalence(gr.MultiGraph()), {})
+
+class CompiledAdjacency(unittest.TestCase):
+
+    def test_edgeClassCodes(self):
+        g = randomGraph(30, 60, numRelations=3, seed=1)
+        adj = gr.CompiledAdjacency(g, 'eclass')
+        self.assertEqual(adj.getNumNodes(), g.getNumNodes())
+        self.assertEqual(adj.getNumEdges(), g.getNumEdges())
+        self.assertEqual(sorted(adj.edgeClasses), [0, 1])
+        for (u, v, code), edge in zip(adj.edges, g.edges()):
+            self.assertEqual((adj.nodes[u], adj.nodes[v]), edge[:2])
+            self.assertEqual(adj.edgeClasses[code],
+                    g.getEdgeAttr(edge, 'eclass'))
+            self.assertIn((v, code), adj.outAdj[u])
+            self.assertIn((u, code), adj.inAdj[v])
+
+    def test_fullMorphismStats(self):
+        g = randomGraph(30, 60, numRelations=3, seed=2)
+        def nodeClassF(node):
+            return g.getNodeAttr(node, 'preclass')
+        def edgeClassF(edge):
+            return g.getEdgeAttr(edge, 'eclass')
+        expected = gr.fullMorphismStats(g, nodeClassF, edgeClassF)
+        adj = gr.CompiledAdjacency(g, 'eclass')
+        self.assertEqual(gr.fullMorphismStats(g, nodeClassF, None, adj),
+                expected)
+
+class RegularEquivalenceMaintainer(unittest.TestCase):
+
+    def mutate(self, g, rnd, numChanges):
+        """Aplica alterações aleatórias no grafo gerado por randomGraph."""
+        for _ in range(numChanges):
+            op = rnd.randrange(6)
+            nodes = list(g.nodes())
+            if op == 0:
+                node = max(nodes, default=0) + 1
+                g.addNode(node)
+                g.setNodeAttr(node, 'preclass', rnd.randrange(2))
+            elif op == 1 and len(nodes) > 0:
+                g.removeNode(rnd.choice(nodes))
+            elif op == 2 and len(nodes) > 0:
+                g.setNodeAttr(rnd.choice(nodes), 'preclass', rnd.randrange(2))
+            elif op == 3 and g.getNumEdges() > 0:
+                g.removeEdge(*rnd.choice(list(g.edges())))
+            elif op == 4 and g.getNumEdges() > 0:
+                edge = rnd.choice(list(g.edges()))
+                g.setEdgeAttr(edge, 'eclass', rnd.randrange(2))
+            elif len(nodes) > 0:
+                edge = (rnd.choice(nodes), rnd.choice(nodes), rnd.randrange(3))
+                g.addEdge(*edge)
+                g.setEdgeAttr(edge, 'eclass', edge[2] % 2)
+
+    def test_sameAsFromScratch(self):
+        for seed in range(4):
+            rnd = random.Random(seed)
+            for regularType in gr.REGULAR_TYPES:
+                for preClassAttr in (None, 'preclass'):
+                    for edgeClassAttr in (None, 'eclass'):
+                        config = {'regularType': regularType,
+                            'preClassAttr': preClassAttr,
+                            'edgeClassAttr': edgeClassAttr}
+                        g = randomGraph(40, 60, numRelations=3, seed=seed)
+                        maintainer = gr.RegularEquivalenceMaintainer(g,
+                                **config)
+                        for step in range(8):
+                            self.mutate(g, rnd, 1 + step % 4)
+                            msg = 'seed {} step {} config {}'.format(seed,
+                                    step, config)
+                            self.assertEqual(maintainer.classes(),
+                                gr.coarsestRegularPartition(g, **config),
+                                msg=msg)
+                        maintainer.detach()
+                        self.assertEqual(g._changeHandlers, [])
+
+    def test_mergesAfterRemoval(self):
+        # Caminho 0 -> 1 -> 2 e nodo 3 -> 2: ao remover a aresta (0,1) os
+        # nodos 1 e 3 ficam equivalentes
+        g = gr.MultiGraph()
+        for src, tgt in [(0,1), (1,2), (3,2)]:
+            g.addEdge(src, tgt, 0)
+        maintainer = gr.RegularEquivalenceMaintainer(g)
+        self.assertEqual(maintainer.getNumClasses(), 4)
+        g.removeEdge(0, 1, 0)
+        self.assertEqual(maintainer.classes(), {0: 1, 1: 2, 2: 3, 3: 2})
+
+    def test_unknownElemAttr(self):
+        g = randomGraph(10, 20, numRelations=2, seed=1)
+
+        # Handler inserido antes do mantenedor, que recebe a alteração do
+        # atributo do novo nodo antes do evento de inserção
+        def setPreClass(event, *args):
+            if event == gr.MultiGraph.EVENT_ADD_NODE:
+                g.setNodeAttr(args[0], 'preclass', 1)
+        g.addChangeHandler(setPreClass)
+
+        config = {'preClassAttr': 'preclass', 'edgeClassAttr': 'eclass'}
+        maintainer = gr.RegularEquivalenceMaintainer(g, **config)
+        g.addNode('novo')
+        g.addEdge('novo', 0, 0)
+        with self.assertRaises(KeyError):
+            g.setEdgeAttr(('novo', 0, 1), 'eclass', 1)
+        self.assertEqual(maintainer.classes(),
+                gr.coarsestRegularPartition(g, **config))
+
+class EdgeIds(unittest.TestCase):
+
+    def test_stableIds(self):
+        g = randomGraph(30, 80, seed=2)
+        ids = {edge: g.getEdgeId(edge) for edge in g.edges()}
+        self.assertEqual(sorted(g.edgeIds()), sorted(ids.values()))
+        for edge, edgeId in ids.items():
+            self.assertEqual(g.getEdgeById(edgeId), edge)
+            self.assertEqual(g.addEdge(*edge), edgeId)
+            self.assertEqual(g.getEdgeAttrById(edgeId, 'eclass'),
+                    g.getEdgeAttr(edge, 'eclass'))
+
+        removed = next(iter(ids))
+        g.removeEdge(*removed)
+        self.assertIsNone(g.getEdgeId(removed))
+        with self.assertRaises(KeyError):
+            g.getEdgeById(ids[removed])
+        with self.assertRaises(KeyError):
+            g.setEdgeAttrById(ids[removed], 'eclass', 1)
+
+        # Os identificadores não são reaproveitados
+        newId = g.addEdge(*removed)
+        self.assertNotIn(newId, ids.values())
+        self.assertIsNone(g.getEdgeAttrById(newId, 'eclass'))
+        for edge, edgeId in ids.items():
+            if edge != removed:
+                self.assertEqual(g.getEdgeId(edge), edgeId)
+
+    def test_setById(self):
+        g = exampleGraph()
+        events = []
+        g.addChangeHandler(lambda *args: events.append(args))
+        edgeId = g.getEdgeId((0, 2, 0))
+        g.setEdgeAttrById(edgeId, 'peso', 2.5)
+        self.assertEqual(g.getEdgeAttr((0, 2, 0), 'peso'), 2.5)
+        self.assertEqual(events, [(gr.MultiGraph.EVENT_SET_ATTR,
+            gr.MultiGraph.SCOPE_EDGE, (0, 2, 0), 'peso', 2.5)])
+
+    def test_attrOnMissingElement(self):
+        g = exampleGraph()
+        with self.assertRaises(KeyError):
+            g.setEdgeAttr((0, 1, 0), 'peso', 1.0)
+        with self.assertRaises(KeyError):
+            g.setNodeAttr('inexistente', 'peso', 1.0)
+
+class BulkIngestion(unittest.TestCase):
+
+    def setUp(self):
+        rnd = random.Random(4)
+        self.edges = [(rnd.randrange(40), rnd.randrange(40), rnd.randrange(2))
+                for _ in range(300)]
+        self.weights = [rnd.random() for _ in self.edges]
+
+    def perEdge(self, handler=None):
+        g = gr.MultiGraph()
+        if handler is not None:
+            g.addChangeHandler(handler)
+        g.addEdgeAttrSpec(gr.AttrSpec('peso', 'double'))
+        for edge, weight in zip(self.edges, self.weights):
+            if g.hasEdge(*edge):
+                weight += g.getEdgeAttr(edge, 'peso')
+            g.addEdge(*edge)
+            g.setEdgeAttr(edge, 'peso', weight)
+            g.setEdgeAttr(edge, 'rel', edge[2])
+        return g
+
+    def bulk(self, handler=None):
+        g = gr.MultiGraph()
+        if handler is not None:
+            g.addChangeHandler(handler)
+        g.addEdgeAttrSpec(gr.AttrSpec('peso', 'double'))
+        g.addEdgesFrom(self.edges, {'peso': self.weights,
+            'rel': [e[2] for e in self.edges]},
+            combine={'peso': lambda a, b: a + b})
+        return g
+
+    def assertSameGraph(self, g1, g2):
+        self.assertEqual(set(g1.nodes()), set(g2.nodes()))
+        self.assertEqual(set(g1.edges()), set(g2.edges()))
+        self.assertEqual(g1.getNumNodes(), g2.getNumNodes())
+        self.assertEqual(g1.getNumEdges(), g2.getNumEdges())
+        self.assertEqual(g1.relations, g2.relations)
+        self.assertEqual(g1.edgeAttrs, g2.edgeAttrs)
+        for node in g1.nodes():
+            self.assertEqual(set(g1.inNeighboors(node)),
+                    set(g2.inNeighboors(node)))
+
+    def test_addEdgesFrom(self):
+        g = self.bulk()
+        self.assertSameGraph(g, self.perEdge())
+        self.assertLess(g.getNumEdges(), len(self.edges))
+        self.assertEqual(g.edgeAttrs['peso'].column.typecode, 'd')
+
+        # Segunda carga sobre arestas existentes combina os valores
+        g.addEdgesFrom(self.edges[:1], {'peso': [1.0]},
+                combine={'peso': lambda a, b: a + b})
+        self.assertAlmostEqual(g.getEdgeAttr(self.edges[0], 'peso'),
+                self.perEdge().getEdgeAttr(self.edges[0], 'peso') + 1.0)
+
+    def test_changeHandlers(self):
+        events1 = []
+        events2 = []
+        g = self.bulk(lambda *args: events1.append(args))
+        self.assertSameGraph(g, self.perEdge(lambda *args:
+            events2.append(args)))
+        self.assertEqual(events1, events2)
+
+    def test_addNodesFrom(self):
+        g = gr.MultiGraph()
+        g.addNode(0)
+        g.addNodesFrom(range(5), {'c': [None, 1, 2, 3, 4]})
+        self.assertEqual(g.getNumNodes(), 5)
+        self.assertEqual(dict(g.nodeAttrs['c']), {1: 1, 2: 2, 3: 3, 4: 4})
+
+    def test_graphmlRoundTrip(self):
+        g = gr.MultiGraph()
+        g.addNodeAttrSpec(gr.AttrSpec('c', 'int', 7))
+        g.addEdgeAttrSpec(gr.AttrSpec('peso', 'double'))
+        for src, tgt in [('a', 'b'), ('a', 'b'), ('b', 'c')]:
+            rel = 0
+            while g.hasEdge(src, tgt, rel):
+                rel += 1
+            g.addEdge(src, tgt, rel)
+            g.setEdgeAttr((src, tgt, rel), 'peso', 0.5 + rel)
+        g.setNodeAttr('a', 'c', 1)
+        g.addNode('isolado')
+
+        tmpDir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpDir, 'g.graphml')
+            g.writeGraphml(filename)
+            g2 = gr.loadGraphml(filename)
+        finally:
+            shutil.rmtree(tmpDir)
+
+        self.assertEqual(set(g2.edges()), set(g.edges()))
+        self.assertEqual(set(g2.nodes()), set(g.nodes()))
+        self.assertEqual(g2.getNodeAttr('a', 'c'), 1)
+        self.assertEqual(g2.getNodeAttr('b', 'c'), 7)
+        # O <default> da chave não é gravado em cada elemento
+        self.assertEqual(dict(g2.nodeAttrs['c']), {'a': 1})
+        self.assertEqual(g2.getEdgeAttr(('a', 'b', 1), 'peso'), 1.5)
+        self.assertEqual(g2.nodeAttrs['c'].column.typecode, 'q')
+
+    def test_attrValueSetWithDefault(self):
+        graphml = """<?xml version="1.0" encoding="UTF-8"?>
+<graphml xmlns="http://graphml.graphdrawing.org/xmlns">
+  <key id="d0" for="edge" attr.name="relation" attr.type="string">
+    <default>Friend</default>
+  </key>
+  <key id="d1" for="node" attr.name="class" attr.type="int">
+    <default>0</default>
+  </key>
+  <graph edgedefault="directed">
+    <node id="a"><data key="d1">1</data></node>
+    <node id="b"/>
+    <edge source="a" target="b"/>
+    <edge source="b" target="a"><data key="d0">Liker</data></edge>
+  </graph>
+</graphml>
+"""
+        tmpDir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpDir, 'g.graphml')
+            with open(filename, 'w') as f:
+                f.write(graphml)
+            g = gr.loadGraphml(filename)
+        finally:
+            shutil.rmtree(tmpDir)
+
+        # Os valores iguais ao <default> não são guardados nas colunas
+        self.assertEqual(g.getEdgeAttrValueSet('relation'),
+                {'Friend', 'Liker'})
+        self.assertEqual(g.getNodeAttrValueSet('class'), {0, 1})
+        frozen = g.freeze()
+        self.assertEqual(frozen.getEdgeAttrValueSet('relation'),
+                {'Friend', 'Liker'})
+        self.assertEqual(frozen.getNodeAttrValueSet('class'), {0, 1})
+
+        g.setNodeAttr('b', 'class', 1)
+        self.assertEqual(g.getNodeAttrValueSet('class'), {1})
+
+        g.setNodeAttrFromDict('cls', {'a': 2}, default=0, attrType='int')
+        self.assertEqual(g.getNodeAttrValueSet('cls'), {0, 2})
+        g.setNodeAttrFromDict('cls', {'a': 2, 'b': 2}, default=0,
+                attrType='int')
+        self.assertEqual(g.getNodeAttrValueSet('cls'), {2})
+
+class RelationIndex(unittest.TestCase):
+
+    def assertPerRelation(self, g, reference):
+        """Compara as consultas por relação de g com a filtragem da
+        adjacência completa de 'reference'.
+        """
+        for rel in reference.relations | {'inexistente'}:
+            self.assertEqual(set(g.edges(rel)),
+                    {e for e in reference.edges() if e[2] == rel})
+            self.assertEqual(g.getNumEdges(rel),
+                    sum(1 for e in reference.edges() if e[2] == rel))
+            for node in reference.nodes():
+                outs = {(v, r) for v, r in reference.outNeighboors(node)
+                        if r == rel}
+                ins = {(v, r) for v, r in reference.inNeighboors(node)
+                        if r == rel}
+                self.assertEqual(set(g.outNeighboors(node, rel)), outs)
+                self.assertEqual(set(g.inNeighboors(node, rel)), ins)
+                self.assertEqual(g.outDegree(node, rel), len(outs))
+                self.assertEqual(g.inDegree(node, rel), len(ins))
+                self.assertEqual(g.outDegree(node),
+                        len(list(reference.outNeighboors(node))))
+
+    def test_queries(self):
+        g = randomGraph(40, 150, numRelations=3, seed=11)
+        self.assertPerRelation(g, g)
+        self.assertPerRelation(g.freeze(), g)
+        g.buildRelationIndex()
+        self.assertTrue(g.hasRelationIndex())
+        self.assertPerRelation(g, g)
+
+    def test_incremental(self):
+        g = randomGraph(40, 150, numRelations=3, seed=12)
+        g.buildRelationIndex()
+        rnd = random.Random(1)
+        for _ in range(100):
+            src, tgt, rel = (rnd.randrange(45), rnd.randrange(45),
+                    rnd.randrange(4))
+            if rnd.random() < 0.5:
+                g.addEdge(src, tgt, rel)
+            else:
+                g.removeEdge(*rnd.choice(list(g.edges())))
+        g.removeNode(3)
+        g.addEdgesFrom([(0, 1, 'nova'), (1, 2, 'nova'), (0, 1, 'nova')])
+
+        reference = gr.MultiGraph()
+        for edge in g.edges():
+            reference.addEdge(*edge)
+        self.assertPerRelation(g, reference)
+
+        g.dropRelationIndex()
+        self.assertPerRelation(g, reference)
+
+    def test_view(self):
+        g = randomGraph(40, 150, numRelations=3, seed=13)
+        expected = g.subgraphView(relations=[0, 2])
+        expectedClasses = gr.regularEquivalence(expected)
+        copy = gr.MultiGraph()
+        for edge in expected.edges():
+            copy.addEdge(*edge)
+
+        g.buildRelationIndex()
+        view = g.subgraphView(relations=[0, 2])
+        self.assertEqual(set(view.edges()), set(copy.edges()))
+        self.assertEqual(view.getNumEdges(), copy.getNumEdges())
+        self.assertEqual(list(view.edges(1)), [])
+        self.assertEqual(view.getNumEdges(1), 0)
+        for node in copy.nodes():
+            self.assertEqual(set(view.outNeighboors(node)),
+                    set(copy.outNeighboors(node)))
+            self.assertEqual(set(view.inNeighboors(node, 2)),
+                    {(v, r) for v, r in copy.inNeighboors(node) if r == 2})
+        self.assertEqual(gr.regularEquivalence(view), expectedClasses)
+
+class Snapshot(unittest.TestCase):
+
+    @staticmethod
+    def state(g):
+        return (set(g.nodes()), set(g.edges()), g.getNumNodes(),
+                g.getNumEdges(), set(g.relations),
+                {attr: dict(g.nodeAttrs[attr]) for attr in g.nodeAttrs},
+                {attr: dict(g.edgeAttrs[attr]) for attr in g.edgeAttrs},
+                {rel: set(g.edges(rel)) for rel in g.relations},
+                dict(g.graphAttrs))
+
+    def test_copyOnWrite(self):
+        g = randomGraph(40, 150, numRelations=3, seed=21)
+        g.buildRelationIndex()
+        g.addNodeAttrSpec(gr.AttrSpec('conta', 'int', 0, sparse=True))
+        g.setNodeAttr(1, 'conta', 5)
+        g.setGraphAttr('nome', 'g')
+        before = self.state(g)
+
+        s = g.snapshot()
+        self.assertIs(s._adjOut, g._adjOut)
+        self.assertIs(s.nodeAttrs.column('preclass'),
+                g.nodeAttrs.column('preclass'))
+        self.assertEqual(self.state(s), before)
+
+        # Alterações do grafo não chegam à cópia
+        g.setNodeAttr(0, 'preclass', 7)
+        g.nodeAttrs['conta'][2] = 3
+        g.addEdge(0, 'novo', 5)
+        g.removeNode(3)
+        g.setEdgeAttrColumn('eclass', [1] * g.getEdgeIdCapacity())
+        g.getNodeAttrSpec('conta').setDefault(1)
+        g.setGraphAttr('nome', 'alterado')
+        self.assertEqual(self.state(s), before)
+        self.assertEqual(s.getNodeAttr(4, 'conta'), 0)
+        self.assertEqual(g.getNodeAttr(0, 'preclass'), 7)
+        self.assertEqual(set(g.edges(5)), {(0, 'novo', 5)})
+        self.assertEqual(set(s.edges(5)), set())
+
+        # Nem as da cópia chegam ao grafo
+        after = self.state(g)
+        s.removeEdge(*next(iter(s.edges())))
+        s.setNodeAttr(1, 'conta', 0)
+        del s.nodeAttrs['preclass'][5]
+        self.assertEqual(self.state(g), after)
+        self.assertFalse(1 in s.nodeAttrs['conta'])
+
+        # Cópias de cópias, como em GraphAppControl.restoreGraph
+        r = s.snapshot()
+        r.addNodesFrom(['x'], {'preclass': [9]})
+        r.addEdgesFrom([('x', 0, 0)], {'eclass': [4]})
+        self.assertFalse(s.hasNode('x'))
+        self.assertFalse('x' in s.nodeAttrs['preclass'])
+        self.assertEqual(r.getEdgeAttr(('x', 0, 0), 'eclass'), 4)
+
+    def test_onlyFirstWriterCopies(self):
+        g = randomGraph(30, 80, seed=22)
+        s = g.snapshot()
+        r = s.snapshot()
+        adjOut = g._adjOut
+
+        g.addEdge(0, 'novo', 0)
+        self.assertIsNot(g._adjOut, adjOut)
+        s.addEdge(1, 'novo', 0)
+        self.assertIsNot(s._adjOut, adjOut)
+        # O último grafo que usa a estrutura original não a copia
+        r.addEdge(2, 'novo', 0)
+        self.assertIs(r._adjOut, adjOut)
+        self.assertEqual([x.hasEdge(2, 'novo', 0) for x in (g, s, r)],
+                [False, False, True])
+        self.assertEqual([x.hasEdge(0, 'novo', 0) for x in (g, s, r)],
+                [True, False, False])
+
+    def test_sharedAggregators(self):
+        g = randomGraph(30, 80, seed=23)
+        g.addAggregator(g.SCOPE_EDGE, 'um', 1)
+        g.createAggregatorFromAttribute(g.SCOPE_NODE, 'preclass')
+        s = g.snapshot()
+        column = g.aggregators[g.SCOPE_EDGE]['um']
+        self.assertIs(s.aggregators[s.SCOPE_EDGE]['um'], column)
+
+        edge = next(e for e in g.edges() if 0 not in e[:2])
+        aggr = s.getElemAggregator(s.SCOPE_EDGE, edge, 'um')
+        aggr += 4
+        self.assertIs(g.aggregators[g.SCOPE_EDGE]['um'], column)
+        g.removeNode(0)
+        self.assertEqual(g.getAggregator(g.SCOPE_EDGE, 'um')[edge].count, 1)
+        self.assertEqual(s.getAggregator(s.SCOPE_EDGE, 'um')[edge].count, 2)
+        self.assertIn(0, s.getAggregator(s.SCOPE_NODE, 'preclass'))
+        self.assertNotIn(0, g.getAggregator(g.SCOPE_NODE, 'preclass'))
+
+        # Os agregadores do mapa de getAggregator são cópias
+        aggr = g.getAggregator(g.SCOPE_EDGE, 'um')[edge]
+        aggr += 10
+        self.assertEqual(g.getAggregator(g.SCOPE_EDGE, 'um')[edge].count, 1)
+
+class SpawnFromClassAttributes(unittest.TestCase):
+
+    @staticmethod
+    def describe(g):
+        """Tudo o que o grafo gerado contém, na ordem de inserção."""
+        def attrs(store):
+            return {attr: list(store[attr].items()) for attr in store}
+        def specs(specDict):
+            return {name: (spec.type, spec.default, spec.sparse)
+                    for name, spec in specDict.items()}
+        def aggregators(scope):
+            return {name: {elem: str(aggr)
+                    for elem, aggr in g.getAggregator(scope, name).items()}
+                for name in g.getAggregatorNames(scope)}
+        return (list(g.nodes()), list(g.edges()), attrs(g.nodeAttrs),
+                attrs(g.edgeAttrs), g.graphAttrs, specs(g.nodeAttrSpecs),
+                specs(g.edgeAttrSpecs), specs(g.graphAttrSpecs),
+                aggregators(g.SCOPE_NODE), aggregators(g.SCOPE_EDGE))
+
+    @staticmethod
+    def newGraph(seed):
+        g = randomGraph(60, 250, numRelations=3, numPreClasses=4, seed=seed)
+        g.addNodeAttrSpec(gr.AttrSpec('preclass', 'int'))
+        g.addEdge(0, 'semClasse', 1)
+        g.createAggregatorFromAttribute(g.SCOPE_NODE, 'preclass')
+        g.createAggregatorFromAttribute(g.SCOPE_EDGE, 'eclass')
+        return g
+
+    def test_sameAsNaive(self):
+        for args in [{}, {'nodeClassAttr': 'preclass'},
+                {'nodeClassAttr': 'preclass', 'nodeClassDflt': -1},
+                {'nodeClassAttr': 'preclass', 'edgeClassAttr': 'eclass',
+                    'edgeClassDflt': 9},
+                {'edgeClassAttr': 'eclass'}]:
+            for prefixes in [{}, {'countPrefix': 'c', 'regIdxPrefix': 'ri'}]:
+                expected = naiveSpawnFromClassAttributes(self.newGraph(31),
+                        **args, **prefixes)
+                quotient = self.newGraph(31).spawnFromClassAttributes(**args,
+                        **prefixes)
+                self.assertEqual(self.describe(quotient),
+                        self.describe(expected))
+
+    def test_regIdxSpecDefaults(self):
+        q = self.newGraph(31).spawnFromClassAttributes(
+                nodeClassAttr='preclass', regIdxPrefix='ri')
+        for specs in (q.nodeAttrSpecs, q.edgeAttrSpecs):
+            for name, spec in specs.items():
+                if name.startswith('ri'):
+                    self.assertIs(type(spec.default), float)
+
+    def test_graphFromMorphismStatsClassAttr(self):
+        # Classes de tipos diferentes ficam em uma coluna de objetos
+        nodeHits = {1: 2, 'a': 1}
+        edgeHits = {(1, 'a', 0): 1}
+        q = gr.graphFromMorphismStats(nodeHits, edgeHits, edgeHits, edgeHits,
+                nodeClassAttr='c')
+        self.assertIsNone(q.getNodeAttrSpec('c'))
+        self.assertEqual(q.getNodeAttr('a', 'c'), 'a')
+        self.assertEqual(q.getNodeAttr(1, 'c'), 1)
+
+        q = gr.graphFromMorphismStats({}, {}, {}, {}, nodeClassAttr='c',
+                nodeClassSpec=gr.AttrSpec('c', 'int'))
+        self.assertEqual(q.getNumNodes(), 0)
+        self.assertEqual(q.getNodeAttrSpec('c').type, 'int')
+
+class Aggregators(unittest.TestCase):
+
+    def test_elemAggregators(self):
+        g = randomGraph(30, 80, numRelations=2, numPreClasses=3, seed=41)
+        g.createAggregatorFromAttribute(g.SCOPE_NODE, 'preclass')
+        g.addAggregator(g.SCOPE_EDGE, 'um', 1)
+
+        aggrMap = g.getAggregator(g.SCOPE_NODE, 'preclass')
+        self.assertEqual(list(aggrMap), list(g.nodes()))
+        for node in g.nodes():
+            aggr = aggrMap[node]
+            self.assertEqual((aggr.count, aggr.sumX, aggr.min),
+                    (1, g.getNodeAttr(node, 'preclass'),
+                        g.getNodeAttr(node, 'preclass')))
+
+        aggr = g.getElemAggregator(g.SCOPE_NODE, 0, 'preclass')
+        aggr += 10
+        aggr += None
+        self.assertEqual(aggrMap[0].count, 2)
+        self.assertEqual(aggrMap[0].max, 10.0)
+        with self.assertRaises(KeyError):
+            g.getElemAggregator(g.SCOPE_NODE, 'inexistente', 'preclass')
+
+        # Elementos removidos perdem o agregador; novos ficam sem ele até o
+        # primeiro acesso
+        edge = next(iter(g.edges()))
+        g.removeEdge(*edge)
+        g.removeNode(1)
+        g.addNode('novo')
+        self.assertNotIn(edge, g.getAggregator(g.SCOPE_EDGE, 'um'))
+        self.assertNotIn(1, aggrMap)
+        self.assertNotIn('novo', aggrMap)
+        self.assertEqual(len(g.getAggregator(g.SCOPE_EDGE, 'um')),
+                g.getNumEdges())
+
+        g.createAttributesFromAggregator(g.SCOPE_EDGE, 'um', ['count', 'mean'])
+        for e in g.edges():
+            self.assertEqual(g.getEdgeAttr(e, 'um_count'), 1)
+            self.assertEqual(g.getEdgeAttr(e, 'um_mean'), 1.0)
+
+    def test_snapshot(self):
+        g = randomGraph(20, 50, seed=43)
+        g.addAggregator(g.SCOPE_NODE, 'um', 1)
+        s = g.snapshot()
+        g.getElemAggregator(g.SCOPE_NODE, 0, 'um').__iadd__(5)
+        self.assertEqual(str(s.getAggregator(s.SCOPE_NODE, 'um')[0]),
+                '(1,1.0,1.0,1.0,1.0)')
+        self.assertEqual(str(g.getAggregator(g.SCOPE_NODE, 'um')[0]),
+                '(2,6.0,26.0,1.0,5.0)')
+
+    def test_scatterMerge(self):
+        values = [3, None, 1.5, 7, -2, 4]
+        groups = [2, 0, 2, 5, 0, 2]
+        source = AggregatorColumn()
+        for i, value in enumerate(values):
+            source.add(i, value)
+        source.discard(5)
+
+        target = AggregatorColumn()
+        target.add(2, 10)
+        target.scatterMerge(source, range(len(values)), groups)
+
+        expected = {}
+        expected[2] = NumericAggregator()
+        expected[2] += 10
+        for value, group in zip(values[:5], groups):
+            aggr = expected.setdefault(group, NumericAggregator())
+            aggr += value
+        self.assertEqual(list(target.ids()), [0, 2, 5])
+        def stats(aggr):
+            return (aggr.count, aggr.sumX, aggr.sumX2, aggr.min, aggr.max)
+        for i in target.ids():
+            self.assertEqual(stats(target.aggregator(i)),
+                    stats(expected.get(i, NumericAggregator())))
+
+if __name__ == '__main__':
+    unittest.main()
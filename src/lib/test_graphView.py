@@ -0,0 +1,161 @@
+import os
+import shutil
+import tempfile
+import unittest
+import graph as gr
+from test_graph import randomGraph
+
+def filteredCopy(g, keepEdge):
+    """Cópia de g sem as arestas rejeitadas por keepEdge, pelo caminho
+    antigo de remoção de arestas.
+    """
+    copy = g.spawnFromClassAttributes()
+    for edge in list(copy.edges()):
+        if not keepEdge(edge):
+            copy.removeEdge(*edge)
+    for node in g.nodes():
+        copy.setNodeAttr(node, 'preclass', g.getNodeAttr(node, 'preclass'))
+    return copy
+
+class SubgraphView(unittest.TestCase):
+
+    def setUp(self):
+        self.g = randomGraph(60, 200, numRelations=3, seed=7)
+
+    def test_byRelation(self):
+        view = self.g.subgraphView(relations=[1])
+        copy = filteredCopy(self.g, lambda e: e[2] == 1)
+
+        self.assertEqual(set(view.nodes()), set(copy.nodes()))
+        self.assertEqual(set(view.edges()), set(copy.edges()))
+        self.assertEqual(view.getNumEdges(), copy.getNumEdges())
+        self.assertEqual(view.relations, {1})
+        for node in self.g.nodes():
+            self.assertEqual(sorted(view.inNeighboors(node)),
+                    sorted(copy.inNeighboors(node)))
+        self.assertEqual(gr.regularEquivalence(view),
+                gr.regularEquivalence(copy))
+        self.assertEqual(
+                gr.regularEquivalence(view, preClassAttr='preclass'),
+                gr.regularEquivalence(copy, preClassAttr='preclass'))
+        self.assertEqual(gr.weaklyConnectedComponents(view),
+                gr.weaklyConnectedComponents(copy))
+
+    def test_spawnFromView(self):
+        view = self.g.subgraphView(edgeAttrs={'eclass': 0})
+        copy = filteredCopy(self.g, lambda e: self.g.getEdgeAttr(e, 'eclass')
+                == 0)
+        self.assertEqual(set(view.edges()), set(copy.edges()))
+
+        q1 = view.spawnFromClassAttributes(nodeClassAttr='preclass',
+                countPrefix='c', regIdxPrefix='ri')
+        q2 = copy.spawnFromClassAttributes(nodeClassAttr='preclass',
+                countPrefix='c', regIdxPrefix='ri')
+        self.assertEqual(set(q1.edges()), set(q2.edges()))
+        self.assertEqual(q1.nodeAttrs, q2.nodeAttrs)
+        self.assertEqual(q1.edgeAttrs, q2.edgeAttrs)
+        self.assertEqual(q1.graphAttrs, q2.graphAttrs)
+
+    def test_nodeFilter(self):
+        view = self.g.subgraphView(nodeAttrs={'preclass': 1},
+                edgeFilter=lambda e: e[2] != 2)
+        nodes = {n for n in self.g.nodes()
+                if self.g.getNodeAttr(n, 'preclass') == 1}
+        self.assertEqual(set(view.nodes()), nodes)
+        self.assertEqual(set(view.edges()), {(s, t, r)
+            for s, t, r in self.g.edges()
+            if s in nodes and t in nodes and r != 2})
+        self.assertEqual({view.getEdgeById(i) for i in view.edgeIds()},
+                set(view.edges()))
+        self.assertFalse(view.hasNode(next(n for n in self.g.nodes()
+            if n not in nodes)))
+
+        nested = view.subgraphView(relations=[0])
+        self.assertEqual(set(nested.edges()),
+                {e for e in view.edges() if e[2] == 0})
+
+    def test_writesStayInView(self):
+        g = self.g
+        attrNames = g.getNodeAttrNames()
+        view = g.subgraphView(relations=[0, 1])
+        view.classifyNodesRegularEquivalence(classAttr='class')
+        view.setNodeAttr(0, 'preclass', 99)
+
+        self.assertEqual(g.getNodeAttrNames(), attrNames)
+        self.assertNotEqual(g.getNodeAttr(0, 'preclass'), 99)
+        self.assertEqual(view.getNodeAttr(0, 'preclass'), 99)
+        self.assertEqual(view.getNodeAttrSpec('class').type, 'int')
+        self.assertIsNone(g.getNodeAttrSpec('class'))
+
+        # A visão acompanha alterações no pai
+        g.addEdge(0, 'novo', 1)
+        self.assertTrue(view.hasEdge(0, 'novo', 1))
+        g.addEdge(0, 'novo', 2)
+        self.assertFalse(view.hasEdge(0, 'novo', 2))
+
+    def test_parentRemovesElemWithViewAttr(self):
+        g = self.g
+        view = g.subgraphView()
+        view.setNodeAttr(3, 'x', 1)
+        view.setNodeAttr(4, 'x', 2)
+        edge = next(iter(g.edges()))
+        view.setEdgeAttr(edge, 'y', 5)
+
+        g.removeNode(3)
+        g.removeEdge(*edge)
+        self.assertEqual(dict(view.nodeAttrs['x'].items()), {4: 2})
+        self.assertEqual(len(view.nodeAttrs['x']), 1)
+        self.assertEqual(dict(view.edgeAttrs['y']), {})
+        self.assertEqual(len(view.edgeAttrs['y']), 0)
+        self.assertIsNone(view.getNodeAttr(3, 'x'))
+
+    def test_attrFromDictLikeGraph(self):
+        g = self.g
+        view = g.subgraphView()
+        copy = g.spawnFromClassAttributes()
+        edge = next(iter(g.edges()))
+        for target in (view, copy):
+            target.setNodeAttrFromDict('c', {0: 2, 1: 0}, default=0,
+                    attrType='int')
+            target.setEdgeAttrFromDict('e', {edge: 5}, default=1,
+                    attrType='int')
+
+        for scope, attr in ((g.SCOPE_NODE, 'c'), (g.SCOPE_EDGE, 'e')):
+            viewSpec = view.getAttrSpec(scope, attr)
+            spec = copy.getAttrSpec(scope, attr)
+            self.assertEqual((viewSpec.type, viewSpec.default, viewSpec.sparse),
+                    (spec.type, spec.default, spec.sparse))
+            self.assertEqual(dict(view.attrs[scope][attr]),
+                    dict(copy.attrs[scope][attr]))
+        self.assertEqual(dict(view.nodeAttrs['c']), {0: 2})
+        self.assertEqual(view.getEdgeAttr(edge, 'e'), 5)
+        self.assertEqual(view.getEdgeAttr(next(e for e in g.edges()
+            if e != edge), 'e'), 1)
+
+    def test_materialize(self):
+        view = self.g.subgraphView(relations=[2])
+        view.setNodeAttr(3, 'extra', 'x')
+        m = view.materialize()
+        self.assertEqual(set(m.edges()), set(view.edges()))
+        self.assertEqual(m.getNodeAttr(3, 'extra'), 'x')
+        self.assertEqual(dict(m.edgeAttrs['eclass']),
+                {e: self.g.getEdgeAttr(e, 'eclass') for e in view.edges()})
+        m.addEdge(0, 1, 5)
+        self.assertFalse(self.g.hasEdge(0, 1, 5))
+
+        tmpDir = tempfile.mkdtemp()
+        try:
+            viewFile = os.path.join(tmpDir, 'view.graphml')
+            view.writeGraphml(viewFile)
+            copyFile = os.path.join(tmpDir, 'copy.graphml')
+            m.removeEdge(0, 1, 5)
+            m.writeGraphml(copyFile)
+            g1 = gr.loadGraphml(viewFile)
+            g2 = gr.loadGraphml(copyFile)
+            self.assertEqual(set(g1.edges()), set(g2.edges()))
+            self.assertEqual(g1.nodeAttrs, g2.nodeAttrs)
+        finally:
+            shutil.rmtree(tmpDir)
+
+if __name__ == '__main__':
+    unittest.main()
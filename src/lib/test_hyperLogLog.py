@@ -0,0 +1,112 @@
+import functools
+import unittest
+import graph as gr
+from hyperLogLog import HyperLogLog, precisionForError
+from test_graph import randomGraph
+
+class HyperLogLogTest(unittest.TestCase):
+
+    def test_exactWhileSparse(self):
+        h = HyperLogLog()
+        for i in range(300):
+            h.add(i)
+            h.add(i)
+        self.assertTrue(h.isExact())
+        self.assertEqual(h.count(), 300)
+        self.assertEqual(h.stdError(), 0.0)
+
+    def test_denseWhenHashesOutgrowRegisters(self):
+        h = HyperLogLog(precision=10)
+        for i in range(128):
+            h.add(('n', i))
+        self.assertTrue(h.isExact())
+        self.assertEqual(h._hashes.itemsize * len(h._hashes), 1 << 10)
+        h.add(('n', 128))
+        self.assertFalse(h.isExact())
+        self.assertEqual(len(h._registers), 1 << 10)
+
+    def test_estimate(self):
+        h = HyperLogLog(errorRate=0.01)
+        self.assertEqual(precisionForError(0.01), 14)
+        n = 50000
+        for i in range(n):
+            h.add(i)
+        self.assertFalse(h.isExact())
+        self.assertLess(abs(h.count() - n), 3 * h.stdError())
+        self.assertAlmostEqual(h.stdError() / n, 0.0081, places=3)
+
+    def test_merge(self):
+        a = HyperLogLog(precision=10)
+        b = HyperLogLog(precision=10)
+        union = HyperLogLog(precision=10)
+        for i in range(3000):
+            a.add(i)
+            union.add(i)
+        for i in range(2000, 2010):
+            b.add(i)
+            union.add(i)
+        b.merge(a)
+        a.merge(union)
+        self.assertEqual(a.count(), union.count())
+        self.assertEqual(b.count(), union.count())
+
+        with self.assertRaises(ValueError):
+            a.merge(HyperLogLog(precision=11))
+
+class ApproxMorphismStats(unittest.TestCase):
+
+    def test_smallClassesAreExact(self):
+        g = randomGraph(60, 150, numPreClasses=3, seed=7)
+        nodeClassF = lambda n: g.getNodeAttr(n, 'preclass')
+        countErrors = {}
+        stats = gr.fullMorphismStats(g, nodeClassF, lambda e: e[2],
+                distinctCounter=HyperLogLog, countErrors=countErrors)
+        self.assertEqual(stats,
+                gr.fullMorphismStats(g, nodeClassF, lambda e: e[2]))
+        self.assertEqual(gr.calcGraphRegIdxError(
+            gr.calcPreRegIdxStats(*stats), countErrors), (0.0, 0.0, 0.0))
+
+    def test_errorPropagation(self):
+        g = randomGraph(4000, 12000, numRelations=1, numPreClasses=2, seed=2)
+        nodeClassF = lambda n: g.getNodeAttr(n, 'preclass')
+        adj = gr.CompiledAdjacency(g)
+
+        exact = gr.calcPreRegIdxStats(
+                *gr.fullMorphismStats(g, nodeClassF, None, adj))
+        countErrors = {}
+        stats = gr.fullMorphismStats(g, nodeClassF, None, adj,
+                functools.partial(HyperLogLog, precision=8), countErrors)
+        approx = gr.calcPreRegIdxStats(*stats)
+
+        self.assertTrue(all(e.ns > 0 and e.nt > 0
+            for e in countErrors.values()))
+        for edge, (ns, ds, nt, dt, ec) in exact.items():
+            errNs, errNt = countErrors[edge]
+            self.assertLess(abs(approx[edge].ns - ns), 3 * errNs)
+            self.assertLess(abs(approx[edge].nt - nt), 3 * errNt)
+
+        ri = gr.calcGraphRegIdx(exact)
+        riApprox = gr.calcGraphRegIdx(approx)
+        riErr = gr.calcGraphRegIdxError(approx, countErrors)
+        for v, vApprox, err in zip(ri, riApprox, riErr):
+            self.assertLess(abs(v - vApprox), 3 * err)
+
+        nodeErr = gr.calcNodeRegIdxError(stats[0], approx,
+                countErrors)
+        self.assertTrue(all(e.ri > 0 for e in nodeErr.values()))
+        edgeErr = gr.calcEdgeRegIdxError(approx, countErrors)
+        self.assertEqual(set(edgeErr), set(approx))
+
+    def test_aggregateClassAttr(self):
+        g = randomGraph(40, 100, seed=4)
+        nodeAttrs, edgeAttrs, nodeSpecs, edgeSpecs = gr.aggregateClassAttr(g,
+                'preclass', 'eclass', distinctCounter=HyperLogLog)
+        exact = gr.aggregateClassAttr(g, 'preclass', 'eclass')[1]
+        self.assertEqual(edgeAttrs['eclass_srcCount'],
+                exact['eclass_srcCount'])
+        self.assertTrue(all(err == 0.0
+            for err in edgeAttrs['eclass_srcCountErr'].values()))
+        self.assertNotIn('eclass_srcCountErr', exact)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+import graph as gr
+from refinementTree import RefinementTree, refinementMorphismStats
+from test_graph import randomGraph
+
+class RefinementTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.g = randomGraph(60, 80, numRelations=2, seed=3)
+        self.iterations = []
+        self.parents = []
+        def ctrlFunc(i, classes, done, parents):
+            if not done:
+                self.iterations.append(dict(classes))
+                self.parents.append(parents)
+                self.tree.addLevel(classes, parents)
+            return True
+
+        self.tree = RefinementTree(self.g.nodes())
+        gr.regularEquivalence(self.g, ctrlFunc=ctrlFunc, worklist=True)
+
+    def test_levels(self):
+        tree = self.tree
+        self.assertEqual(tree.getNumLevels(), len(self.iterations))
+        self.assertGreater(tree.getNumLevels(), 2)
+        for level, classes in enumerate(self.iterations):
+            self.assertEqual(tree.getClasses(level), classes)
+            self.assertEqual(tree.getNewClassesParents(level),
+                    self.parents[level])
+            if level > 0:
+                ant = self.iterations[level - 1]
+                self.assertEqual(set(tree.getMovedNodes(level)),
+                        {n for n, c in classes.items() if ant[n] != c})
+
+        for level, vector in tree.iterClassVectors():
+            self.assertEqual(dict(zip(tree.nodes, vector)),
+                    self.iterations[level])
+
+    def test_saveLoad(self):
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            self.tree.save(filename)
+            tree = RefinementTree.load(filename)
+        finally:
+            os.remove(filename)
+
+        self.assertEqual(tree.getNumLevels(), self.tree.getNumLevels())
+        for level in range(tree.getNumLevels()):
+            self.assertEqual(tree.getClasses(level),
+                    self.tree.getClasses(level))
+            self.assertEqual(tree.getNewClassesParents(level),
+                    self.tree.getNewClassesParents(level))
+
+        # A árvore carregada pode continuar recebendo níveis
+        last = self.iterations[-1]
+        tree.addLevel(last)
+        self.assertEqual(tree.getMovedNodes(tree.getNumLevels() - 1), [])
+
+    def test_morphismStats(self):
+        levelStats = refinementMorphismStats(self.g, self.tree)
+        self.assertEqual(len(levelStats), len(self.iterations))
+        for classes, stats in zip(self.iterations, levelStats):
+            self.assertEqual(stats, gr.fullMorphismStats(self.g,
+                lambda n: classes[n], lambda e: e[2]))
+
+    def test_morphismStatsEdgeClass(self):
+        tree = RefinementTree(self.g.nodes())
+        def ctrlFunc(i, classes, done, parents):
+            if not done:
+                tree.addLevel(classes, parents)
+            return True
+        gr.regularEquivalence(self.g, 'preclass', 'eclass', ctrlFunc=ctrlFunc)
+
+        levelStats = refinementMorphismStats(self.g, tree, 'eclass')
+        for level, stats in enumerate(levelStats):
+            classes = tree.getClasses(level)
+            expected = gr.fullMorphismStats(self.g, lambda n: classes[n],
+                    lambda e: self.g.getEdgeAttr(e, 'eclass'))
+            self.assertEqual(stats, expected)
+
+        # O grafo imagem gerado das estatísticas é o de
+        # spawnFromClassAttributes
+        self.g.addNodeAttrSpec(gr.AttrSpec('cls', 'int'))
+        self.g.setNodeAttrFromDict('cls', classes)
+        expected = self.g.spawnFromClassAttributes('cls', 'eclass',
+                regIdxPrefix='ri', countPrefix='n')
+        quotient = gr.graphFromMorphismStats(*levelStats[-1],
+                nodeClassAttr='cls', relationAttr='eclass',
+                regIdxPrefix='ri', countPrefix='n',
+                nodeClassSpec=self.g.getNodeAttrSpec('cls'))
+        self.assertEqual(quotient.getNodeAttrSpec('cls').type, 'int')
+        self.assertEqual(set(quotient.nodes()), set(expected.nodes()))
+        self.assertEqual(set(quotient.edges()), set(expected.edges()))
+        for attr in ['cls', 'n_node', 'ri', 'ri_node']:
+            for node in expected.nodes():
+                self.assertEqual(quotient.getNodeAttr(node, attr),
+                        expected.getNodeAttr(node, attr))
+        for attr in ['eclass', 'n_src', 'n_tgt', 'n_edge', 'ri_src']:
+            for edge in expected.edges():
+                self.assertEqual(quotient.getEdgeAttr(edge, attr),
+                        expected.getEdgeAttr(edge, attr))
+        self.assertEqual(quotient.getGraphAttr('ri'),
+                expected.getGraphAttr('ri'))
+
+    def test_morphismStatsNotNested(self):
+        g = gr.MultiGraph()
+        for src, tgt in [(0, 1), (1, 2), (2, 3)]:
+            g.addEdge(src, tgt, 0)
+        tree = RefinementTree([0, 1, 2, 3])
+        tree.addLevel({0: 0, 1: 0, 2: 2, 3: 2})
+        tree.addLevel({0: 0, 1: 1, 2: 1, 3: 3})
+        with self.assertRaises(ValueError):
+            refinementMorphismStats(g, tree)
+
+    def test_invalidLevel(self):
+        with self.assertRaises(IndexError):
+            self.tree.getClasses(self.tree.getNumLevels())
+
+if __name__ == '__main__':
+    unittest.main()
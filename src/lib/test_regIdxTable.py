@@ -0,0 +1,89 @@
+import unittest
+import numpy as np
+import graph as gr
+import vecMorphism as vm
+import regIdxTable as rt
+from test_graph import randomGraph
+
+class RegIdxTableTest(unittest.TestCase):
+
+    def setUp(self):
+        self.g = randomGraph(60, 150, numRelations=3, numPreClasses=5, seed=9)
+        # Classe sem arestas
+        self.g.addNode('isolado')
+        self.g.setNodeAttr('isolado', 'preclass', 9)
+        self.nodeClassF = lambda n: self.g.getNodeAttr(n, 'preclass')
+        self.stats = gr.fullMorphismStats(self.g, self.nodeClassF,
+                lambda e: e[2])
+        self.preStats = gr.calcPreRegIdxStats(*self.stats)
+        self.tables = rt.preRegIdxTables(*self.stats)
+
+    def assertTableEqual(self, table, expected):
+        self.assertEqual(set(table.keys), set(expected))
+        for field, name in enumerate(table.getColumnNames()):
+            view = table.view(name)
+            for key, values in expected.items():
+                self.assertAlmostEqual(view[key], values[field])
+
+    def test_preStats(self):
+        edges = self.tables.edges
+        for edge, stats in self.preStats.items():
+            row = edges.row(edge)
+            self.assertEqual(tuple(row[c] for c in stats._fields), stats)
+
+    def test_regIdx(self):
+        self.assertTableEqual(rt.calcEdgeRegIdxTable(self.tables),
+                gr.calcEdgeRegIdx(self.preStats))
+        self.assertTableEqual(rt.calcNodeRegIdxTable(self.tables),
+                gr.calcNodeRegIdx(self.stats[0], self.preStats))
+        for v1, v2 in zip(rt.calcGraphRegIdxTable(self.tables),
+                gr.calcGraphRegIdx(self.preStats)):
+            self.assertAlmostEqual(v1, v2)
+
+    def test_fromArrays(self):
+        adj = gr.CompiledAdjacency(self.g)
+        classValues = sorted(set(map(self.nodeClassF, adj.nodes)))
+        code = {c: i for i, c in enumerate(classValues)}
+        nodeClass = np.array([code[self.nodeClassF(n)] for n in adj.nodes])
+        arrays = vm.morphismStatsArrays(nodeClass, *vm.edgeArrays(adj))
+        tables = rt.preRegIdxTablesFromArrays(arrays, classValues,
+                adj.edgeClasses)
+
+        for name in ('ns', 'ds', 'nt', 'dt', 'ec'):
+            self.assertEqual(dict(tables.edges.view(name)),
+                    dict(self.tables.edges.view(name)))
+        self.assertEqual(dict(tables.nodes.view('d')), self.stats[0])
+
+    def test_view(self):
+        view = rt.calcEdgeRegIdxTable(self.tables).view('sri')
+        self.assertEqual(len(view), len(self.preStats))
+        edge = next(iter(self.preStats))
+        self.assertIn(edge, view)
+        self.assertIsInstance(view[edge], float)
+        self.assertEqual(view.get('inexistente', -1), -1)
+        with self.assertRaises(KeyError):
+            view['inexistente']
+
+    def test_setRegIdxAttrs(self):
+        self.g.addNodeAttrSpec(gr.AttrSpec('preclass', 'int'))
+        expected = self.g.spawnFromClassAttributes('preclass',
+                regIdxPrefix='ri')
+        quotient = gr.graphFromMorphismStats(*self.stats,
+                nodeClassAttr='preclass')
+        rt.setRegIdxAttrs(quotient, self.tables, 'ri')
+
+        for suffix in ('', '_src', '_tgt'):
+            self.assertAlmostEqual(quotient.getGraphAttr('ri' + suffix),
+                    expected.getGraphAttr('ri' + suffix))
+            for edge in expected.edges():
+                self.assertAlmostEqual(
+                        quotient.getEdgeAttr(edge, 'ri' + suffix),
+                        expected.getEdgeAttr(edge, 'ri' + suffix))
+        for suffix in ('', '_node', '_src', '_tgt'):
+            for node in expected.nodes():
+                self.assertAlmostEqual(
+                        quotient.getNodeAttr(node, 'ri' + suffix),
+                        expected.getNodeAttr(node, 'ri' + suffix))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import random
+import unittest
+import graph as gr
+from regIdxTracker import RegIdxTracker
+from test_graph import randomGraph
+
+def fullRegIdx(g, nodeClass, edgeClassAttr=None):
+    if edgeClassAttr is None:
+        edgeClassF = lambda e: e[2]
+    else:
+        edgeClassF = lambda e: g.getEdgeAttr(e, edgeClassAttr)
+    stats = gr.fullMorphismStats(g, lambda n: nodeClass[n], edgeClassF)
+    return gr.calcGraphRegIdx(gr.calcPreRegIdxStats(*stats))
+
+class RegIdxTrackerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rnd = random.Random(5)
+        self.g = randomGraph(50, 120, numRelations=3, seed=5)
+        # Laços
+        for n in range(5):
+            self.g.addEdge(n, n, 0)
+        self.nodeClass = {n: self.rnd.randrange(4) for n in self.g.nodes()}
+
+    def assertRegIdxEqual(self, r1, r2):
+        for v1, v2 in zip(r1, r2):
+            self.assertAlmostEqual(v1, v2)
+
+    def test_moves(self):
+        for edgeClassAttr in (None, 'eclass'):
+            nodeClass = dict(self.nodeClass)
+            tracker = RegIdxTracker(self.g, nodeClass, edgeClassAttr)
+            self.assertRegIdxEqual(tracker.getRegIdx(),
+                    fullRegIdx(self.g, nodeClass, edgeClassAttr))
+
+            nodes = list(self.g.nodes())
+            for _ in range(200):
+                node = self.rnd.choice(nodes)
+                # Permite classes novas
+                newClass = self.rnd.randrange(6)
+                nodeClass[node] = newClass
+                tracker.moveNode(node, newClass)
+                self.assertRegIdxEqual(tracker.getRegIdx(),
+                        fullRegIdx(self.g, nodeClass, edgeClassAttr))
+
+            self.assertEqual(tracker.getNodeClasses(), nodeClass)
+
+    def test_evalMove(self):
+        tracker = RegIdxTracker(self.g, self.nodeClass)
+        before = tracker.getRegIdx()
+        for node in list(self.g.nodes())[:20]:
+            newClass = (self.nodeClass[node] + 1) % 4
+            expectedClass = dict(self.nodeClass)
+            expectedClass[node] = newClass
+            self.assertRegIdxEqual(tracker.evalMove(node, newClass),
+                    fullRegIdx(self.g, expectedClass))
+            self.assertEqual(tracker.getRegIdx(), before)
+        self.assertEqual(tracker.getNodeClasses(), self.nodeClass)
+
+    def test_setNodeClasses(self):
+        tracker = RegIdxTracker(self.g, self.nodeClass)
+        nodeClass = dict(self.nodeClass)
+        for node in list(nodeClass)[:10]:
+            nodeClass[node] = 7
+        self.assertLessEqual(tracker.setNodeClasses(nodeClass), 10)
+        self.assertRegIdxEqual(tracker.getRegIdx(),
+                fullRegIdx(self.g, nodeClass))
+
+    def test_morphismStats(self):
+        tracker = RegIdxTracker(self.g, self.nodeClass)
+        for node in list(self.g.nodes())[:10]:
+            tracker.moveNode(node, 4)
+            self.nodeClass[node] = 4
+        self.assertEqual(tracker.getMorphismStats(),
+                gr.fullMorphismStats(self.g, lambda n: self.nodeClass[n],
+                    lambda e: e[2]))
+
+        names = 'abcde'
+        self.assertEqual(tracker.getMorphismStats(names),
+                gr.fullMorphismStats(self.g,
+                    lambda n: names[self.nodeClass[n]], lambda e: e[2]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+import graph as gr
+import streamMorphism as sm
+from test_graph import randomGraph
+
+class StreamMorphismStats(unittest.TestCase):
+
+    def setUp(self):
+        self.g = randomGraph(80, 200, numRelations=3, numPreClasses=4, seed=5)
+        self.nodeClass = {str(n): self.g.getNodeAttr(n, 'preclass')
+                for n in self.g.nodes()}
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def writeCsv(self, name, header, rows):
+        filename = os.path.join(self.dir, name)
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC,
+                    lineterminator='\n', **sm.FACECSV_FORMAT)
+            writer.writerow(header)
+            writer.writerows(rows)
+        return filename
+
+    def expectedStats(self, edgeClassF):
+        return gr.fullMorphismStats(self.g,
+                lambda n: self.nodeClass[str(n)], edgeClassF)
+
+    def test_csv(self):
+        edgesFile = self.writeCsv('edges.csv',
+                ['src', 'tgt', 'relation', 'weight'],
+                [(str(s), str(t), r, 1.0) for s, t, r in self.g.edges()])
+        classFile = self.writeCsv('classes.csv', ['node', 'class'],
+                self.nodeClass.items())
+
+        nodeClass = sm.readNodeClassCsv(classFile, classType=int)
+        self.assertEqual(nodeClass, self.nodeClass)
+
+        progress = []
+        stats = sm.streamMorphismStats(nodeClass,
+                sm.iterCsvEdges(edgesFile, 'src', 'tgt', 'relation'),
+                chunkSize=64, ctrlFunc=progress.append)
+
+        self.assertEqual(stats, self.expectedStats(lambda e: str(e[2])))
+        self.assertEqual(progress, [64, 128, 192, self.g.getNumEdges()])
+        # As estatísticas servem às funções de graph sem conversão
+        gr.calcGraphRegIdx(gr.calcPreRegIdxStats(*stats))
+
+    def test_graphml(self):
+        filename = os.path.join(self.dir, 'g.graphml')
+        self.g.addEdgeAttrSpec(gr.AttrSpec('eclass', 'int'))
+        gr.writeGraphml(self.g, filename)
+
+        stats = sm.streamMorphismStats(self.nodeClass,
+                sm.iterGraphmlEdges(filename, relationAttr='eclass'))
+        self.assertEqual(stats, self.expectedStats(
+            lambda e: self.g.getEdgeAttr(e, 'eclass')))
+
+    def test_unmappedNodes(self):
+        edges = [(str(s), str(t), r) for s, t, r in self.g.edges()]
+        missing = {s for s, t, r in edges[:10]}
+        nodeClass = {n: c for n, c in self.nodeClass.items()
+                if n not in missing}
+
+        with self.assertRaises(KeyError):
+            sm.streamMorphismStats(nodeClass, edges)
+
+        stats = sm.streamMorphismStats(nodeClass, edges, dfltClass=-1)
+        self.nodeClass.update((n, -1) for n in missing)
+        expected = self.expectedStats(lambda e: e[2])
+        self.assertEqual(stats[1:], expected[1:])
+        self.assertEqual(stats[0][-1], len(missing))
+
+if __name__ == '__main__':
+    unittest.main()
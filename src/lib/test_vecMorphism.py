@@ -0,0 +1,65 @@
+import unittest
+import numpy as np
+import graph as gr
+import vecMorphism as vm
+from test_graph import randomGraph
+
+class VecMorphismStats(unittest.TestCase):
+
+    def setUp(self):
+        self.g = randomGraph(80, 200, numRelations=3, numPreClasses=5, seed=4)
+        self.adj = gr.CompiledAdjacency(self.g)
+
+    def nodeClassF(self, node):
+        return self.g.getNodeAttr(node, 'preclass')
+
+    def test_sameAsFullMorphismStats(self):
+        expected = gr.fullMorphismStats(self.g, self.nodeClassF,
+                lambda e: e[2])
+        self.assertEqual(vm.fullMorphismStats(self.adj, self.nodeClassF),
+                expected)
+
+    def test_graphRegIdx(self):
+        expected = gr.calcGraphRegIdx(gr.calcPreRegIdxStats(
+            *gr.fullMorphismStats(self.g, self.nodeClassF, lambda e: e[2])))
+
+        nodeClass = [self.nodeClassF(n) for n in self.adj.nodes]
+        stats = vm.morphismStatsArrays(nodeClass, *vm.edgeArrays(self.adj))
+        regIdx = vm.calcGraphRegIdxArrays(stats)
+        for v1, v2 in zip(regIdx, expected):
+            self.assertAlmostEqual(v1, v2)
+
+    def test_populationRegIdx(self):
+        src, tgt, rel = vm.edgeArrays(self.adj)
+        population = np.random.default_rng(1).integers(0, 6,
+                size=(7, len(self.adj.nodes)))
+        for maxElems in (2**22, 500):
+            regIdx = vm.populationRegIdx(population, src, tgt, rel,
+                    maxElems=maxElems)
+            for p, classes in enumerate(population.tolist()):
+                nodeClass = dict(zip(self.adj.nodes, classes))
+                expected = gr.calcGraphRegIdx(gr.calcPreRegIdxStats(
+                    *gr.fullMorphismStats(self.g, lambda n: nodeClass[n],
+                        lambda e: e[2])))
+                for field, value in zip(regIdx, expected):
+                    self.assertAlmostEqual(field[p], value)
+
+    def test_populationRegIdxNoEdges(self):
+        empty = np.zeros(0, dtype=np.int64)
+        with self.assertRaises(ValueError):
+            vm.populationRegIdx(np.zeros((3, 4), dtype=np.int64), empty,
+                    empty, empty)
+
+    def test_unpackedKeys(self):
+        # Limites muito grandes forçam o agrupamento sem empacotamento
+        cols = [np.array([0, 1, 1, 0, 1]), np.array([1, 2, 2, 1, 0]),
+                np.array([0, 0, 0, 0, 1])]
+        packed = vm._uniqueKeys(cols, [3, 3, 2])
+        unpacked = vm._uniqueKeys(cols, [2**40, 2**40, 2**40])
+        for a, b in zip(packed[0] + list(packed[1:]),
+                unpacked[0] + list(unpacked[1:])):
+            self.assertEqual(a.tolist(), b.tolist())
+        self.assertEqual(packed[2].tolist(), [2, 1, 2])
+
+if __name__ == '__main__':
+    unittest.main()
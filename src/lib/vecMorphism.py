@@ -0,0 +1,305 @@
+# coding: utf-8
+"""Versão vetorizada com numpy das estatísticas do homomorfismo cheio
+calculadas por graph.fullMorphismStats.
+
+Os nodos do grafo domínio são representados por índices, as classes de nodos
+por um vetor de inteiros 'nodeClass' (nodeClass[i] é a classe do nodo i) e as
+arestas por três vetores de inteiros 'src', 'tgt' e 'rel'. As arestas do grafo
+imagem são identificadas por uma chave inteira que empacota a tripla (classe
+de origem, classe de destino, relação), o que permite contar arestas e pares
+(aresta, nodo) distintos com np.unique e np.bincount, sem laços em Python.
+
+Exemplo::
+
+    adj = gr.CompiledAdjacency(g)
+    src, tgt, rel = edgeArrays(adj)
+    stats = morphismStatsArrays(nodeClass, src, tgt, rel)
+    regIdx = calcGraphRegIdxArrays(stats)
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+import graph as gr
+
+MorphismStatsArrays = namedtuple('MorphismStatsArrays',
+        ['nodeHits', 'edgeSrc', 'edgeTgt', 'edgeRel', 'ec', 'ns', 'nt'])
+MorphismStatsArrays.__doc__ = """Estatísticas do homomorfismo em forma de
+vetores.
+
+- nodeHits: nodeHits[c] é o número de nodos mapeados na classe c.
+- edgeSrc, edgeTgt, edgeRel: Classe de origem, classe de destino e relação de
+  cada aresta do grafo imagem.
+- ec: Número de arestas do grafo domínio mapeadas em cada aresta imagem.
+- ns, nt: Número de nodos distintos do grafo domínio que contribuem como
+  origem e como destino de cada aresta imagem.
+"""
+
+def edgeArrays(adj):
+    """Vetores (src, tgt, rel) com os índices de origem e destino e o código de
+    classe de cada aresta de uma graph.CompiledAdjacency ou de um
+    frozenGraph.FrozenMultiGraph (cujos vetores são usados sem cópia).
+    """
+    if hasattr(adj, 'edgeArrays'):
+        return tuple(np.asarray(memoryview(a)) for a in adj.edgeArrays())
+
+    edges = np.array(adj.edges, dtype=np.int64).reshape(-1, 3)
+    return edges[:,0].copy(), edges[:,1].copy(), edges[:,2].copy()
+
+def _uniqueKeys(cols, bounds):
+    """Agrupa as linhas formadas pelas colunas fornecidas.
+
+    As colunas são empacotadas em uma única chave inteira quando o produto
+    dos limites cabe em int64. Caso contrário é feito o agrupamento por
+    linhas, que é mais lento.
+
+    Return:
+        (colunas das linhas distintas, inverso, contagens) como em np.unique.
+    """
+    if np.prod([float(b) for b in bounds]) < 2.0**62:
+        key = np.zeros(len(cols[0]), dtype=np.int64)
+        for col, bound in zip(cols, bounds):
+            key *= bound
+            key += col
+        uniq, inverse, counts = np.unique(key, return_inverse=True,
+                return_counts=True)
+        uniqCols = []
+        for bound in reversed(bounds):
+            uniqCols.append(uniq % bound)
+            uniq = uniq // bound
+        uniqCols.reverse()
+    else:
+        rows, inverse, counts = np.unique(np.stack(cols, axis=1), axis=0,
+                return_inverse=True, return_counts=True)
+        uniqCols = [rows[:,k] for k in range(len(cols))]
+
+    return uniqCols, inverse.reshape(-1), counts
+
+def _sortedUnique(values):
+    """Valores distintos de um vetor de inteiros, por ordenação."""
+    values = np.sort(values)
+    if len(values) == 0:
+        return values
+    keep = np.empty(len(values), dtype=bool)
+    keep[0] = True
+    np.not_equal(values[1:], values[:-1], out=keep[1:])
+    return values[keep]
+
+def _countDistinct(groups, elems, numGroups, numElems):
+    """Conta para cada grupo o número de elementos distintos associados a
+    ele pelos pares (groups[k], elems[k]).
+    """
+    pairs = _sortedUnique(groups * np.int64(numElems) + elems)
+    return np.bincount(pairs // numElems, minlength=numGroups)
+
+def morphismStatsArrays(nodeClass, src, tgt, rel, numClasses=None,
+        numRelations=None):
+    """Calcula as estatísticas do homomorfismo cheio induzido pela
+    classificação dos nodos.
+
+    Args:
+        - nodeClass: Vetor de inteiros não negativos com a classe de cada
+              nodo.
+        - src, tgt, rel: Vetores de inteiros não negativos com os índices de
+              origem e destino e a relação de cada aresta.
+        - [numClasses]: Limite superior (exclusivo) das classes. Se None, é
+              calculado a partir de nodeClass.
+        - [numRelations]: Limite superior (exclusivo) das relações. Se None, é
+              calculado a partir de rel.
+
+    Return:
+        MorphismStatsArrays
+    """
+    nodeClass = np.asarray(nodeClass, dtype=np.int64)
+    src = np.asarray(src, dtype=np.int64)
+    tgt = np.asarray(tgt, dtype=np.int64)
+    rel = np.asarray(rel, dtype=np.int64)
+
+    numNodes = len(nodeClass)
+    if numClasses is None:
+        numClasses = int(nodeClass.max()) + 1 if numNodes > 0 else 0
+    if numRelations is None:
+        numRelations = int(rel.max()) + 1 if len(rel) > 0 else 0
+
+    nodeHits = np.bincount(nodeClass, minlength=numClasses)
+
+    if len(src) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return MorphismStatsArrays(nodeHits, empty, empty, empty, empty,
+                empty, empty)
+
+    (edgeSrc, edgeTgt, edgeRel), inverse, ec = _uniqueKeys(
+            [nodeClass[src], nodeClass[tgt], rel],
+            [numClasses, numClasses, numRelations])
+
+    numEdges = len(ec)
+    ns = _countDistinct(inverse, src, numEdges, numNodes)
+    nt = _countDistinct(inverse, tgt, numEdges, numNodes)
+
+    return MorphismStatsArrays(nodeHits, edgeSrc, edgeTgt, edgeRel, ec, ns,
+            nt)
+
+def calcGraphRegIdxArrays(stats):
+    """Equivalente a graph.calcGraphRegIdx para MorphismStatsArrays."""
+    ds = stats.nodeHits[stats.edgeSrc]
+    dt = stats.nodeHits[stats.edgeTgt]
+    ec = stats.ec
+
+    sumNs = int(np.dot(ec, stats.ns))
+    sumNt = int(np.dot(ec, stats.nt))
+    sumDs = int(np.dot(ec, ds))
+    sumDt = int(np.dot(ec, dt))
+
+    assert(sumDs > 0)
+    assert(sumDt > 0)
+
+    return gr.GraphRegIdx((sumNs + sumNt)/(sumDs + sumDt), sumNs/sumDs,
+            sumNt/sumDt)
+
+def populationRegIdx(population, src, tgt, rel, numClasses=None,
+        numRelations=None, maxElems=2**22):
+    """Calcula o índice de regularidade de grafo de várias classificações dos
+    nodos de um mesmo grafo de uma só vez.
+
+    As arestas imagem de todas as classificações são agrupadas juntas, com o
+    número da classificação empacotado na chave. As somas de
+    graph.calcGraphRegIdx são então acumuladas por classificação com
+    np.bincount. Como Sum(ec*ds) é a soma sobre as arestas do grafo domínio
+    do número de nodos na classe de sua origem, ds e dt não precisam das
+    arestas imagem.
+
+    Args:
+        - population: Matriz de inteiros não negativos (classificação x nodo)
+              em que population[p, i] é a classe do nodo i na classificação p.
+        - src, tgt, rel: Como em morphismStatsArrays.
+        - [numClasses], [numRelations]: Como em morphismStatsArrays.
+        - [maxElems]: Número máximo de pares (classificação, aresta)
+              processados de cada vez, para limitar o uso de memória.
+
+    Return:
+        graph.GraphRegIdx em que cada campo é um vetor com o índice de cada
+        classificação.
+
+    Raises:
+        - ValueError: Se o grafo não possui arestas. Neste caso Sum(ec*ds) e
+              Sum(ec*dt) são nulas em todas as classificações e o índice é
+              indefinido (calcGraphRegIdxArrays falha na mesma situação).
+    """
+    population = np.asarray(population, dtype=np.int64)
+    if population.ndim != 2:
+        raise ValueError('population deve ser uma matriz')
+    src = np.asarray(src, dtype=np.int64)
+    tgt = np.asarray(tgt, dtype=np.int64)
+    rel = np.asarray(rel, dtype=np.int64)
+
+    numInds, numNodes = population.shape
+    numEdges = len(src)
+    if numEdges == 0:
+        raise ValueError('Índice de regularidade indefinido para grafo sem '
+                'arestas')
+    if numClasses is None:
+        numClasses = int(population.max()) + 1 if population.size > 0 else 0
+    if numRelations is None:
+        numRelations = int(rel.max()) + 1 if numEdges > 0 else 0
+
+    sumNs = np.zeros(numInds, dtype=np.int64)
+    sumNt = np.zeros(numInds, dtype=np.int64)
+    sumDs = np.zeros(numInds, dtype=np.int64)
+    sumDt = np.zeros(numInds, dtype=np.int64)
+
+    chunk = max(1, maxElems // max(1, numEdges))
+    for start in range(0, numInds, chunk):
+        pop = population[start:start + chunk]
+        numChunk = len(pop)
+        offsets = np.arange(numChunk, dtype=np.int64)[:, None]
+
+        # Número de nodos em cada classe de cada classificação
+        hits = np.bincount((pop + offsets * numClasses).ravel(),
+                minlength=numChunk * numClasses).reshape(numChunk, numClasses)
+
+        clsSrc = pop[:, src]
+        clsTgt = pop[:, tgt]
+        ind = np.broadcast_to(offsets, clsSrc.shape)
+
+        sumDs[start:start + numChunk] = np.take_along_axis(hits, clsSrc,
+                axis=1).sum(axis=1)
+        sumDt[start:start + numChunk] = np.take_along_axis(hits, clsTgt,
+                axis=1).sum(axis=1)
+
+        (edgeInd, _, _, _), inverse, ec = _uniqueKeys(
+                [ind.ravel(), clsSrc.ravel(), clsTgt.ravel(),
+                    np.broadcast_to(rel, clsSrc.shape).ravel()],
+                [numChunk, numClasses, numClasses, numRelations])
+
+        numImageEdges = len(ec)
+        ns = _countDistinct(inverse, np.broadcast_to(src, clsSrc.shape).ravel(),
+                numImageEdges, numNodes)
+        nt = _countDistinct(inverse, np.broadcast_to(tgt, clsTgt.shape).ravel(),
+                numImageEdges, numNodes)
+
+        sumNs[start:start + numChunk] = np.bincount(edgeInd, weights=ec * ns,
+                minlength=numChunk)
+        sumNt[start:start + numChunk] = np.bincount(edgeInd, weights=ec * nt,
+                minlength=numChunk)
+
+    return gr.GraphRegIdx((sumNs + sumNt)/(sumDs + sumDt), sumNs/sumDs,
+            sumNt/sumDt)
+
+def statsToDicts(stats, classValues=None, relValues=None):
+    """Converte MorphismStatsArrays para os dicionários retornados por
+    graph.fullMorphismStats.
+
+    Args:
+        - stats: MorphismStatsArrays
+        - [classValues]: Sequência indexada pelos códigos de classe com os
+              valores das classes. Se None, os próprios códigos são usados.
+        - [relValues]: Como classValues, para as relações.
+
+    Return:
+        (nodeHits, edgeHits, edgeSrcHits, edgeTgtHits)
+    """
+    if classValues is None:
+        classValues = range(len(stats.nodeHits))
+    if relValues is None:
+        relValues = range(int(stats.edgeRel.max()) + 1
+                if len(stats.edgeRel) > 0 else 0)
+
+    nodeHits = {classValues[c]: int(hits)
+            for c, hits in enumerate(stats.nodeHits.tolist()) if hits > 0}
+
+    edges = [(classValues[s], classValues[t], relValues[r])
+            for s, t, r in zip(stats.edgeSrc.tolist(), stats.edgeTgt.tolist(),
+                stats.edgeRel.tolist())]
+
+    edgeHits = dict(zip(edges, stats.ec.tolist()))
+    edgeSrcHits = dict(zip(edges, stats.ns.tolist()))
+    edgeTgtHits = dict(zip(edges, stats.nt.tolist()))
+
+    return nodeHits, edgeHits, edgeSrcHits, edgeTgtHits
+
+def fullMorphismStats(adj, nodeClassF):
+    """Mesmo resultado de graph.fullMorphismStats(g, nodeClassF, None, adj),
+    calculado de forma vetorizada.
+
+    Args:
+        - adj: graph.CompiledAdjacency do grafo domínio
+        - nodeClassF: Função que mapeia cada nodo em uma classe de nodos.
+    """
+    codes = {}
+    classValues = []
+    nodeClass = np.empty(len(adj.nodes), dtype=np.int64)
+    for i, node in enumerate(adj.nodes):
+        value = nodeClassF(node)
+        code = codes.get(value)
+        if code is None:
+            code = len(classValues)
+            codes[value] = code
+            classValues.append(value)
+        nodeClass[i] = code
+
+    src, tgt, rel = edgeArrays(adj)
+    stats = morphismStatsArrays(nodeClass, src, tgt, rel,
+            numClasses=len(classValues), numRelations=len(adj.edgeClasses))
+
+    return statsToDicts(stats, classValues, adj.edgeClasses)
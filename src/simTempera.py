@@ -65,6 +65,7 @@ import random
 import itertools
 
 import graph as gr
+from regIdxTracker import RegIdxTracker
 
 logger = logging.getLogger(__name__)
 
@@ -107,6 +108,8 @@ class SimTempora(object):
         self.bestEnergy = float('inf')
         self.bestNodeCls = None
 
+        self._riTracker = None
+
         if refClassAttr:
             refClassSet = g.getNodeAttrValueSet(refClassAttr)
             numClassRef = len(refClassSet)
@@ -128,12 +131,13 @@ class SimTempora(object):
             self.clsPatterns.append(pattVet)
 
     def calcRI(self, nodeCls):
-        stats = gr.fullMorphismStats(self.g,
-                lambda n: nodeCls[n], lambda e: e[2])
-        edgeStats = gr.calcPreRegIdxStats(*stats)
-        graphRI = gr.calcGraphRegIdx(edgeStats)
-        ri = graphRI.ri
-        return ri
+        # A busca altera poucos nodos entre chamadas, então o índice é
+        # atualizado movendo apenas os nodos que mudaram de classe
+        if self._riTracker is None:
+            self._riTracker = RegIdxTracker(self.g, nodeCls)
+        else:
+            self._riTracker.setNodeClasses(nodeCls)
+        return self._riTracker.getRegIdx().ri
 
     def _calcRawClassPatterns(self, nodeCls):
         for vet in self.clsPatterns:
@@ -0,0 +1,71 @@
+# coding: utf-8
+"""Mede a criação de agregadores a partir de atributos de nodos e arestas e
+a sua propagação para o grafo quociente em
+MultiGraph.spawnFromClassAttributes, com o tempo e a memória que permanece
+em uso pelos agregadores.
+
+Uso: python3 benchAggregators.py [numArestas] [numAtributos] [numClasses]
+(com src/lib no PYTHONPATH, veja setup.sh)
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+import graph as gr
+
+def newGraph(numEdges, numAttrs, numClasses):
+    rnd = random.Random(1)
+    numNodes = numEdges // 10
+    edges = [(rnd.randrange(numNodes), rnd.randrange(numNodes),
+        rnd.randrange(4)) for _ in range(numEdges)]
+
+    attrs = ['a{0}'.format(k) for k in range(numAttrs)]
+    g = gr.MultiGraph()
+    g.addNodeAttrSpec(gr.AttrSpec('class', 'int'))
+    for attr in attrs:
+        g.addNodeAttrSpec(gr.AttrSpec(attr, 'double'))
+    g.addEdgeAttrSpec(gr.AttrSpec('peso', 'double'))
+    nodeValues = {attr: [rnd.random() for _ in range(numNodes)]
+            for attr in attrs}
+    nodeValues['class'] = [rnd.randrange(numClasses) for _ in range(numNodes)]
+    g.addNodesFrom(range(numNodes), nodeValues)
+    g.addEdgesFrom(edges, {'peso': [rnd.random() for _ in edges]})
+    return g, attrs
+
+def createAggregators(g, attrs):
+    for attr in attrs:
+        g.createAggregatorFromAttribute(g.SCOPE_NODE, attr)
+    g.createAggregatorFromAttribute(g.SCOPE_EDGE, 'peso')
+
+def main(numEdges=1000000, numAttrs=20, numClasses=200):
+    g, attrs = newGraph(numEdges, numAttrs, numClasses)
+    print('{0} nodos, {1} arestas, {2} agregadores de nodos'.format(
+        g.getNumNodes(), g.getNumEdges(), numAttrs))
+
+    # A memória é medida em um cálculo separado, pois o tracemalloc atrasa
+    # cada alocação
+    tracemalloc.start()
+    createAggregators(g, attrs)
+    mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    for attr in attrs:
+        g.removeAggregator(g.SCOPE_NODE, attr)
+    g.removeAggregator(g.SCOPE_EDGE, 'peso')
+
+    start = time.perf_counter()
+    createAggregators(g, attrs)
+    tCreate = time.perf_counter() - start
+
+    start = time.perf_counter()
+    q = g.spawnFromClassAttributes(nodeClassAttr='class')
+    tSpawn = time.perf_counter() - start
+
+    print('criação dos agregadores : {0:7.2f} s {1:8.1f} MB'.format(tCreate,
+        mem / 1e6))
+    print('grafo quociente         : {0:7.2f} s ({1} nodos)'.format(tSpawn,
+        q.getNumNodes()))
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
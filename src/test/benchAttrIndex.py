@@ -0,0 +1,61 @@
+# coding: utf-8
+"""Mede a seleção dos nodos de uma classe pelo índice invertido de atributos
+(MultiGraph.getNodesByAttr) comparada com a varredura de todos os nodos com
+getNodeAttr, e o custo de manter o índice ao alterar o atributo.
+
+Uso: python3 benchAttrIndex.py [numNodos] [numClasses]
+(com src/lib no PYTHONPATH, veja setup.sh)
+"""
+
+import random
+import sys
+import time
+
+import graph as gr
+
+def main(numNodes=1000000, numClasses=1000):
+    rnd = random.Random(1)
+    g = gr.MultiGraph()
+    g.addNodeAttrSpec(gr.AttrSpec('class', 'int'))
+    g.addNodesFrom(range(numNodes),
+            {'class': [rnd.randrange(numClasses) for _ in range(numNodes)]})
+    classes = rnd.sample(range(numClasses), 20)
+
+    start = time.perf_counter()
+    scanned = [[node for node in g.nodes()
+        if g.getNodeAttr(node, 'class') == c] for c in classes]
+    tScan = time.perf_counter() - start
+
+    start = time.perf_counter()
+    g.getNodesByAttr('class', classes[0])
+    tBuild = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [g.getNodesByAttr('class', c) for c in classes]
+    tIndex = time.perf_counter() - start
+    assert [sorted(n) for n in scanned] == [sorted(n) for n in indexed]
+
+    updates = [(rnd.randrange(numNodes), rnd.randrange(numClasses))
+            for _ in range(200000)]
+    start = time.perf_counter()
+    for node, c in updates:
+        g.setNodeAttr(node, 'class', c)
+    tSetIndexed = time.perf_counter() - start
+
+    g.dropAttrIndex(g.SCOPE_NODE, 'class')
+    start = time.perf_counter()
+    for node, c in updates:
+        g.setNodeAttr(node, 'class', c)
+    tSet = time.perf_counter() - start
+
+    print('{0} nodos, {1} classes, {2} consultas'.format(numNodes, numClasses,
+        len(classes)))
+    print('varredura com getNodeAttr : {0:8.3f} s'.format(tScan))
+    print('criação do índice         : {0:8.3f} s'.format(tBuild))
+    print('getNodesByAttr            : {0:8.3f} s'.format(tIndex))
+    print('{0} setNodeAttr sem índice: {1:8.3f} s'.format(len(updates), tSet))
+    print('{0} setNodeAttr com índice: {1:8.3f} s'.format(len(updates),
+        tSetIndexed))
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
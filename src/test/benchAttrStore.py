@@ -0,0 +1,60 @@
+# coding: utf-8
+"""Mede o armazenamento colunar dos atributos de arestas (attrStore): memória
+de um grafo com muitos atributos numéricos, tempo de acesso por elemento e
+tempo de leitura em bloco de uma coluna.
+
+Uso: python3 benchAttrStore.py [numArestas] [numAtributos]
+(com src/lib no PYTHONPATH, veja setup.sh)
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+import graph as gr
+
+def main(numEdges=100000, numAttrs=50):
+    rnd = random.Random(1)
+    g = gr.MultiGraph()
+    for _ in range(numEdges):
+        g.addEdge(rnd.randrange(numEdges // 5), rnd.randrange(numEdges // 5),
+                rnd.randrange(3))
+    edges = list(g.edges())
+    attrs = ['a{0}'.format(i) for i in range(numAttrs)]
+    for attr in attrs:
+        g.addEdgeAttrSpec(gr.AttrSpec(attr, 'double'))
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    for attr in attrs:
+        for edge in edges:
+            g.setEdgeAttr(edge, attr, rnd.random())
+    tSet = time.perf_counter() - start
+    mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    total = 0.0
+    for attr in attrs:
+        for edge in edges:
+            total += g.getEdgeAttr(edge, attr)
+    tGet = time.perf_counter() - start
+
+    start = time.perf_counter()
+    totalColumn = 0.0
+    for attr in attrs:
+        values, present = g.getEdgeAttrColumn(attr)
+        totalColumn += sum(values)
+    tColumn = time.perf_counter() - start
+
+    assert abs(total - totalColumn) < 1e-6 * total
+
+    print('{0} arestas, {1} atributos'.format(len(edges), numAttrs))
+    print('Memória dos atributos: {0:8.1f} MB'.format(mem / 1e6))
+    print('setEdgeAttr          : {0:8.2f} s'.format(tSet))
+    print('getEdgeAttr          : {0:8.2f} s'.format(tGet))
+    print('getEdgeAttrColumn    : {0:8.2f} s'.format(tColumn))
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
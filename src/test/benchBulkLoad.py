@@ -0,0 +1,68 @@
+# coding: utf-8
+"""Compara a carga de arestas aresta a aresta (addEdge + setEdgeAttr) com a
+carga em bloco (addEdgesFrom) para uma lista de arestas com peso e relação,
+no formato lido de um CSV por graphApp.loadCsvGraphEdges.
+
+Uso: python3 benchBulkLoad.py [numArestas]
+(com src/lib no PYTHONPATH, veja setup.sh)
+"""
+
+import operator
+import random
+import sys
+import time
+
+import graph as gr
+
+def perEdge(edges, weights, relations):
+    g = gr.MultiGraph()
+    g.addEdgeAttrSpec(gr.AttrSpec('weight', 'double'))
+    g.addEdgeAttrSpec(gr.AttrSpec('relation', 'string'))
+    for edge, weight, rel in zip(edges, weights, relations):
+        if g.hasEdge(*edge):
+            weight += g.getEdgeAttr(edge, 'weight')
+        else:
+            g.addEdge(*edge)
+        g.setEdgeAttr(edge, 'weight', weight)
+        g.setEdgeAttr(edge, 'relation', rel)
+    return g
+
+def bulk(edges, weights, relations):
+    g = gr.MultiGraph()
+    g.addEdgeAttrSpec(gr.AttrSpec('weight', 'double'))
+    g.addEdgeAttrSpec(gr.AttrSpec('relation', 'string'))
+    g.addEdgesFrom(edges, {'weight': weights, 'relation': relations},
+            combine={'weight': operator.add})
+    return g
+
+def main(numEdges=1000000):
+    rnd = random.Random(1)
+    numNodes = numEdges // 10
+    relNames = ['r0', 'r1', 'r2']
+    edges = []
+    relations = []
+    for _ in range(numEdges):
+        rel = rnd.randrange(3)
+        edges.append((rnd.randrange(numNodes), rnd.randrange(numNodes), rel))
+        relations.append(relNames[rel])
+    weights = [rnd.random() for _ in range(numEdges)]
+
+    start = time.perf_counter()
+    g1 = perEdge(edges, weights, relations)
+    tPerEdge = time.perf_counter() - start
+    counts = (g1.getNumNodes(), g1.getNumEdges())
+    del g1
+
+    start = time.perf_counter()
+    g2 = bulk(edges, weights, relations)
+    tBulk = time.perf_counter() - start
+
+    assert counts == (g2.getNumNodes(), g2.getNumEdges())
+
+    print('{0} arestas lidas, {1} distintas'.format(numEdges,
+        g2.getNumEdges()))
+    print('addEdge + setEdgeAttr: {0:8.2f} s'.format(tPerEdge))
+    print('addEdgesFrom         : {0:8.2f} s'.format(tBulk))
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
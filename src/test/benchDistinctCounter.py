@@ -0,0 +1,50 @@
+# coding: utf-8
+"""Mede graph.fullMorphismStats com os conjuntos exatos de nodos de origem e
+destino de cada aresta imagem e com hyperLogLog.HyperLogLog: tempo e pico de
+memória alocada durante o cálculo, para muitas arestas imagem pequenas e para
+poucas grandes.
+
+Uso: python3 benchDistinctCounter.py
+(com src/lib no PYTHONPATH, veja setup.sh)
+"""
+
+import random
+import time
+import tracemalloc
+
+import graph as gr
+from hyperLogLog import HyperLogLog
+
+def newGraph(numNodes, numEdges, numClasses, numRelations):
+    rnd = random.Random(1)
+    g = gr.MultiGraph()
+    g.addNodesFrom(range(numNodes))
+    g.addEdgesFrom((rnd.randrange(numNodes), rnd.randrange(numNodes),
+        rnd.randrange(numRelations)) for _ in range(numEdges))
+    nodeClass = {n: rnd.randrange(numClasses) for n in range(numNodes)}
+    return g, nodeClass.__getitem__
+
+def run(g, nodeClassF, counter):
+    tracemalloc.start()
+    gr.fullMorphismStats(g, nodeClassF, lambda e: e[2],
+            distinctCounter=counter)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    stats = gr.fullMorphismStats(g, nodeClassF, lambda e: e[2],
+            distinctCounter=counter)
+    return time.perf_counter() - start, peak, len(stats[2])
+
+def main():
+    for args in [(20000, 200000, 20, 2), (100000, 1000000, 3, 1)]:
+        g, nodeClassF = newGraph(*args)
+        print('{0} nodos, {1} arestas'.format(g.getNumNodes(),
+            g.getNumEdges()))
+        for name, counter in [('exato', None), ('HyperLogLog', HyperLogLog)]:
+            elapsed, peak, numEdges = run(g, nodeClassF, counter)
+            print('  {0:12}: {1:6.2f} s {2:7.1f} MB ({3} arestas imagem)'
+                    .format(name, elapsed, peak / 1e6, numEdges))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# coding: utf-8
+"""Compara o tempo de graph.fullMorphismStats com o da versão vetorizada de
+vecMorphism em grafos aleatórios.
+
+Uso: python3 benchMorphismStats.py [numNodos] [numArestas] [numClasses]
+(com src/lib no PYTHONPATH, veja setup.sh)
+"""
+
+import sys
+import random
+import timeit
+
+import numpy as np
+
+import graph as gr
+import vecMorphism as vm
+
+def randomGraph(numNodes, numEdges, numRelations, rnd):
+    g = gr.MultiGraph()
+    for n in range(numNodes):
+        g.addNode(n)
+    while g.getNumEdges() < numEdges:
+        g.addEdge(rnd.randrange(numNodes), rnd.randrange(numNodes),
+                rnd.randrange(numRelations))
+    return g
+
+def bench(label, func, repeat=3):
+    t = min(timeit.repeat(func, number=1, repeat=repeat))
+    print('{0:40s} {1:10.4f} s'.format(label, t))
+    return t
+
+def main(numNodes=100000, numEdges=300000, numClasses=100, numRelations=3):
+    rnd = random.Random(1)
+    g = randomGraph(numNodes, numEdges, numRelations, rnd)
+    nodeCls = {n: rnd.randrange(numClasses) for n in g.nodes()}
+
+    adj = gr.CompiledAdjacency(g)
+    src, tgt, rel = vm.edgeArrays(adj)
+    nodeClass = np.array([nodeCls[n] for n in adj.nodes], dtype=np.int64)
+
+    print('{0} nodos, {1} arestas, {2} classes'.format(numNodes, numEdges,
+        numClasses))
+
+    def original():
+        stats = gr.fullMorphismStats(g, lambda n: nodeCls[n], lambda e: e[2])
+        return gr.calcGraphRegIdx(gr.calcPreRegIdxStats(*stats))
+
+    def compiled():
+        stats = gr.fullMorphismStats(g, lambda n: nodeCls[n], None, adj)
+        return gr.calcGraphRegIdx(gr.calcPreRegIdxStats(*stats))
+
+    def dicts():
+        return vm.fullMorphismStats(adj, lambda n: nodeCls[n])
+
+    def arrays():
+        stats = vm.morphismStatsArrays(nodeClass, src, tgt, rel,
+                numClasses=numClasses, numRelations=numRelations)
+        return vm.calcGraphRegIdxArrays(stats)
+
+    riOri = original()
+    riVec = arrays()
+    assert all(abs(a - b) < 1e-9 for a, b in zip(riOri, riVec))
+
+    tOri = bench('fullMorphismStats + calcGraphRegIdx', original)
+    bench('fullMorphismStats (CompiledAdjacency)', compiled)
+    bench('vecMorphism.fullMorphismStats (dicts)', dicts)
+    tVec = bench('vecMorphism arrays + calcGraphRegIdx', arrays)
+    print('Aceleração (arrays): {0:.1f}x'.format(tOri / tVec))
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
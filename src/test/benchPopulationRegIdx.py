@@ -0,0 +1,65 @@
+# coding: utf-8
+"""Mede a vazão (indivíduos por segundo) da avaliação do índice de
+regularidade de uma população de classificações: um indivíduo por vez, como
+em geneticAlgoRegHom.createRegIdxEvalFunction, e em lote com
+vecMorphism.populationRegIdx.
+
+Uso: python3 benchPopulationRegIdx.py [numNodos] [numArestas] [tamPopulação]
+(com src/lib no PYTHONPATH, veja setup.sh)
+"""
+
+import sys
+import random
+import time
+
+import numpy as np
+
+import graph as gr
+import vecMorphism as vm
+
+NUM_CLASS = 5
+
+def randomGraph(numNodes, numEdges, numRelations, rnd):
+    g = gr.MultiGraph()
+    for n in range(numNodes):
+        g.addNode(n)
+    while g.getNumEdges() < numEdges:
+        g.addEdge(rnd.randrange(numNodes), rnd.randrange(numNodes),
+                rnd.randrange(numRelations))
+    return g
+
+def main(numNodes=20000, numEdges=60000, popSize=200, numRelations=3):
+    rnd = random.Random(1)
+    g = randomGraph(numNodes, numEdges, numRelations, rnd)
+    adj = gr.CompiledAdjacency(g)
+    src, tgt, rel = vm.edgeArrays(adj)
+
+    population = np.random.default_rng(1).integers(1, NUM_CLASS + 1,
+            size=(popSize, numNodes))
+    individuals = population.tolist()
+
+    print('{0} nodos, {1} arestas, população de {2}'.format(numNodes,
+        numEdges, popSize))
+
+    def evaluate(idxToClass):
+        stats = gr.fullMorphismStats(g, lambda n: idxToClass[adj.nodeIdx[n]],
+                lambda e: e[2])
+        return gr.calcGraphRegIdx(gr.calcPreRegIdxStats(*stats)).ri
+
+    numSingle = min(popSize, 20)
+    start = time.perf_counter()
+    single = [evaluate(ind) for ind in individuals[:numSingle]]
+    tSingle = (time.perf_counter() - start) / numSingle
+
+    start = time.perf_counter()
+    batch = vm.populationRegIdx(population, src, tgt, rel).ri
+    tBatch = (time.perf_counter() - start) / popSize
+
+    assert np.allclose(single, batch[:numSingle])
+
+    print('Um por vez: {0:10.1f} indivíduos/s'.format(1 / tSingle))
+    print('Em lote   : {0:10.1f} indivíduos/s'.format(1 / tBatch))
+    print('Aceleração: {0:.1f}x'.format(tSingle / tBatch))
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
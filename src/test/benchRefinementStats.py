@@ -0,0 +1,58 @@
+# coding: utf-8
+"""Compara o cálculo das estatísticas do homomorfismo de todos os níveis de
+um refinamento por equivalência regular com uma passada pelas arestas por
+nível (graph.fullMorphismStats) e com uma única passada
+(refinementTree.refinementMorphismStats).
+
+O grafo é formado por cópias de um caminho com arestas nos dois sentidos, o
+que produz um refinamento com cerca de comprimento/2 níveis.
+
+Uso: python3 benchRefinementStats.py [numCópias] [comprimento]
+(com src/lib no PYTHONPATH, veja setup.sh)
+"""
+
+import sys
+import time
+
+import graph as gr
+from refinementTree import RefinementTree, refinementMorphismStats
+
+def pathsGraph(numCopies, length):
+    g = gr.MultiGraph()
+    for c in range(numCopies):
+        for i in range(length):
+            g.addNode((c, i))
+        for i in range(length - 1):
+            g.addEdge((c, i), (c, i + 1), 0)
+            g.addEdge((c, i + 1), (c, i), 1)
+    return g
+
+def main(numCopies=1000, length=60):
+    g = pathsGraph(numCopies, length)
+    tree = RefinementTree(g.nodes())
+    def ctrlFunc(i, classes, done, parents):
+        if not done:
+            tree.addLevel(classes, parents)
+        return True
+    gr.regularEquivalence(g, ctrlFunc=ctrlFunc, worklist=True)
+
+    print('{0} nodos, {1} arestas, {2} níveis'.format(g.getNumNodes(),
+        g.getNumEdges(), tree.getNumLevels()))
+
+    start = time.perf_counter()
+    perLevel = [gr.fullMorphismStats(g, dict(zip(tree.nodes, vector)).get,
+        lambda e: e[2]) for _, vector in tree.iterClassVectors()]
+    tPerLevel = time.perf_counter() - start
+
+    start = time.perf_counter()
+    onePass = refinementMorphismStats(g, tree)
+    tOnePass = time.perf_counter() - start
+
+    assert perLevel == onePass
+
+    print('Uma passada por nível: {0:8.2f} s'.format(tPerLevel))
+    print('Passada única        : {0:8.2f} s'.format(tOnePass))
+    print('Aceleração: {0:.1f}x'.format(tPerLevel / tOnePass))
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
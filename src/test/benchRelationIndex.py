@@ -0,0 +1,68 @@
+# coding: utf-8
+"""Mede as consultas de adjacência restritas a uma relação com e sem o índice
+por relação de MultiGraph (buildRelationIndex): vizinhos e grau por relação
+de todos os nodos, arestas de uma relação e o custo de manter o índice ao
+acrescentar arestas.
+
+Uso: python3 benchRelationIndex.py [numArestas] [numRelacoes]
+(com src/lib no PYTHONPATH, veja setup.sh)
+"""
+
+import random
+import sys
+import time
+
+import graph as gr
+
+def queries(g, rel):
+    """Percorre vizinhos e graus de todos os nodos e as arestas de 'rel'."""
+    start = time.perf_counter()
+    total = 0
+    for node in g.nodes():
+        for _ in g.outNeighboors(node, rel):
+            total += 1
+        total += g.inDegree(node, rel)
+    tNeighboors = time.perf_counter() - start
+
+    start = time.perf_counter()
+    numEdges = sum(1 for _ in g.edges(rel))
+    tEdges = time.perf_counter() - start
+    return total, numEdges, tNeighboors, tEdges
+
+def main(numEdges=500000, numRelations=20):
+    rnd = random.Random(1)
+    numNodes = numEdges // 20
+    edges = [(rnd.randrange(numNodes), rnd.randrange(numNodes),
+        rnd.randrange(numRelations)) for _ in range(numEdges)]
+
+    # Os dois grafos são medidos separadamente: com ambos na memória o
+    # coletor de lixo do Python distorce o tempo de carga do segundo
+    rel = 0
+    g = gr.MultiGraph()
+    start = time.perf_counter()
+    g.addEdgesFrom(edges)
+    tLoad = time.perf_counter() - start
+    total, numRelEdges, tNeighboors, tEdges = queries(g, rel)
+    numEdgesTotal = g.getNumEdges()
+    del g
+
+    g = gr.MultiGraph()
+    g.buildRelationIndex()
+    start = time.perf_counter()
+    g.addEdgesFrom(edges)
+    tLoadIdx = time.perf_counter() - start
+    totalIdx, numRelEdgesIdx, tNeighboorsIdx, tEdgesIdx = queries(g, rel)
+    assert (total, numRelEdges) == (totalIdx, numRelEdgesIdx)
+
+    print('{0} arestas, {1} relações, {2} arestas da relação {3}'.format(
+        numEdgesTotal, numRelations, numRelEdges, rel))
+    print('                      sem índice  com índice')
+    print('addEdgesFrom          : {0:8.2f} s  {1:8.2f} s'.format(tLoad,
+        tLoadIdx))
+    print('vizinhos e grau (rel) : {0:8.2f} s  {1:8.2f} s'.format(tNeighboors,
+        tNeighboorsIdx))
+    print('edges(rel)            : {0:8.2f} s  {1:8.2f} s'.format(tEdges,
+        tEdgesIdx))
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
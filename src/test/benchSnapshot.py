@@ -0,0 +1,67 @@
+# coding: utf-8
+"""Mede a criação de uma cópia copy-on-write de um grafo (MultiGraph.snapshot)
+comparada com copy.deepcopy, e o custo das primeiras alterações depois da
+cópia: a de um atributo copia apenas a sua coluna e a primeira alteração da
+estrutura copia a adjacência e os índices, que o outro grafo, já sem quem os
+compartilhe, altera sem copiar.
+
+Uso: python3 benchSnapshot.py [numArestas]
+(com src/lib no PYTHONPATH, veja setup.sh)
+"""
+
+import copy
+import random
+import sys
+import time
+import tracemalloc
+
+import graph as gr
+
+def measure(func):
+    """Tempo e memória alocada (que continua em uso) por func()."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, mem
+
+def main(numEdges=1000000):
+    rnd = random.Random(1)
+    numNodes = numEdges // 10
+    edges = [(rnd.randrange(numNodes), rnd.randrange(numNodes),
+        rnd.randrange(4)) for _ in range(numEdges)]
+
+    g = gr.MultiGraph()
+    g.addNodeAttrSpec(gr.AttrSpec('class', 'int'))
+    g.addEdgeAttrSpec(gr.AttrSpec('peso', 'double'))
+    g.addEdgesFrom(edges, {'peso': [rnd.random() for _ in edges]})
+    g.addNodesFrom(range(numNodes),
+            {'class': [rnd.randrange(20) for _ in range(numNodes)]})
+    g.createAggregatorFromAttribute(g.SCOPE_EDGE, 'peso')
+
+    s, tSnap, memSnap = measure(g.snapshot)
+    _, tAttr, memAttr = measure(lambda: s.setNodeAttr(0, 'class', 99))
+    _, tStruct, memStruct = measure(lambda: s.addEdge(0, 1, 'nova'))
+    assert g.getNodeAttr(0, 'class') != 99 and not g.hasEdge(0, 1, 'nova')
+    _, tOrig, memOrig = measure(lambda: g.addEdge(0, 2, 'nova'))
+    del s
+
+    _, tDeep, memDeep = measure(lambda: copy.deepcopy(g))
+
+    print('{0} nodos, {1} arestas'.format(g.getNumNodes(), g.getNumEdges()))
+    print('                                tempo      memória')
+    print('copy.deepcopy               : {0:8.3f} s  {1:8.1f} MB'.format(
+        tDeep, memDeep / 1e6))
+    print('snapshot                    : {0:8.3f} s  {1:8.1f} MB'.format(
+        tSnap, memSnap / 1e6))
+    print('1a alteração de atributo    : {0:8.3f} s  {1:8.1f} MB'.format(
+        tAttr, memAttr / 1e6))
+    print('1a alteração da estrutura   : {0:8.3f} s  {1:8.1f} MB'.format(
+        tStruct, memStruct / 1e6))
+    print('  e a seguir no original    : {0:8.3f} s  {1:8.1f} MB'.format(
+        tOrig, memOrig / 1e6))
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,82 @@
+# coding: utf-8
+"""Mede a memória dos atributos de perfil de conexão (como em
+GraphAppControl.createConnectionProfileNodeAttributes: um atributo inteiro
+de padrão 0 por relação, classe e direção) com AttrSpecs normais e
+esparsos, e o tempo de leitura de todos os valores.
+
+Uso: python3 benchSparseAttrs.py [numNodos] [numRelacoes] [numClasses]
+(com src/lib no PYTHONPATH, veja setup.sh)
+"""
+
+import itertools
+import random
+import sys
+import time
+import tracemalloc
+
+import graph as gr
+
+def profileAttrs(g, nodeClass, sparse):
+    profAttrs = {}
+    for prof in itertools.product(g.relations, set(nodeClass.values()),
+            ('in', 'out')):
+        name = '_'.join(itertools.chain(['conProf'], map(str, prof)))
+        g.addNodeAttrSpec(gr.AttrSpec(name, int, 0, sparse=sparse))
+        profAttrs[prof] = name
+
+    for node in g.nodes():
+        for nei, rel in g.outNeighboors(node):
+            attr = profAttrs[(rel, nodeClass[nei], 'out')]
+            g.setNodeAttr(node, attr, g.getNodeAttr(node, attr) + 1)
+        for nei, rel in g.inNeighboors(node):
+            attr = profAttrs[(rel, nodeClass[nei], 'in')]
+            g.setNodeAttr(node, attr, g.getNodeAttr(node, attr) + 1)
+    return list(profAttrs.values())
+
+def main(numNodes=100000, numRelations=4, numClasses=20):
+    rnd = random.Random(1)
+    edges = [(rnd.randrange(numNodes), rnd.randrange(numNodes),
+        rnd.randrange(numRelations)) for _ in range(3 * numNodes)]
+    nodeClass = {n: rnd.randrange(numClasses) for n in range(numNodes)}
+
+    def newGraph():
+        g = gr.MultiGraph()
+        g.addNodesFrom(range(numNodes))
+        g.addEdgesFrom(edges)
+        return g
+
+    results = []
+    for sparse in (False, True):
+        # A memória é medida em um cálculo separado: o tracemalloc atrasa
+        # cada alocação e distorceria o tempo das colunas esparsas
+        g = newGraph()
+        tracemalloc.start()
+        profileAttrs(g, nodeClass, sparse)
+        mem = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del g
+
+        g = newGraph()
+        start = time.perf_counter()
+        attrs = profileAttrs(g, nodeClass, sparse)
+        tSet = time.perf_counter() - start
+
+        start = time.perf_counter()
+        total = sum(g.getNodeAttr(node, attr)
+                for attr in attrs for node in g.nodes())
+        tGet = time.perf_counter() - start
+        results.append((mem, tSet, tGet, total))
+        del g
+
+    assert results[0][3] == results[1][3]
+    print('{0} nodos, {1} atributos de perfil'.format(numNodes, len(attrs)))
+    print('                   normal    esparso')
+    print('memória (MB) : {0:9.1f}  {1:9.1f}'.format(results[0][0] / 1e6,
+        results[1][0] / 1e6))
+    print('cálculo (s)  : {0:9.2f}  {1:9.2f}'.format(results[0][1],
+        results[1][1]))
+    print('leitura (s)  : {0:9.2f}  {1:9.2f}'.format(results[0][2],
+        results[1][2]))
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
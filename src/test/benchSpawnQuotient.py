@@ -0,0 +1,41 @@
+# coding: utf-8
+"""Mede MultiGraph.spawnFromClassAttributes (grafo quociente com atributos de
+contagem e de índice de regularidade) com classes de nodos e de arestas
+dadas por atributos.
+
+Uso: python3 benchSpawnQuotient.py [numArestas] [numClasses]
+(com src/lib no PYTHONPATH, veja setup.sh)
+"""
+
+import random
+import sys
+import time
+
+import graph as gr
+
+def main(numEdges=1000000, numClasses=200):
+    rnd = random.Random(1)
+    numNodes = numEdges // 10
+    edges = [(rnd.randrange(numNodes), rnd.randrange(numNodes),
+        rnd.randrange(4)) for _ in range(numEdges)]
+
+    g = gr.MultiGraph()
+    g.addNodeAttrSpec(gr.AttrSpec('class', 'int'))
+    g.addEdgeAttrSpec(gr.AttrSpec('eclass', 'int'))
+    g.addEdgesFrom(edges, {'eclass': [rel % 2 for _, _, rel in edges]})
+    g.addNodesFrom(range(numNodes),
+            {'class': [rnd.randrange(numClasses) for _ in range(numNodes)]})
+
+    print('{0} nodos, {1} arestas, {2} classes'.format(g.getNumNodes(),
+        g.getNumEdges(), numClasses))
+    for args in [{'nodeClassAttr': 'class'},
+            {'nodeClassAttr': 'class', 'edgeClassAttr': 'eclass'}]:
+        start = time.perf_counter()
+        q = g.spawnFromClassAttributes(countPrefix='c', regIdxPrefix='ri',
+                **args)
+        elapsed = time.perf_counter() - start
+        print('{0:45}: {1:7.2f} s ({2} arestas)'.format(
+            ', '.join(sorted(args.values())), elapsed, q.getNumEdges()))
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -16,4 +16,11 @@ if __name__ == '__main__':
     g.classifyNodesRegularEquivalence(classAttr='c1')
     g.classifyNodesRegularEquivalence(classAttr='c2', preClassAttr='preclass')
 
+    # Conferindo o cálculo direto da partição regular mais grossa com o
+    # resultado final das iterações.
+    for attr, preClassAttr in (('c1', None), ('c2', 'preclass')):
+        classes = gr.coarsestRegularPartition(g, preClassAttr=preClassAttr)
+        for node, c in classes.items():
+            assert g.getNodeAttr(node, attr) == c
+
     g.writeGraphml(ARQ_OUT) 